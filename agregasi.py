@@ -0,0 +1,93 @@
+"""
+Agregasi dan pivot data klasifikasi untuk grafik.
+
+Semua endpoint grafik memakai modul ini: hasil query berbentuk baris
+(label, seri, jumlah) dipivot sekali jalan menjadi matriks label x seri,
+lalu diubah ke format dataset Chart.js.
+"""
+from collections import defaultdict
+
+# Ekspresi SQL untuk setiap dimensi pengelompokan yang diizinkan. Nama dimensi
+# dipakai langsung dari parameter request, jadi hanya kunci di sini yang boleh
+# masuk ke query.
+DIMENSI = {
+    'bulan': "strftime('%Y-%m', p.tanggal_ukur)",
+    'tahun': "strftime('%Y', p.tanggal_ukur)",
+    'status_gizi': 'k.status_gizi',
+    'desa': "COALESCE(d.nama_desa, 'Tanpa Desa')",
+    'puskesmas': 'b.puskesmas',
+    'jenis_kelamin': 'b.jenis_kelamin',
+    # Usia saat pengukuran, dikelompokkan per 12 bulan
+    'kelompok_usia': '''
+        CASE
+            WHEN julianday(p.tanggal_ukur) - julianday(b.tanggal_lahir) < 365.25 THEN '0-11 bulan'
+            WHEN julianday(p.tanggal_ukur) - julianday(b.tanggal_lahir) < 730.5 THEN '12-23 bulan'
+            WHEN julianday(p.tanggal_ukur) - julianday(b.tanggal_lahir) < 1095.75 THEN '24-35 bulan'
+            WHEN julianday(p.tanggal_ukur) - julianday(b.tanggal_lahir) < 1461 THEN '36-47 bulan'
+            ELSE '48+ bulan'
+        END
+    ''',
+}
+
+
+def pivot(rows, seri=None):
+    """
+    Pivot baris (label, seri, jumlah) dalam satu kali jalan.
+
+    Mengembalikan (labels, matriks) dengan labels terurut dan matriks berupa
+    dict seri -> list jumlah sejajar labels. Jika `seri` diberikan, hanya seri
+    tersebut yang dipakai (urutannya dipertahankan, seri kosong berisi nol).
+    """
+    sel = defaultdict(dict)
+    semua_seri = {}
+    for label, nama, jumlah in rows:
+        if seri is not None and nama not in seri:
+            continue
+        sel[label][nama] = sel[label].get(nama, 0) + (jumlah or 0)
+        semua_seri[nama] = None
+
+    labels = sorted(sel)
+    urutan_seri = list(seri) if seri is not None else sorted(semua_seri)
+    matriks = {nama: [sel[label].get(nama, 0) for label in labels] for nama in urutan_seri}
+    return labels, matriks
+
+
+def datasets_chart(matriks, gaya=None):
+    """Ubah matriks hasil pivot menjadi list dataset Chart.js; `gaya` memberi atribut tambahan per seri"""
+    gaya = gaya or {}
+    return [
+        {'label': str(nama).title(), 'data': data, **gaya.get(nama, {})}
+        for nama, data in matriks.items()
+    ]
+
+
+def query_rekap(label, seri, start_date=None, end_date=None):
+    """
+    Query (sql, params) jumlah klasifikasi per (label, seri) dengan label dan
+    seri diambil dari DIMENSI. ValueError jika dimensi tidak dikenal.
+    """
+    for dimensi in (label, seri):
+        if dimensi not in DIMENSI:
+            raise ValueError(f'Dimensi tidak dikenal: {dimensi}')
+    query = f'''
+        SELECT {DIMENSI[label]} AS label, {DIMENSI[seri]} AS seri, COUNT(*) AS jumlah
+        FROM pengukuran p
+        JOIN klasifikasi k ON k.pengukuran_id = p.id
+        JOIN balita b ON b.id = p.balita_id
+        LEFT JOIN desa_cimarga d ON d.id = b.desa_id
+        WHERE 1=1
+    '''
+    params = []
+    if start_date:
+        query += ' AND p.tanggal_ukur >= ?'
+        params.append(start_date)
+    if end_date:
+        query += ' AND p.tanggal_ukur <= ?'
+        params.append(end_date)
+    return query + ' GROUP BY 1, 2', params
+
+
+def rekap(conn, label, seri, start_date=None, end_date=None, daftar_seri=None):
+    """Jalankan query_rekap lalu pivot hasilnya; lihat pivot() untuk bentuk keluarannya"""
+    rows = conn.execute(*query_rekap(label, seri, start_date, end_date)).fetchall()
+    return pivot(rows, daftar_seri)
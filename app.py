@@ -1,29 +1,36 @@
 from flask import (
     Flask, render_template, request, redirect, url_for, 
-    session, flash, jsonify, make_response, current_app, Response, send_file,
+    session, flash, jsonify, current_app, Response, send_file,
+    g, has_app_context,
 )
-from collections import defaultdict, Counter
+from collections import defaultdict, Counter, deque
 from werkzeug.security import generate_password_hash, check_password_hash
 from functools import wraps
 import sqlite3
+import threading
+import json
+import math
+import hashlib
+import base64
+import itertools
+import tempfile
+import csv
+from io import StringIO, BytesIO
+from concurrent.futures import ThreadPoolExecutor
+import time
 import numpy as np
-from sklearn.preprocessing import MinMaxScaler
-from models.knn import KNN
-from models.lvq import LVQ
-from datetime import datetime
+from models import artefak
+# scikit-learn, pandas, openpyxl, pdfkit, pypdf dan models.knn/lvq/tuning diimpor
+# di dalam fungsi yang memakainya agar start worker dan halaman ringan tidak
+# menanggung waktu impornya (lihat test/test_waktu_impor.py)
+from jobs import JobRunner, SKEMA_JOB
+from agregasi import DIMENSI, pivot, datasets_chart, rekap
+from cache_respons import CacheMemori, CacheSQLite, CacheRespons
+import metrik
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from sklearn.model_selection import train_test_split, cross_val_score, StratifiedKFold
-from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
-from sklearn.base import BaseEstimator, ClassifierMixin
 import os
-import pdfkit
 import re
-import pandas as pd
-from dateutil.relativedelta import relativedelta
-from flask_login import login_required
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill
-from io import BytesIO
 
 # =============================================
 # KONFIGURASI APLIKASI
@@ -31,6 +38,22 @@ from io import BytesIO
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY') or 'g1z1_2025_xk32!@#something-long'
 app.config['DATABASE'] = 'gizi_balita.db'
+# Folder cache PDF laporan dan jumlah proses wkhtmltopdf paralel per worker
+app.config['PDF_CACHE_DIR'] = os.path.join(app.instance_path, 'pdf_cache')
+app.config['PDF_WORKERS'] = int(os.environ.get('PDF_WORKERS', 2))
+# Backend cache respons: 'memori' (per worker) atau 'sqlite' (dipakai bersama semua worker)
+app.config['CACHE_RESPONS'] = os.environ.get('CACHE_RESPONS', 'memori')
+app.config['CACHE_RESPONS_PATH'] = os.path.join(app.instance_path, 'cache_respons.db')
+app.config['CACHE_RESPONS_TTL'] = int(os.environ.get('CACHE_RESPONS_TTL', 300))
+app.config['CACHE_RESPONS_MAKS'] = 512
+# Jumlah proses untuk pencarian parameter KNN (kosong = semua CPU)
+app.config['TUNING_PROSES'] = int(os.environ['TUNING_PROSES']) if os.environ.get('TUNING_PROSES') else None
+# Instrumentasi durasi request, SQL dan model serta endpoint /metrics (METRICS=1)
+app.config['METRICS'] = os.environ.get('METRICS', '').lower() in ('1', 'true', 'ya')
+# Direktori artefak model ter-fit (kosong = folder <nama database>.model di samping file database)
+app.config['MODEL_DIR'] = os.environ.get('MODEL_DIR')
+# Sampling LVQ dengan pelatihan minibatch (LVQ_MINIBATCH=1); default per sampel seperti semula
+app.config['LVQ_MINIBATCH'] = os.environ.get('LVQ_MINIBATCH', '').lower() in ('1', 'true', 'ya')
 
 
 # =============================================
@@ -55,13 +78,418 @@ def datetime_format_filter(value):
 # FUNGSI DATABASE
 # =============================================
 
-def get_db():
-    """Membuat koneksi database baru"""
-    conn = sqlite3.connect(app.config['DATABASE'])
+# Pragma untuk setiap koneksi: WAL agar pembaca tidak memblokir penulis antar
+# worker gunicorn, cache halaman 64 MB, mmap 256 MB, tunggu lock hingga 5 detik
+PRAGMA_SQLITE = [
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -65536",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY",
+]
+
+class KoneksiRequest(sqlite3.Connection):
+    """
+    Koneksi yang dipakai bersama oleh semua fungsi dalam satu request.
+    close() dari handler diabaikan; koneksi ditutup oleh close_db saat teardown.
+    """
+    def close(self):
+        pass
+
+    def tutup(self):
+        super().close()
+
+def connect_db(factory=sqlite3.Connection):
+    """Membuat koneksi database baru dengan pragma yang sudah disetel"""
+    db_path = app.config['DATABASE']
+    conn = sqlite3.connect(db_path, timeout=5, factory=factory)
     conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON")
+    for pragma in PRAGMA_SQLITE:
+        conn.execute(pragma)
+    if db_path not in _skema_siap:
+        migrasi_skema(conn)
+        _skema_siap.add(db_path)
     return conn
 
+def get_db():
+    """Koneksi database milik app context aktif (satu per request), dibuat saat pertama dipakai"""
+    if not has_app_context():
+        return connect_db()
+    if 'db' not in g:
+        factory = metrik.koneksi_terukur(KoneksiRequest) if metrik.aktif else KoneksiRequest
+        g.db = connect_db(factory=factory)
+    return g.db
+
+@app.teardown_appcontext
+def close_db(exception):
+    """Menutup koneksi request; transaksi yang belum di-commit dibatalkan"""
+    conn = g.pop('db', None)
+    if conn is not None:
+        conn.tutup()
+
+# Tabel tambahan yang dibuat secara idempoten pada database yang sudah ada.
+# Sama dengan revisi Alembic b5f8d2a7c391 (versi_data) dan e3a9c4b6f027 (job)
+SKEMA_TAMBAHAN = [
+    '''
+    CREATE TABLE IF NOT EXISTS versi_data (
+        nama TEXT PRIMARY KEY,
+        versi INTEGER NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    SKEMA_JOB,
+    # Sudah ada di database lama (tanpa rowid alias); kolom baru ditambah lewat KOLOM_TAMBAHAN
+    '''
+    CREATE TABLE IF NOT EXISTS evaluasi_model (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        accuracy FLOAT,
+        sensitivity FLOAT,
+        specificity FLOAT,
+        cv_mean FLOAT,
+        cv_std FLOAT,
+        timestamp DATETIME
+    )
+    ''',
+]
+
+# Kolom yang dipakai kode tetapi belum ada di database lama
+# (SQLite tidak mendukung ADD COLUMN IF NOT EXISTS)
+KOLOM_TAMBAHAN = [
+    ('balita', 'nik', 'TEXT'),
+    ('balita', 'usia_tahun', 'INTEGER'),
+    ('balita', 'usia_bulan', 'INTEGER'),
+    ('balita', 'desa_id', 'INTEGER'),
+    # Hasil evaluasi model disimpan per hash input (prototipe, k, bobot, konfigurasi CV)
+    ('evaluasi_model', 'kunci_input', 'TEXT'),
+    ('evaluasi_model', 'nilai_k', 'INTEGER'),
+    ('evaluasi_model', 'bobot', 'TEXT'),
+    ('evaluasi_model', 'hasil', 'TEXT'),
+    # Leaderboard pencarian parameter dicatat di riwayat parameter
+    ('parameter_history', 'sumber', "TEXT NOT NULL DEFAULT 'manual'"),
+    ('parameter_history', 'peringkat', 'INTEGER'),
+    ('parameter_history', 'cv_mean', 'REAL'),
+    ('parameter_history', 'cv_std', 'REAL'),
+    # Versi 'model' yang menghasilkan status_gizi, agar reklasifikasi hanya menyentuh baris usang
+    ('klasifikasi', 'versi_model', 'INTEGER'),
+]
+
+# Indeks untuk jalur query utama, sama dengan revisi Alembic di migrations/versions/
+INDEKS_QUERY = [
+    # Hitung pengukuran per balita di data_balita dan cascade hapus balita
+    'CREATE INDEX IF NOT EXISTS idx_pengukuran_balita ON pengukuran (balita_id)',
+    # Filter rentang tanggal_ukur di laporan dan pagination keyset (tanggal_ukur, id)
+    'DROP INDEX IF EXISTS idx_pengukuran_tanggal',
+    'CREATE INDEX IF NOT EXISTS idx_pengukuran_tanggal_id ON pengukuran (tanggal_ukur, id, balita_id)',
+    # Rekap per status gizi cukup dibaca dari indeks (covering)
+    'CREATE INDEX IF NOT EXISTS idx_klasifikasi_status ON klasifikasi (status_gizi, pengukuran_id)',
+    # Rekap tahunan di beranda
+    'CREATE INDEX IF NOT EXISTS idx_klasifikasi_tanggal ON klasifikasi (tanggal_klasifikasi, status_gizi)',
+    # Cek NIK unik saat tambah/edit balita dan pencocokan saat upload
+    'CREATE INDEX IF NOT EXISTS idx_balita_nik ON balita (nik, nama)',
+    # Daftar balita diurutkan per nama
+    'CREATE INDEX IF NOT EXISTS idx_balita_nama ON balita (nama)',
+    # Pencarian hasil evaluasi tersimpan per hash input
+    'CREATE UNIQUE INDEX IF NOT EXISTS idx_evaluasi_model_kunci ON evaluasi_model (kunci_input)',
+    # Jumlah klasifikasi usang di halaman parameter
+    'CREATE INDEX IF NOT EXISTS idx_klasifikasi_versi_model ON klasifikasi (versi_model, pengukuran_id)',
+]
+
+# Rekap jumlah klasifikasi per bulan ukur, desa (0 = tanpa desa) dan status gizi.
+# Dijaga oleh trigger sehingga grafik tidak perlu GROUP BY atas seluruh pengukuran.
+# Sama dengan revisi Alembic 7a3d5c1e9b64
+SKEMA_REKAP = [
+    '''
+    CREATE TABLE IF NOT EXISTS rekap_bulanan (
+        bulan TEXT NOT NULL,
+        tahun TEXT NOT NULL,
+        desa_id INTEGER NOT NULL DEFAULT 0,
+        status_gizi TEXT NOT NULL,
+        jumlah INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (bulan, desa_id, status_gizi)
+    ) WITHOUT ROWID
+    ''',
+    # Klasifikasi baru/terhapus menambah/mengurangi satu hitungan. Join ke pengukuran dan
+    # balita sengaja INNER: saat cascade dari hapus pengukuran/balita, baris induknya sudah
+    # hilang sehingga trigger ini tidak menghitung dua kali
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_rekap_klasifikasi_insert AFTER INSERT ON klasifikasi
+    BEGIN
+        INSERT INTO rekap_bulanan (bulan, tahun, desa_id, status_gizi, jumlah)
+        SELECT strftime('%Y-%m', p.tanggal_ukur), strftime('%Y', p.tanggal_ukur),
+               COALESCE(b.desa_id, 0), NEW.status_gizi, 1
+        FROM pengukuran p JOIN balita b ON b.id = p.balita_id
+        WHERE p.id = NEW.pengukuran_id
+        ON CONFLICT (bulan, desa_id, status_gizi) DO UPDATE SET jumlah = jumlah + excluded.jumlah;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_rekap_klasifikasi_delete AFTER DELETE ON klasifikasi
+    BEGIN
+        INSERT INTO rekap_bulanan (bulan, tahun, desa_id, status_gizi, jumlah)
+        SELECT strftime('%Y-%m', p.tanggal_ukur), strftime('%Y', p.tanggal_ukur),
+               COALESCE(b.desa_id, 0), OLD.status_gizi, -1
+        FROM pengukuran p JOIN balita b ON b.id = p.balita_id
+        WHERE p.id = OLD.pengukuran_id
+        ON CONFLICT (bulan, desa_id, status_gizi) DO UPDATE SET jumlah = jumlah + excluded.jumlah;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_rekap_klasifikasi_update
+    AFTER UPDATE OF status_gizi, pengukuran_id ON klasifikasi
+    BEGIN
+        INSERT INTO rekap_bulanan (bulan, tahun, desa_id, status_gizi, jumlah)
+        SELECT strftime('%Y-%m', p.tanggal_ukur), strftime('%Y', p.tanggal_ukur),
+               COALESCE(b.desa_id, 0), OLD.status_gizi, -1
+        FROM pengukuran p JOIN balita b ON b.id = p.balita_id
+        WHERE p.id = OLD.pengukuran_id
+        ON CONFLICT (bulan, desa_id, status_gizi) DO UPDATE SET jumlah = jumlah + excluded.jumlah;
+        INSERT INTO rekap_bulanan (bulan, tahun, desa_id, status_gizi, jumlah)
+        SELECT strftime('%Y-%m', p.tanggal_ukur), strftime('%Y', p.tanggal_ukur),
+               COALESCE(b.desa_id, 0), NEW.status_gizi, 1
+        FROM pengukuran p JOIN balita b ON b.id = p.balita_id
+        WHERE p.id = NEW.pengukuran_id
+        ON CONFLICT (bulan, desa_id, status_gizi) DO UPDATE SET jumlah = jumlah + excluded.jumlah;
+    END
+    ''',
+    # Hapus pengukuran: kurangi sebelum baris (dan klasifikasinya) hilang
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_rekap_pengukuran_delete BEFORE DELETE ON pengukuran
+    BEGIN
+        INSERT INTO rekap_bulanan (bulan, tahun, desa_id, status_gizi, jumlah)
+        SELECT strftime('%Y-%m', OLD.tanggal_ukur), strftime('%Y', OLD.tanggal_ukur),
+               COALESCE(b.desa_id, 0), k.status_gizi, -1
+        FROM klasifikasi k JOIN balita b ON b.id = OLD.balita_id
+        WHERE k.pengukuran_id = OLD.id
+        ON CONFLICT (bulan, desa_id, status_gizi) DO UPDATE SET jumlah = jumlah + excluded.jumlah;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_rekap_pengukuran_update
+    AFTER UPDATE OF tanggal_ukur, balita_id ON pengukuran
+    BEGIN
+        INSERT INTO rekap_bulanan (bulan, tahun, desa_id, status_gizi, jumlah)
+        SELECT strftime('%Y-%m', OLD.tanggal_ukur), strftime('%Y', OLD.tanggal_ukur),
+               COALESCE(b.desa_id, 0), k.status_gizi, -1
+        FROM klasifikasi k JOIN balita b ON b.id = OLD.balita_id
+        WHERE k.pengukuran_id = OLD.id
+        ON CONFLICT (bulan, desa_id, status_gizi) DO UPDATE SET jumlah = jumlah + excluded.jumlah;
+        INSERT INTO rekap_bulanan (bulan, tahun, desa_id, status_gizi, jumlah)
+        SELECT strftime('%Y-%m', NEW.tanggal_ukur), strftime('%Y', NEW.tanggal_ukur),
+               COALESCE(b.desa_id, 0), k.status_gizi, 1
+        FROM klasifikasi k JOIN balita b ON b.id = NEW.balita_id
+        WHERE k.pengukuran_id = NEW.id
+        ON CONFLICT (bulan, desa_id, status_gizi) DO UPDATE SET jumlah = jumlah + excluded.jumlah;
+    END
+    ''',
+    # Hapus balita: kurangi semua pengukurannya sekaligus sebelum cascade berjalan
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_rekap_balita_delete BEFORE DELETE ON balita
+    BEGIN
+        INSERT INTO rekap_bulanan (bulan, tahun, desa_id, status_gizi, jumlah)
+        SELECT strftime('%Y-%m', p.tanggal_ukur), strftime('%Y', p.tanggal_ukur),
+               COALESCE(OLD.desa_id, 0), k.status_gizi, -COUNT(*)
+        FROM pengukuran p JOIN klasifikasi k ON k.pengukuran_id = p.id
+        WHERE p.balita_id = OLD.id
+        GROUP BY 1, 2, 4
+        ON CONFLICT (bulan, desa_id, status_gizi) DO UPDATE SET jumlah = jumlah + excluded.jumlah;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_rekap_balita_desa AFTER UPDATE OF desa_id ON balita
+    WHEN COALESCE(OLD.desa_id, 0) != COALESCE(NEW.desa_id, 0)
+    BEGIN
+        INSERT INTO rekap_bulanan (bulan, tahun, desa_id, status_gizi, jumlah)
+        SELECT strftime('%Y-%m', p.tanggal_ukur), strftime('%Y', p.tanggal_ukur),
+               desa.id, k.status_gizi, desa.arah * COUNT(*)
+        FROM pengukuran p JOIN klasifikasi k ON k.pengukuran_id = p.id
+        JOIN (SELECT COALESCE(OLD.desa_id, 0) AS id, -1 AS arah
+              UNION ALL SELECT COALESCE(NEW.desa_id, 0), 1) desa
+        WHERE p.balita_id = NEW.id
+        GROUP BY 1, 2, 3, 4
+        ON CONFLICT (bulan, desa_id, status_gizi) DO UPDATE SET jumlah = jumlah + excluded.jumlah;
+    END
+    ''',
+]
+
+# Indeks full-text (FTS5, external content) atas nama, nama_ortu dan nik balita.
+# Prefix 2-3 huruf diindeks agar pencarian saat mengetik tetap cepat.
+# Sama dengan revisi Alembic 9c2e6f0a4d18
+SKEMA_FTS = [
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS balita_fts USING fts5(
+        nama, nama_ortu, nik,
+        content='balita', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_balita_fts_insert AFTER INSERT ON balita
+    BEGIN
+        INSERT INTO balita_fts (rowid, nama, nama_ortu, nik)
+        VALUES (NEW.id, NEW.nama, NEW.nama_ortu, NEW.nik);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_balita_fts_delete AFTER DELETE ON balita
+    BEGIN
+        INSERT INTO balita_fts (balita_fts, rowid, nama, nama_ortu, nik)
+        VALUES ('delete', OLD.id, OLD.nama, OLD.nama_ortu, OLD.nik);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_balita_fts_update AFTER UPDATE OF nama, nama_ortu, nik ON balita
+    BEGIN
+        INSERT INTO balita_fts (balita_fts, rowid, nama, nama_ortu, nik)
+        VALUES ('delete', OLD.id, OLD.nama, OLD.nama_ortu, OLD.nik);
+        INSERT INTO balita_fts (rowid, nama, nama_ortu, nik)
+        VALUES (NEW.id, NEW.nama, NEW.nama_ortu, NEW.nik);
+    END
+    ''',
+]
+
+# Versi 'data' naik setiap kali balita, pengukuran atau klasifikasi berubah;
+# dipakai sebagai kunci cache hasil turunan (mis. PDF laporan).
+# Sama dengan revisi Alembic b5f8d2a7c391
+SKEMA_VERSI_DATA = [
+    # Versi awal trigger UPDATE klasifikasi juga bereaksi pada perubahan versi_model saja
+    'DROP TRIGGER IF EXISTS trg_versi_data_klasifikasi_update',
+] + [
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_versi_data_{nama} AFTER {kejadian} ON {tabel}
+    BEGIN
+        INSERT INTO versi_data (nama, versi, updated_at) VALUES ('data', 1, datetime('now'))
+        ON CONFLICT(nama) DO UPDATE SET versi = versi + 1, updated_at = datetime('now');
+    END
+    '''
+    for nama, kejadian, tabel in [
+        ('balita_insert', 'INSERT', 'balita'),
+        ('balita_update', 'UPDATE', 'balita'),
+        ('balita_delete', 'DELETE', 'balita'),
+        ('pengukuran_insert', 'INSERT', 'pengukuran'),
+        ('pengukuran_update', 'UPDATE', 'pengukuran'),
+        ('pengukuran_delete', 'DELETE', 'pengukuran'),
+        ('klasifikasi_insert', 'INSERT', 'klasifikasi'),
+        # Reklasifikasi yang hanya menandai versi_model bukan perubahan data
+        ('klasifikasi_update_data', 'UPDATE OF pengukuran_id, status_gizi, tanggal_klasifikasi', 'klasifikasi'),
+        ('klasifikasi_delete', 'DELETE', 'klasifikasi'),
+    ]
+]
+
+# Path database yang skemanya sudah dimigrasi oleh proses ini
+_skema_siap = set()
+
+def migrasi_skema(conn):
+    """Menjalankan semua DDL tambahan (tabel, kolom, indeks, trigger, FTS) pada koneksi yang diberikan"""
+    for ddl in SKEMA_TAMBAHAN:
+        conn.execute(ddl)
+    for tabel, kolom, tipe in KOLOM_TAMBAHAN:
+        kolom_ada = {row[1] for row in conn.execute(f'PRAGMA table_info({tabel})')}
+        if kolom not in kolom_ada:
+            conn.execute(f'ALTER TABLE {tabel} ADD COLUMN {kolom} {tipe}')
+    for ddl in INDEKS_QUERY:
+        conn.execute(ddl)
+    # Trigger rekap dibuat setelah kolom yang dirujuknya dipastikan ada
+    for ddl in SKEMA_REKAP + SKEMA_VERSI_DATA:
+        conn.execute(ddl)
+    if not conn.execute('SELECT 1 FROM rekap_bulanan LIMIT 1').fetchone():
+        bangun_ulang_rekap(conn)
+    migrasi_fts(conn)
+    conn.commit()
+
+def app_migrasi():
+    """
+    App untuk perintah Flask-Migrate, mis. `flask --app "app:app_migrasi()" db upgrade`.
+    Flask-Migrate diimpor di sini saja agar tidak ikut menambah waktu start
+    worker. Tanpa Flask-SQLAlchemy: migrations/env.py membuat engine dari
+    app.config['DATABASE'].
+    """
+    from flask_migrate import Migrate
+
+    if 'migrate' not in app.extensions:
+        Migrate(directory=os.path.join(app.root_path, 'migrations')).init_app(app)
+    return app
+
+def migrasi_fts(conn):
+    """Membuat balita_fts beserta triggernya dan mengisinya sekali; dilewati jika SQLite tanpa FTS5"""
+    if fts_tersedia(conn):
+        return
+    try:
+        for ddl in SKEMA_FTS:
+            conn.execute(ddl)
+    except sqlite3.OperationalError as e:
+        app.logger.warning('FTS5 tidak tersedia, pencarian balita memakai LIKE: %s', e)
+        return
+    conn.execute("INSERT INTO balita_fts (balita_fts) VALUES ('rebuild')")
+
+def fts_tersedia(conn):
+    """True jika indeks balita_fts sudah ada di database"""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'balita_fts'"
+    ).fetchone() is not None
+
+def kueri_fts(teks):
+    """
+    Ubah teks pencarian bebas menjadi ekspresi MATCH FTS5: setiap kata menjadi
+    pencarian prefix dan semua kata harus cocok, mis. 'siti nur' -> '"siti"* "nur"*'.
+    None jika teks tidak memuat kata.
+    """
+    kata = re.findall(r'\w+', teks)
+    if not kata:
+        return None
+    return ' '.join(f'"{k}"*' for k in kata)
+
+def get_versi(conn, nama):
+    """Nomor versi data dengan nama tertentu (0 jika belum pernah diubah)"""
+    row = conn.execute('SELECT versi FROM versi_data WHERE nama = ?', (nama,)).fetchone()
+    return row[0] if row else 0
+
+def naikkan_versi(conn, nama):
+    """Menaikkan versi data; dipanggil dalam transaksi yang sama dengan perubahan datanya"""
+    conn.execute('''
+        INSERT INTO versi_data (nama, versi, updated_at) VALUES (?, 1, datetime('now'))
+        ON CONFLICT(nama) DO UPDATE SET versi = versi + 1, updated_at = datetime('now')
+    ''', (nama,))
+
+def versi_cache_respons(nama_versi):
+    """(tuple versi, waktu perubahan terakhir) untuk kunci dan Last-Modified cache respons"""
+    conn = get_db()
+    rows = conn.execute(
+        f"SELECT nama, versi, updated_at FROM versi_data WHERE nama IN ({', '.join('?' * len(nama_versi))})",
+        nama_versi
+    ).fetchall()
+    versi = {row['nama']: row['versi'] for row in rows}
+    diubah = max((row['updated_at'] for row in rows if row['updated_at']), default=None)
+    if diubah:
+        diubah = datetime.strptime(diubah, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+    # Path database ikut masuk agar cache tidak tertukar antar database (mis. saat pengujian)
+    return (app.config['DATABASE'],) + tuple(versi.get(nama, 0) for nama in nama_versi), diubah
+
+def buat_cache_respons():
+    """Membuat CacheRespons sesuai konfigurasi CACHE_RESPONS"""
+    maks, ttl = app.config['CACHE_RESPONS_MAKS'], app.config['CACHE_RESPONS_TTL']
+    if app.config['CACHE_RESPONS'] == 'sqlite':
+        os.makedirs(os.path.dirname(app.config['CACHE_RESPONS_PATH']), exist_ok=True)
+        backend = CacheSQLite(app.config['CACHE_RESPONS_PATH'], maks=maks, ttl=ttl)
+    else:
+        backend = CacheMemori(maks=maks, ttl=ttl)
+    return CacheRespons(backend, versi_cache_respons)
+
+cache_respons = buat_cache_respons()
+
+def bangun_ulang_rekap(conn):
+    """Menghitung ulang seluruh isi rekap_bulanan dari pengukuran dan klasifikasi"""
+    conn.execute('DELETE FROM rekap_bulanan')
+    conn.execute('''
+        INSERT INTO rekap_bulanan (bulan, tahun, desa_id, status_gizi, jumlah)
+        SELECT strftime('%Y-%m', p.tanggal_ukur), strftime('%Y', p.tanggal_ukur),
+               COALESCE(b.desa_id, 0), k.status_gizi, COUNT(*)
+        FROM pengukuran p
+        JOIN klasifikasi k ON k.pengukuran_id = p.id
+        JOIN balita b ON b.id = p.balita_id
+        GROUP BY 1, 2, 3, 4
+    ''')
+
 def init_db():
     """Inisialisasi database dengan struktur dan data awal"""
     db_path = app.config['DATABASE']
@@ -83,15 +511,34 @@ def init_db():
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
         ''')
+        c.execute('''
+        CREATE TABLE IF NOT EXISTS desa_cimarga (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nama_desa TEXT NOT NULL
+        )
+        ''')
+
         c.execute('''
         CREATE TABLE IF NOT EXISTS balita (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nik TEXT,
             nama TEXT NOT NULL,
             tanggal_lahir DATE NOT NULL,
+            usia_tahun INTEGER,
+            usia_bulan INTEGER,
             jenis_kelamin TEXT NOT NULL CHECK (jenis_kelamin IN ('L', 'P')),
             nama_ortu TEXT NOT NULL,
+            provinsi TEXT NOT NULL DEFAULT 'BANTEN',
+            kabupaten_kota TEXT NOT NULL DEFAULT 'KAB LEBAK',
+            kecamatan TEXT NOT NULL DEFAULT 'CIMARGA',
+            puskesmas TEXT NOT NULL DEFAULT 'CIMARGA',
+            desa_id INTEGER,
+            rt TEXT,
+            rw TEXT,
+            alamat TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (desa_id) REFERENCES desa_cimarga(id)
         )
         ''')
 
@@ -128,6 +575,16 @@ def init_db():
         )
         ''')
 
+        c.execute('''
+        CREATE TABLE IF NOT EXISTS dataset_lvq (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            feature1 REAL,
+            feature2 REAL,
+            feature3 REAL,
+            target TEXT
+        )
+        ''')
+
         c.execute('''
         CREATE TABLE IF NOT EXISTS parameter_knn (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -174,7 +631,8 @@ def init_db():
             (nilai_k, bobot_berat, bobot_tinggi, bobot_lila, bobot_umur, bobot_jk)
             VALUES (3, 0.35, 0.30, 0.15, 0.15, 0.05)
         ''')
-        
+
+        migrasi_skema(conn)
         conn.commit()
         print("✅ Database berhasil diinisialisasi")
     except Exception as e:
@@ -208,72 +666,75 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated
 
+# =============================================
+# METRIK
+# =============================================
+
+metrik.aktifkan(app.config['METRICS'])
+
+def kelas_model():
+    """
+    Kelas (KNN, LVQ), diimpor saat pertama dibutuhkan karena memuat scikit-learn;
+    fit/predict diinstrumentasi sekali di sini
+    """
+    from models.knn import KNN
+    from models.lvq import LVQ
+    metrik.ukur_model(KNN, 'knn')
+    metrik.ukur_model(LVQ, 'lvq', metode=('fit',))
+    return KNN, LVQ
+
+@app.before_request
+def mulai_ukur_request():
+    if metrik.aktif:
+        g.mulai_request = time.perf_counter()
+
+@app.after_request
+def catat_durasi_request(response):
+    mulai = g.pop('mulai_request', None)
+    if mulai is not None:
+        route = request.url_rule.rule if request.url_rule else 'tidak_dikenal'
+        metrik.DURASI_REQUEST.observe(time.perf_counter() - mulai, route=route,
+                                      metode=request.method, status=response.status_code)
+    return response
+
+@app.route('/metrics')
+def metrics():
+    """Metrik worker ini dalam format teks Prometheus; 404 jika METRICS tidak aktif"""
+    if not metrik.aktif:
+        return 'Not Found', 404
+    return Response(metrik.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 # =============================================
 # ROUTE BERANDA
 # =============================================
 
+# Warna batang grafik tahunan di beranda
+GAYA_GRAFIK_TAHUNAN = {
+    status: {'backgroundColor': f'rgba({rgb}, 0.6)', 'borderColor': f'rgba({rgb}, 1)', 'borderWidth': 1}
+    for status, rgb in [('normal', '75, 192, 192'), ('kurang', '255, 99, 132'),
+                        ('lebih', '255, 206, 86'), ('buruk', '54, 162, 235')]
+}
+
 @app.route('/')
+@cache_respons.route('data', per_user=True)
 def home():
     # Koneksi ke database
-    conn = sqlite3.connect('gizi_balita.db')
+    conn = get_db()
     cursor = conn.cursor()
 
-    # Query data berdasarkan tahun
+    # Query data berdasarkan tahun (dari rekap bulanan)
     cursor.execute("""
-        SELECT strftime('%Y', tanggal_klasifikasi) AS tahun, status_gizi, COUNT(*) AS jumlah
-        FROM klasifikasi
+        SELECT tahun, status_gizi, SUM(jumlah) AS jumlah
+        FROM rekap_bulanan
         GROUP BY tahun, status_gizi
+        HAVING SUM(jumlah) > 0
         ORDER BY tahun
     """)
     rows = cursor.fetchall()
 
     # Format data untuk Chart.js
-    data_by_year = {}
-    for row in rows:
-        tahun, status_gizi, jumlah = row
-        if tahun not in data_by_year:
-            data_by_year[tahun] = {'normal': 0, 'kurang': 0, 'lebih': 0, 'buruk': 0}
-        data_by_year[tahun][status_gizi] = jumlah
-
-    labels = list(data_by_year.keys())  # Tahun sebagai label
-    normal_data = [data_by_year[tahun]['normal'] for tahun in labels]
-    kurang_data = [data_by_year[tahun]['kurang'] for tahun in labels]
-    lebih_data = [data_by_year[tahun]['lebih'] for tahun in labels]
-    buruk_data = [data_by_year[tahun]['buruk'] for tahun in labels]
-
-    chart_data = {
-        'labels': labels,
-        'datasets': [
-            {
-                'label': 'Normal',
-                'data': normal_data,
-                'backgroundColor': 'rgba(75, 192, 192, 0.6)',
-                'borderColor': 'rgba(75, 192, 192, 1)',
-                'borderWidth': 1
-            },
-            {
-                'label': 'Kurang',
-                'data': kurang_data,
-                'backgroundColor': 'rgba(255, 99, 132, 0.6)',
-                'borderColor': 'rgba(255, 99, 132, 1)',
-                'borderWidth': 1
-            },
-            {
-                'label': 'Lebih',
-                'data': lebih_data,
-                'backgroundColor': 'rgba(255, 206, 86, 0.6)',
-                'borderColor': 'rgba(255, 206, 86, 1)',
-                'borderWidth': 1
-            },
-            {
-                'label': 'Buruk',
-                'data': buruk_data,
-                'backgroundColor': 'rgba(54, 162, 235, 0.6)',
-                'borderColor': 'rgba(54, 162, 235, 1)',
-                'borderWidth': 1
-            }
-        ]
-    }
+    labels, matriks = pivot(rows, STATUS_GIZI)
+    chart_data = {'labels': labels, 'datasets': datasets_chart(matriks, GAYA_GRAFIK_TAHUNAN)}
 
     conn.close()
     return render_template('home.html', chart_data=chart_data)
@@ -354,28 +815,18 @@ def logout():
 # =============================================
 @app.route('/dashboard', methods=['GET'])
 @login_required
+@cache_respons.route('data', per_user=True)
 def dashboard():
     with get_db() as conn:
         stats = {
             'balita_count': conn.execute("SELECT COUNT(*) FROM balita").fetchone()[0],
             'status_gizi': conn.execute('''
-                SELECT status_gizi, COUNT(*) as jumlah 
-                FROM klasifikasi 
+                SELECT status_gizi, SUM(jumlah) as jumlah 
+                FROM rekap_bulanan 
                 GROUP BY status_gizi
             ''').fetchall()
         }
 
-        # Data tren status gizi selama 6 bulan terakhir
-        trend_data = conn.execute('''
-            SELECT strftime('%Y-%m', tanggal_ukur) as bulan, 
-                   status_gizi, COUNT(*) as jumlah
-            FROM pengukuran p
-            JOIN klasifikasi k ON p.id = k.pengukuran_id
-            WHERE p.tanggal_ukur >= date('now', '-6 months')
-            GROUP BY bulan, status_gizi
-            ORDER BY bulan
-        ''').fetchall()
-
         # Format data untuk Chart.js
         stats_gizi = {'normal':0, 'kurang':0, 'buruk':0}
         for row in stats['status_gizi']:
@@ -521,75 +972,88 @@ def hapus_user(id):
 @app.route('/balita')
 @login_required
 def data_balita():
-    """Endpoint untuk melihat data balita dengan filter dan pagination"""
+    """Endpoint untuk melihat data balita dengan filter dan pagination keyset (nama, id)"""
     # Ambil parameter filter dari query string
     nama = request.args.get('nama', '').strip()
+    desa_id = request.args.get('desa_id', type=int)
     tanggal_mulai = request.args.get('tanggal_mulai', '').strip()
     tanggal_akhir = request.args.get('tanggal_akhir', '').strip()
-    page = request.args.get('page', 1, type=int)
-    per_page = 50
-    offset = (page - 1) * per_page
 
     conn = get_db()
     try:
-        # Query utama
-        query = '''
-            SELECT b.*, 
-                   (SELECT COUNT(*) FROM pengukuran WHERE balita_id = b.id) as jumlah_pengukuran,
-                   CAST((julianday('now') - julianday(b.tanggal_lahir)) / 365 AS INTEGER) as usia_tahun,
-                   CAST(((julianday('now') - julianday(b.tanggal_lahir)) % 365) / 30 AS INTEGER) as usia_bulan
-            FROM balita b
-            WHERE 1=1
-        '''
+        filter_sql = ''
         params = []
 
         if nama:
-            query += ' AND b.nama LIKE ?'
-            params.append(f'%{nama}%')
+            # Cari di nama, nama orang tua dan NIK lewat indeks FTS5 (prefix per kata)
+            match = kueri_fts(nama)
+            if fts_tersedia(conn) and match:
+                filter_sql += ' AND b.id IN (SELECT rowid FROM balita_fts WHERE balita_fts MATCH ?)'
+                params.append(match)
+            else:
+                filter_sql += ' AND (b.nama LIKE ? OR b.nama_ortu LIKE ? OR b.nik LIKE ?)'
+                params.extend([f'%{nama}%'] * 3)
+        if desa_id:
+            filter_sql += ' AND b.desa_id = ?'
+            params.append(desa_id)
         if tanggal_mulai:
-            query += ' AND b.tanggal_lahir >= ?'
+            filter_sql += ' AND b.tanggal_lahir >= ?'
             params.append(tanggal_mulai)
         if tanggal_akhir:
-            query += ' AND b.tanggal_lahir <= ?'
+            filter_sql += ' AND b.tanggal_lahir <= ?'
             params.append(tanggal_akhir)
 
-        query += ' ORDER BY b.nama LIMIT ? OFFSET ?'
-        params.extend([per_page, offset])
-
-        # Eksekusi query utama
-        balita = conn.execute(query, params).fetchall()
-
-        # Query untuk menghitung total data
-        count_query = '''
-            SELECT COUNT(*)
+        # Query utama
+        query = '''
+            SELECT b.*, d.nama_desa,
+                   (SELECT COUNT(*) FROM pengukuran WHERE balita_id = b.id) as jumlah_pengukuran,
+                   CAST((julianday('now') - julianday(b.tanggal_lahir)) / 365 AS INTEGER) as usia_tahun,
+                   CAST(((julianday('now') - julianday(b.tanggal_lahir)) % 365) / 30 AS INTEGER) as usia_bulan
             FROM balita b
+            LEFT JOIN desa_cimarga d ON d.id = b.desa_id
             WHERE 1=1
-        '''
-        count_params = []
+        ''' + filter_sql
+        halaman = ambil_halaman_keyset(conn, query, params, [('b.nama', 'nama'), ('b.id', 'id')])
+        halaman['total'] = hitung_total_cache(conn, 'SELECT COUNT(*) FROM balita b WHERE 1=1' + filter_sql, params)
+        desa_list = conn.execute('SELECT id, nama_desa FROM desa_cimarga ORDER BY nama_desa').fetchall()
+    finally:
+        conn.close()
 
-        if nama:
-            count_query += ' AND b.nama LIKE ?'
-            count_params.append(f'%{nama}%')
-        if tanggal_mulai:
-            count_query += ' AND b.tanggal_lahir >= ?'
-            count_params.append(tanggal_mulai)
-        if tanggal_akhir:
-            count_query += ' AND b.tanggal_lahir <= ?'
-            count_params.append(tanggal_akhir)
+    return render_template('balita/data.html', balita=halaman['rows'], halaman=halaman, desa_list=desa_list)
 
-        # Eksekusi query hitung total data
-        if count_params:
-            total_data = conn.execute(count_query, count_params).fetchone()[0]
-        else:
-            total_data = conn.execute(count_query).fetchone()[0]
+BATAS_RANKING = 1000
+
+@app.route('/balita/cari')
+@login_required
+def cari_balita():
+    """Typeahead JSON: balita yang nama, nama orang tua atau NIK-nya diawali kata yang diketik"""
+    q = request.args.get('q', '').strip()
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+    match = kueri_fts(q)
+    if not match:
+        return jsonify([])
 
+    conn = get_db()
+    try:
+        if fts_tersedia(conn):
+            # Ranking bm25 hanya atas BATAS_RANKING kecocokan pertama agar prefix
+            # pendek yang cocok dengan puluhan ribu baris tetap cepat
+            rows = conn.execute('''
+                SELECT b.id, b.nama, b.nik, b.nama_ortu, b.tanggal_lahir
+                FROM (SELECT rowid, rank FROM balita_fts WHERE balita_fts MATCH ? LIMIT ?) f
+                JOIN balita b ON b.id = f.rowid
+                ORDER BY f.rank
+                LIMIT ?
+            ''', (match, BATAS_RANKING, limit)).fetchall()
+        else:
+            rows = conn.execute('''
+                SELECT id, nama, nik, nama_ortu, tanggal_lahir FROM balita
+                WHERE nama LIKE ? OR nama_ortu LIKE ? OR nik LIKE ?
+                ORDER BY nama LIMIT ?
+            ''', (f'{q}%', f'{q}%', f'{q}%', limit)).fetchall()
     finally:
         conn.close()
-
-    # Tentukan apakah ada halaman berikutnya
-    has_next = (offset + per_page) < total_data
-
-    return render_template('balita/data.html', balita=balita, page=page, has_next=has_next)
+    return jsonify([dict(row) for row in rows])
 
 def hitung_usia(tanggal_lahir):
     lahir = datetime.strptime(tanggal_lahir, '%Y-%m-%d')
@@ -706,93 +1170,41 @@ def hapus_balita(id):
 @app.route('/pengukuran')
 @login_required
 def data_pengukuran():
-    """Endpoint untuk melihat data pengukuran dengan filter dan pagination"""
+    """Endpoint untuk melihat data pengukuran dengan filter dan pagination keyset (tanggal_ukur, id)"""
     # Ambil parameter filter dari query string
     nama_balita = request.args.get('nama_balita', '').strip()
     status_gizi = request.args.get('status_gizi', '').strip()
-    page = request.args.get('page', 1, type=int)
-    per_page = 50
-    offset = (page - 1) * per_page
 
     conn = get_db()
     try:
-        # Query utama
-        query = '''
-            SELECT p.*, b.nama as nama_balita, b.nik as nik_balita, k.status_gizi
-            FROM pengukuran p
-            JOIN balita b ON p.balita_id = b.id
-            LEFT JOIN klasifikasi k ON p.id = k.pengukuran_id
-            WHERE 1=1
-        '''
+        filter_sql = ''
         params = []
 
         if nama_balita:
-            query += ' AND b.nama LIKE ?'
+            filter_sql += ' AND b.nama LIKE ?'
             params.append(f'%{nama_balita}%')
         if status_gizi:
-            query += ' AND k.status_gizi = ?'
+            filter_sql += ' AND k.status_gizi = ?'
             params.append(status_gizi)
 
-        # Tambahkan pagination
-        query += ' ORDER BY p.tanggal_ukur DESC LIMIT ? OFFSET ?'
-        params.extend([per_page, offset])
-
-        # Eksekusi query utama
-        pengukuran = conn.execute(query, params).fetchall()
-
-        # Query untuk menghitung total data
-        count_query = '''
-            SELECT COUNT(*)
+        from_sql = '''
             FROM pengukuran p
             JOIN balita b ON p.balita_id = b.id
             LEFT JOIN klasifikasi k ON p.id = k.pengukuran_id
             WHERE 1=1
-        '''
-        count_params = []
-
-        if nama_balita:
-            count_query += ' AND b.nama LIKE ?'
-            count_params.append(f'%{nama_balita}%')
-        if status_gizi:
-            count_query += ' AND k.status_gizi = ?'
-            count_params.append(status_gizi)
-
-        # Eksekusi query hitung total data
-        if count_params:
-            total_data = conn.execute(count_query, count_params).fetchone()[0]
-        else:
-            total_data = conn.execute(count_query).fetchone()[0]
+        ''' + filter_sql
 
+        # Query utama, terbaru lebih dulu
+        halaman = ambil_halaman_keyset(
+            conn, 'SELECT p.*, b.nama as nama_balita, b.nik as nik_balita, k.status_gizi' + from_sql, params,
+            [('p.tanggal_ukur', 'tanggal_ukur'), ('p.id', 'id')], turun=True
+        )
+        halaman['total'] = hitung_total_cache(conn, 'SELECT COUNT(*)' + from_sql, params)
     finally:
         conn.close()
 
-    # Tentukan apakah ada halaman berikutnya
-    has_next = (offset + per_page) < total_data
-
-    return render_template('pengukuran/data.html', pengukuran=pengukuran, page=page, has_next=has_next)
-
-def klasifikasi_knn(berat_badan, tinggi_badan, lingkar_lengan):
-    conn = get_db()
-    # ambil dari dataset_lvq!
-    data_protos = conn.execute('SELECT feature1, feature2, feature3, target FROM dataset_lvq').fetchall()
-    if not data_protos:
-        return "Dataset LVQ kosong, lakukan sampling LVQ dahulu"
-    X_train = [[row['feature1'], row['feature2'], row['feature3']] for row in data_protos]
-    y_train = [row['target'] for row in data_protos]
-    params = conn.execute('SELECT * FROM parameter_knn').fetchone()
-    nilai_k = params['nilai_k'] if params else 3
-    bobot = (
-        float(params['bb']) if 'bb' in params.keys() else 1,
-        float(params['tb']) if 'tb' in params.keys() else 1,
-        float(params['lila']) if 'lila' in params.keys() else 1
-    )
-    model = KNN(k=nilai_k, bobot=bobot)
-    model.fit(X_train, y_train)
-    fitur_balita = [[berat_badan, tinggi_badan, lingkar_lengan]]
-    status_gizi = model.predict(fitur_balita)[0]
-    return status_gizi
+    return render_template('pengukuran/data.html', pengukuran=halaman['rows'], halaman=halaman)
 
-        
 @app.route('/pengukuran/tambah', methods=['GET', 'POST'])
 @login_required
 def tambah_pengukuran():
@@ -825,8 +1237,8 @@ def tambah_pengukuran():
                     return redirect(url_for('tambah_pengukuran'))
 
                 # Prediksi status gizi menggunakan KNN
-                status_gizi = klasifikasi_knn(berat_badan, tinggi_badan, lingkar_lengan)
-                if status_gizi == "Data Training Kosong":
+                status_gizi, versi_model = klasifikasi_knn(berat_badan, tinggi_badan, lingkar_lengan)
+                if status_gizi is None:
                     flash('Data training belum tersedia, tidak bisa melakukan klasifikasi!', 'danger')
                     return redirect(url_for('tambah_pengukuran'))
 
@@ -842,9 +1254,9 @@ def tambah_pengukuran():
                 # Simpan hasil klasifikasi
                 conn.execute('''
                     INSERT INTO klasifikasi 
-                    (pengukuran_id, status_gizi, tanggal_klasifikasi)
-                    VALUES (?, ?, date('now'))
-                ''', (pengukuran_id, status_gizi))
+                    (pengukuran_id, status_gizi, tanggal_klasifikasi, versi_model)
+                    VALUES (?, ?, date('now'), ?)
+                ''', (pengukuran_id, status_gizi, versi_model))
 
                 conn.commit()
                 flash(f'Pengukuran berhasil disimpan. Status gizi: {status_gizi}', 'success')
@@ -876,8 +1288,8 @@ def edit_pengukuran(id):
                 berat_badan = float(berat_badan)
                 tinggi_badan = float(tinggi_badan)
                 lingkar_lengan = float(lingkar_lengan)
-                status_gizi = klasifikasi_knn(berat_badan, tinggi_badan, lingkar_lengan)
-                if status_gizi == "Data Training Kosong":
+                status_gizi, versi_model = klasifikasi_knn(berat_badan, tinggi_badan, lingkar_lengan)
+                if status_gizi is None:
                     flash('Data training belum tersedia, tidak bisa klasifikasi!', 'danger')
                     return redirect(url_for('edit_pengukuran', id=id))
                 conn.execute('''
@@ -887,9 +1299,9 @@ def edit_pengukuran(id):
                 ''', (berat_badan, tinggi_badan, lingkar_lengan, id))
                 conn.execute('''
                     UPDATE klasifikasi
-                    SET status_gizi = ?, tanggal_klasifikasi = date('now')
+                    SET status_gizi = ?, tanggal_klasifikasi = date('now'), versi_model = ?
                     WHERE pengukuran_id = ?
-                ''', (status_gizi, id))
+                ''', (status_gizi, versi_model, id))
                 conn.commit()
                 flash('Data pengukuran & status gizi berhasil diupdate', 'success')
                 return redirect(url_for('data_pengukuran'))
@@ -931,77 +1343,134 @@ def hapus_pengukuran(id):
 # ROUTER KELOAL LAPORAN
 # =============================================
 
+def query_laporan(start_date=None, end_date=None, urutan='ASC'):
+    """Query tabel laporan (pengukuran, balita, klasifikasi) dengan filter rentang tanggal_ukur"""
+    query = '''
+        SELECT b.nama, b.nik, p.tanggal_ukur, p.berat_badan, p.tinggi_badan,
+               p.lingkar_lengan, k.status_gizi
+        FROM pengukuran p
+        JOIN balita b ON p.balita_id = b.id
+        JOIN klasifikasi k ON p.id = k.pengukuran_id
+    '''
+    params = []
+    if start_date and end_date:
+        query += ' WHERE p.tanggal_ukur BETWEEN ? AND ?'
+        params.extend([start_date, end_date])
+    elif start_date:
+        query += ' WHERE p.tanggal_ukur >= ?'
+        params.append(start_date)
+    elif end_date:
+        query += ' WHERE p.tanggal_ukur <= ?'
+        params.append(end_date)
+    query += ' ORDER BY p.tanggal_ukur ' + ('DESC' if urutan == 'DESC' else 'ASC')
+    return query, params
+
+# Status yang ditampilkan di grafik trend
+STATUS_TREN = ['normal', 'kurang', 'buruk']
+
+def _tren_dari_pengukuran(conn, mulai, akhir):
+    """Jumlah per (bulan, status) langsung dari pengukuran untuk rentang tanggal kecil"""
+    return conn.execute('''
+        SELECT strftime('%Y-%m', p.tanggal_ukur) AS bulan, k.status_gizi, COUNT(*) AS jumlah
+        FROM pengukuran p
+        JOIN klasifikasi k ON p.id = k.pengukuran_id
+        WHERE p.tanggal_ukur BETWEEN ? AND ?
+        GROUP BY bulan, k.status_gizi
+    ''', (mulai, akhir)).fetchall()
+
+def _awal_bulan_berikut(tanggal):
+    return (tanggal.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+def tren_bulanan(conn, start_date=None, end_date=None):
+    """
+    Jumlah klasifikasi per (bulan, status_gizi) untuk STATUS_TREN sebagai dict.
+    Bulan yang tercakup penuh dibaca dari rekap_bulanan; hanya bulan tepi yang
+    tercakup sebagian dihitung dari pengukuran.
+    """
+    mulai = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+    akhir = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+    # Rentang bulan penuh [penuh_awal, penuh_akhir)
+    penuh_awal = penuh_akhir = None
+    if mulai:
+        penuh_awal = mulai if mulai.day == 1 else _awal_bulan_berikut(mulai)
+    if akhir:
+        penuh_akhir = _awal_bulan_berikut(akhir)
+        if penuh_akhir - timedelta(days=1) != akhir:
+            penuh_akhir = akhir.replace(day=1)
+
+    if mulai and akhir and penuh_awal >= penuh_akhir:
+        rows = _tren_dari_pengukuran(conn, str(mulai), str(akhir))
+    else:
+        query = 'SELECT bulan, status_gizi, SUM(jumlah) FROM rekap_bulanan WHERE 1=1'
+        params = []
+        if penuh_awal:
+            query += ' AND bulan >= ?'
+            params.append(penuh_awal.strftime('%Y-%m'))
+        if penuh_akhir:
+            query += ' AND bulan < ?'
+            params.append(penuh_akhir.strftime('%Y-%m'))
+        rows = conn.execute(query + ' GROUP BY bulan, status_gizi', params).fetchall()
+        if mulai and mulai < penuh_awal:
+            rows += _tren_dari_pengukuran(conn, str(mulai), str(penuh_awal - timedelta(days=1)))
+        if akhir and penuh_akhir <= akhir:
+            rows += _tren_dari_pengukuran(conn, str(penuh_akhir), str(akhir))
+
+    return {(bulan, status): jumlah for bulan, status, jumlah in rows
+            if status in STATUS_TREN and jumlah}
+
+# Warna garis per status pada grafik laporan
+WARNA_STATUS = {
+    'normal': '#28a745',
+    'kurang': '#ffc107',
+    'lebih': '#17a2b8',
+    'buruk': '#dc3545'
+}
+GAYA_GRAFIK_STATUS = {status: {'borderColor': warna, 'backgroundColor': warna}
+                      for status, warna in WARNA_STATUS.items()}
+
+def grafik_tren(conn, start_date=None, end_date=None):
+    """Data Chart.js tren bulanan STATUS_TREN untuk halaman laporan"""
+    trend_data = tren_bulanan(conn, start_date, end_date)
+    labels, matriks = pivot(((bulan, status, jumlah) for (bulan, status), jumlah in trend_data.items()),
+                            STATUS_TREN)
+    return {'labels': labels, 'datasets': datasets_chart(matriks, GAYA_GRAFIK_STATUS)}
+
+# Jumlah pengukuran terbaru di tabel awal halaman laporan; data lengkap lewat filter tanggal atau ekspor
+BATAS_DATA_AWAL_LAPORAN = 500
+
 @app.route('/laporan')
 @login_required
 def laporan():
     conn = get_db()
     
-    # Query untuk data grafik trend (semua data)
-    trend_query = '''
-        SELECT strftime('%Y-%m', tanggal_ukur) as bulan,
-               k.status_gizi,
-               COUNT(*) as jumlah
-        FROM pengukuran p
-        JOIN klasifikasi k ON p.id = k.pengukuran_id
-        WHERE k.status_gizi IN ('normal', 'kurang', 'buruk')
-        GROUP BY bulan, k.status_gizi
-        ORDER BY bulan ASC
-    '''
-    
-    trend_data = conn.execute(trend_query).fetchall()
-    
-    # Query untuk data dalam tabel
+    # Query untuk data dalam tabel: pengukuran terbaru saja, dibaca dari indeks (tanggal_ukur, id)
     data_query = '''
         SELECT b.nama, b.nik, p.tanggal_ukur, p.berat_badan, p.tinggi_badan, 
                p.lingkar_lengan, k.status_gizi
         FROM pengukuran p
         JOIN balita b ON p.balita_id = b.id
         JOIN klasifikasi k ON p.id = k.pengukuran_id
-        ORDER BY p.tanggal_ukur ASC
+        ORDER BY p.tanggal_ukur DESC, p.id DESC
+        LIMIT ?
     '''
     
-    data = conn.execute(data_query).fetchall()
+    data = conn.execute(data_query, (BATAS_DATA_AWAL_LAPORAN,)).fetchall()
     
-    # Proses data untuk grafik
-    months = sorted(set(row['bulan'] for row in trend_data))
-    status_types = ['normal', 'kurang', 'buruk']  # Hanya tampilkan 3 status ini
-    
-    # Warna untuk setiap status
-    colors = {
-        'normal': '#28a745',
-        'kurang': '#ffc107',
-        'buruk': '#dc3545'
-    }
-    
-    # Dataset untuk setiap status
-    datasets = []
-    for status in status_types:
-        data_status = []
-        for month in months:
-            count = next(
-                (row['jumlah'] for row in trend_data 
-                 if row['bulan'] == month and row['status_gizi'] == status),
-                0
-            )
-            data_status.append(count)
-        
-        datasets.append({
-            'label': status.title(),
-            'data': data_status,
-            'color': colors.get(status.lower(), '#000000')
-        })
+    # Data grafik trend (semua data) dari rekap bulanan
+    chart_data = grafik_tren(conn)
     
     conn.close()
     
     return render_template(
         'laporan/laporan.html',
         data=data,
-        labels=months,
-        datasets=datasets
+        batas_data=BATAS_DATA_AWAL_LAPORAN,
+        chart_data=chart_data
     )
 
 @app.route('/laporan/data')
 @login_required
+@cache_respons.route('data')
 def laporan_data():
     try:
         start_date = request.args.get('start_date')
@@ -1013,31 +1482,9 @@ def laporan_data():
         conn = get_db()
         
         # Query untuk data tabel
-        query_table = '''
-            SELECT b.nama, b.nik, p.tanggal_ukur, p.berat_badan, p.tinggi_badan, 
-                   p.lingkar_lengan, k.status_gizi
-            FROM pengukuran p
-            JOIN balita b ON p.balita_id = b.id
-            JOIN klasifikasi k ON p.id = k.pengukuran_id
-            WHERE p.tanggal_ukur BETWEEN ? AND ?
-            ORDER BY p.tanggal_ukur ASC
-        '''
-        
-        # Query untuk data trend sesuai filter
-        query_trend = '''
-            SELECT strftime('%Y-%m', tanggal_ukur) as bulan,
-                   k.status_gizi,
-                   COUNT(*) as jumlah
-            FROM pengukuran p
-            JOIN klasifikasi k ON p.id = k.pengukuran_id
-            WHERE p.tanggal_ukur BETWEEN ? AND ?
-            AND k.status_gizi IN ('normal', 'kurang', 'buruk')
-            GROUP BY bulan, k.status_gizi
-            ORDER BY bulan ASC
-        '''
-        
-        table_data = conn.execute(query_table, [start_date, end_date]).fetchall()
-        trend_data = conn.execute(query_trend, [start_date, end_date]).fetchall()
+        table_data = conn.execute(*query_laporan(start_date, end_date)).fetchall()
+        # Data trend sesuai filter
+        chart_data = grafik_tren(conn, start_date, end_date)
         
         # Proses data tabel
         result_table = []
@@ -1052,223 +1499,361 @@ def laporan_data():
                 'status_gizi': row['status_gizi']
             })
         
-        # Proses data trend
-        months = sorted(set(row['bulan'] for row in trend_data))
-        status_types = ['normal', 'kurang', 'buruk']
-        
-        colors = {
-            'normal': '#28a745',
-            'kurang': '#ffc107',
-            'buruk': '#dc3545'
-        }
-        
-        datasets = []
-        for status in status_types:
-            data_status = []
-            for month in months:
-                count = next(
-                    (row['jumlah'] for row in trend_data 
-                     if row['bulan'] == month and row['status_gizi'] == status),
-                    0
-                )
-                data_status.append(count)
-            
-            datasets.append({
-                'label': status.title(),
-                'data': data_status,
-                'borderColor': colors.get(status.lower(), '#000000'),
-                'backgroundColor': colors.get(status.lower(), '#000000')
-            })
-        
         conn.close()
         
         return jsonify({
             'table_data': result_table,
-            'chart_data': {
-                'labels': months,
-                'datasets': datasets
-            }
+            'chart_data': chart_data
         })
         
+    except ValueError:
+        return jsonify({'error': 'Format tanggal harus YYYY-MM-DD'}), 400
     except Exception as e:
         print(f"Error in laporan_data: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/laporan/grafik')
+@login_required
+def laporan_grafik():
+    """
+    Data Chart.js jumlah klasifikasi per kelompok, mis.
+    /laporan/grafik?label=desa&seri=status_gizi&start_date=2024-01-01
+    """
+    label = request.args.get('label', 'bulan')
+    seri = request.args.get('seri', 'status_gizi')
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    if label not in DIMENSI or seri not in DIMENSI:
+        return jsonify({'error': f"Dimensi harus salah satu dari: {', '.join(DIMENSI)}"}), 400
+    for tanggal in (start_date, end_date):
+        if tanggal:
+            try:
+                datetime.strptime(tanggal, '%Y-%m-%d')
+            except ValueError:
+                return jsonify({'error': 'Format tanggal harus YYYY-MM-DD'}), 400
+
+    conn = get_db()
+    labels, matriks = rekap(conn, label, seri, start_date, end_date,
+                            STATUS_GIZI if seri == 'status_gizi' else None)
+    conn.close()
+    gaya = GAYA_GRAFIK_STATUS if seri == 'status_gizi' else None
+    return jsonify({'labels': labels, 'datasets': datasets_chart(matriks, gaya)})
+
+# Jumlah baris per bagian HTML yang dirender terpisah oleh wkhtmltopdf
+BARIS_PER_BAGIAN_PDF = 500
+# Umur minimal file .tmp di PDF_CACHE_DIR sebelum dianggap sisa render yang gagal
+UMUR_TMP_PDF_DETIK = 3600
+_pdf_executor = None
+_pdf_executor_lock = threading.Lock()
+
+def _get_pdf_executor():
+    # Tiap thread menjalankan satu proses wkhtmltopdf, jadi max_workers membatasi
+    # jumlah proses render PDF yang berjalan bersamaan di worker ini
+    global _pdf_executor
+    with _pdf_executor_lock:
+        if _pdf_executor is None:
+            _pdf_executor = ThreadPoolExecutor(max_workers=app.config['PDF_WORKERS'],
+                                               thread_name_prefix='pdf')
+        return _pdf_executor
+
+@metrik.terukur('render_pdf_bagian')
+def _render_pdf_bagian(html):
+    """Render satu bagian HTML menjadi PDF (bytes)"""
+    import pdfkit
+    return pdfkit.from_string(html, False)
+
+def buat_pdf_laporan(conn, start_date, end_date, path):
+    """
+    Render laporan per BARIS_PER_BAGIAN_PDF baris secara paralel lalu gabungkan
+    menjadi satu PDF di `path`. Paling banyak 2 x PDF_WORKERS bagian ditahan di
+    memori sebelum digabung.
+    """
+    from pypdf import PdfReader, PdfWriter
+    cursor = conn.execute(*query_laporan(start_date, end_date, urutan='DESC'))
+    executor = _get_pdf_executor()
+    batas_antrian = 2 * app.config['PDF_WORKERS']
+    writer = PdfWriter()
+    antrian = deque()
+    bagian = 0
+    while True:
+        rows = cursor.fetchmany(BARIS_PER_BAGIAN_PDF)
+        if not rows and bagian > 0:
+            break
+        html = render_template('laporan/pdf_template.html', data=rows, start_date=start_date,
+                               end_date=end_date, tampilkan_judul=(bagian == 0))
+        antrian.append(executor.submit(_render_pdf_bagian, html))
+        bagian += 1
+        if len(antrian) >= batas_antrian:
+            writer.append(PdfReader(BytesIO(antrian.popleft().result())))
+        if not rows:
+            break
+    while antrian:
+        writer.append(PdfReader(BytesIO(antrian.popleft().result())))
+
+    # Tulis ke file sementara lalu rename agar request lain tidak membaca PDF setengah jadi
+    fd, path_sementara = tempfile.mkstemp(prefix='laporan_', suffix='.tmp', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            writer.write(f)
+        os.replace(path_sementara, path)
+    except BaseException:
+        os.remove(path_sementara)
+        raise
+
+def hapus_cache_pdf_lama(folder, versi):
+    """
+    Hapus PDF cache dari versi data yang lebih lama dan file .tmp sisa render
+    yang gagal. PDF versi lebih baru (dirender request lain) tidak disentuh,
+    begitu juga .tmp yang mungkin masih ditulis worker lain.
+    """
+    batas_tmp = time.time() - UMUR_TMP_PDF_DETIK
+    for nama in os.listdir(folder):
+        if not nama.startswith('laporan_'):
+            continue
+        path = os.path.join(folder, nama)
+        cocok = re.search(r'_v(\d+)\.pdf$', nama)
+        try:
+            if (cocok and int(cocok.group(1)) < versi) or \
+                    (nama.endswith('.tmp') and os.path.getmtime(path) < batas_tmp):
+                os.remove(path)
+        except OSError:
+            pass
+
 @app.route('/laporan/pdf')
 @login_required
 def laporan_pdf():
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
-    
-    query = '''
-        SELECT b.nama, b.nik, p.tanggal_ukur, p.berat_badan, p.tinggi_badan, p.lingkar_lengan, k.status_gizi
-        FROM pengukuran p
-        JOIN balita b ON p.balita_id = b.id
-        JOIN klasifikasi k ON p.id = k.pengukuran_id
-    '''
-    
-    params = []
-    if start_date and end_date:
-        query += ' WHERE p.tanggal_ukur BETWEEN ? AND ?'
-        params.extend([start_date, end_date])
-    elif start_date:
-        query += ' WHERE p.tanggal_ukur >= ?'
-        params.append(start_date)
-    elif end_date:
-        query += ' WHERE p.tanggal_ukur <= ?'
-        params.append(end_date)
-        
-    query += ' ORDER BY p.tanggal_ukur DESC'
-    
+    for tanggal in (start_date, end_date):
+        if tanggal:
+            try:
+                datetime.strptime(tanggal, '%Y-%m-%d')
+            except ValueError:
+                return 'Format tanggal harus YYYY-MM-DD', 400
+
+    # PDF di-cache per (rentang tanggal, versi data); perubahan balita, pengukuran
+    # atau klasifikasi menaikkan versi 'data' sehingga cache lama tidak dipakai lagi
     conn = get_db()
-    if params:
-        data = conn.execute(query, params).fetchall()
-    else:
-        data = conn.execute(query).fetchall()
+    versi = get_versi(conn, 'data')
+    folder = app.config['PDF_CACHE_DIR']
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"laporan_{start_date or 'awal'}_{end_date or 'akhir'}_v{versi}.pdf")
+    # File dibuka sebelum pembersihan cache, jadi tetap bisa dikirim walaupun
+    # request lain menghapusnya setelah versi data naik
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        try:
+            buat_pdf_laporan(conn, start_date, end_date, path)
+            f = open(path, 'rb')
+        except OSError as e:
+            return f'Gagal membuat PDF: {e}', 500
+        hapus_cache_pdf_lama(folder, versi)
     conn.close()
-    
-    rendered = render_template('laporan/pdf_template.html', 
-                             data=data,
-                             start_date=start_date,
-                             end_date=end_date)
-    pdf = pdfkit.from_string(rendered, False)
-    response = make_response(pdf)
-    response.headers['Content-Type'] = 'application/pdf'
-    response.headers['Content-Disposition'] = 'attachment; filename=laporan.pdf'
+
+    stat = os.fstat(f.fileno())
+    response = send_file(f, mimetype='application/pdf', as_attachment=True, download_name='laporan.pdf',
+                         etag=f'{versi}-{stat.st_size}', last_modified=stat.st_mtime)
+    if response.status_code == 200:
+        response.content_length = stat.st_size
+    return response
+
+# Judul kolom dan kolom hasil query_laporan untuk ekspor tabel laporan
+KOLOM_EKSPOR_LAPORAN = [
+    ('No', None),
+    ('NIK', 'nik'),
+    ('Nama Balita', 'nama'),
+    ('Tanggal Ukur', 'tanggal_ukur'),
+    ('Berat Badan (kg)', 'berat_badan'),
+    ('Tinggi Badan (cm)', 'tinggi_badan'),
+    ('Lingkar Lengan (cm)', 'lingkar_lengan'),
+    ('Status Gizi', 'status_gizi'),
+]
+# Jumlah baris awal yang dipakai untuk memperkirakan lebar kolom Excel
+SAMPEL_LEBAR_KOLOM = 1000
+UKURAN_FETCH_EKSPOR = 2000
+
+def baris_ekspor_laporan(cursor, mulai=1):
+    """Iterasi baris laporan (dengan nomor urut) dari cursor, diambil per UKURAN_FETCH_EKSPOR"""
+    nomor = mulai
+    while True:
+        rows = cursor.fetchmany(UKURAN_FETCH_EKSPOR)
+        if not rows:
+            return
+        for row in rows:
+            yield [nomor] + [row[kolom] for _, kolom in KOLOM_EKSPOR_LAPORAN[1:]]
+            nomor += 1
+
+def respons_file_sementara(path, mimetype, nama_file, ukuran_blok=64 * 1024):
+    """
+    Response yang mengalirkan file sementara per blok. File dibuka lalu langsung
+    dihapus dari disk, jadi tidak tertinggal walaupun body tidak pernah dibaca
+    (HEAD, koneksi putus sebelum blok pertama); handle ditutup bersama response.
+    """
+    f = open(path, 'rb')
+    try:
+        os.remove(path)
+        ukuran = os.fstat(f.fileno()).st_size
+    except OSError:
+        f.close()
+        raise
+    response = Response(iter(lambda: f.read(ukuran_blok), b''), mimetype=mimetype)
+    response.call_on_close(f.close)
+    response.headers['Content-Disposition'] = f'attachment; filename={nama_file}'
+    response.headers['Content-Length'] = str(ukuran)
     return response
 
 @app.route('/laporan/excel')
 @login_required
 def laporan_excel():
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill
+    from openpyxl.utils import get_column_letter
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    path = None
     try:
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
-        
-        query = '''
-            SELECT b.nama, b.nik, p.tanggal_ukur, p.berat_badan, p.tinggi_badan, 
-                   p.lingkar_lengan, k.status_gizi
-            FROM pengukuran p
-            JOIN balita b ON p.balita_id = b.id
-            JOIN klasifikasi k ON p.id = k.pengukuran_id
-        '''
-        params = []
-        
-        if start_date and end_date:
-            query += ' WHERE p.tanggal_ukur BETWEEN ? AND ?'
-            params.extend([start_date, end_date])
-        elif start_date:
-            query += ' WHERE p.tanggal_ukur >= ?'
-            params.append(start_date)
-        elif end_date:
-            query += ' WHERE p.tanggal_ukur <= ?'
-            params.append(end_date)
-            
-        query += ' ORDER BY p.tanggal_ukur ASC'
-        
+        query, params = query_laporan(start_date, end_date)
         conn = get_db()
-        if params:
-            data = conn.execute(query, params).fetchall()
-        else:
-            data = conn.execute(query).fetchall()
-        conn.close()
+        cursor = conn.execute(query, params)
+        baris = baris_ekspor_laporan(cursor)
 
-        # Buat workbook baru
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Laporan Status Gizi"
+        # Mode write-only: baris langsung ditulis ke XML sementara, tidak ditahan di memori
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Laporan Status Gizi")
+
+        # Lebar kolom harus ditetapkan sebelum baris pertama ditulis, jadi
+        # diperkirakan dari sampel baris awal
+        sampel = list(itertools.islice(baris, SAMPEL_LEBAR_KOLOM))
+        for idx, (judul, _) in enumerate(KOLOM_EKSPOR_LAPORAN):
+            panjang = max([len(judul)] + [len(str(row[idx])) for row in sampel if row[idx] is not None])
+            ws.column_dimensions[get_column_letter(idx + 1)].width = panjang + 2
 
-        # Styling
-        header_font = Font(bold=True)
-        header_fill = PatternFill(start_color="CCE5FF", end_color="CCE5FF", fill_type="solid")
-        
         # Judul laporan
-        periode = f"Data Pengukuran"
+        periode = "Data Pengukuran"
         if start_date and end_date:
             periode += f" ({start_date} - {end_date})"
-        ws['A1'] = periode
-        ws.merge_cells('A1:H1')
-        ws['A1'].font = Font(bold=True, size=14)
-        ws['A1'].alignment = Alignment(horizontal='center')
+        judul = WriteOnlyCell(ws, value=periode)
+        judul.font = Font(bold=True, size=14)
+        ws.append([judul])
+        ws.append([])
 
         # Header tabel
-        headers = ['No', 'NIK', 'Nama Balita', 'Tanggal Ukur', 'Berat Badan (kg)', 
-                  'Tinggi Badan (cm)', 'Lingkar Lengan (cm)', 'Status Gizi']
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=3, column=col)
-            cell.value = header
+        header_font = Font(bold=True)
+        header_fill = PatternFill(start_color="CCE5FF", end_color="CCE5FF", fill_type="solid")
+        header = []
+        for judul_kolom, _ in KOLOM_EKSPOR_LAPORAN:
+            cell = WriteOnlyCell(ws, value=judul_kolom)
             cell.font = header_font
             cell.fill = header_fill
+            header.append(cell)
+        ws.append(header)
 
         # Isi data
-        for row_idx, item in enumerate(data, 1):
-            ws.cell(row=row_idx+3, column=1).value = row_idx
-            ws.cell(row=row_idx+3, column=2).value = item['nik']
-            ws.cell(row=row_idx+3, column=3).value = item['nama']
-            ws.cell(row=row_idx+3, column=4).value = item['tanggal_ukur']
-            ws.cell(row=row_idx+3, column=5).value = item['berat_badan']
-            ws.cell(row=row_idx+3, column=6).value = item['tinggi_badan']
-            ws.cell(row=row_idx+3, column=7).value = item['lingkar_lengan']
-            ws.cell(row=row_idx+3, column=8).value = item['status_gizi']
-
-        # Auto-adjust column width
-        for col in ws.columns:
-            max_length = 0
-            column = col[0].column_letter
-            for cell in col:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = (max_length + 2)
-            ws.column_dimensions[column].width = adjusted_width
-
-        # Simpan ke BytesIO
-        excel_file = BytesIO()
-        wb.save(excel_file)
-        excel_file.seek(0)
-
-        return send_file(
-            excel_file,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            as_attachment=True,
-            download_name='laporan_gizi_balita.xlsx'
-        )
+        for row in itertools.chain(sampel, baris):
+            ws.append(row)
+        conn.close()
 
+        fd, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(fd)
+        wb.save(path)
+        return respons_file_sementara(
+            path, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'laporan_gizi_balita.xlsx'
+        )
     except Exception as e:
+        if path and os.path.exists(path):
+            os.remove(path)
         return str(e), 500
 
+# Jumlah baris per row group file Parquet
+UKURAN_ROW_GROUP = 50000
+
+def alirkan_csv_laporan(query, params):
+    """Generator CSV laporan; memakai koneksi sendiri karena berjalan setelah request selesai"""
+    conn = connect_db()
+    try:
+        cursor = conn.execute(query, params)
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([kolom[0] for kolom in cursor.description])
+        while True:
+            rows = cursor.fetchmany(UKURAN_FETCH_EKSPOR)
+            if not rows:
+                break
+            writer.writerows(rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        conn.close()
+
+@app.route('/laporan/csv')
+@login_required
+def laporan_csv():
+    query, params = query_laporan(request.args.get('start_date'), request.args.get('end_date'))
+    response = Response(alirkan_csv_laporan(query, params), mimetype='text/csv')
+    response.headers['Content-Disposition'] = 'attachment; filename=laporan_gizi_balita.csv'
+    return response
+
+@app.route('/laporan/parquet')
+@login_required
+def laporan_parquet():
+    # pyarrow opsional, hanya dibutuhkan untuk ekspor ini
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        return jsonify({'error': 'Ekspor Parquet membutuhkan paket pyarrow'}), 501
+
+    # Urutan kolom sama dengan query_laporan
+    schema = pa.schema([
+        ('nama', pa.string()),
+        ('nik', pa.string()),
+        ('tanggal_ukur', pa.string()),
+        ('berat_badan', pa.float64()),
+        ('tinggi_badan', pa.float64()),
+        ('lingkar_lengan', pa.float64()),
+        ('status_gizi', pa.string()),
+    ])
+    query, params = query_laporan(request.args.get('start_date'), request.args.get('end_date'))
+    fd, path = tempfile.mkstemp(suffix='.parquet')
+    os.close(fd)
+    try:
+        conn = get_db()
+        cursor = conn.execute(query, params)
+        # Setiap batch ditulis sebagai satu row group, jadi memori hanya sebesar satu batch
+        with pq.ParquetWriter(path, schema, compression='snappy') as writer:
+            while True:
+                rows = cursor.fetchmany(UKURAN_ROW_GROUP)
+                if not rows:
+                    break
+                array = []
+                for nilai, field in zip(zip(*rows), schema):
+                    # NIK hasil impor numerik bisa terbaca sebagai integer SQLite;
+                    # kolom teks diubah dengan str() seperti pada ekspor CSV
+                    if field.type == pa.string():
+                        nilai = [None if v is None else str(v) for v in nilai]
+                    array.append(pa.array(nilai, type=field.type))
+                writer.write_table(pa.Table.from_arrays(array, schema=schema))
+        conn.close()
+        return respons_file_sementara(path, 'application/vnd.apache.parquet', 'laporan_gizi_balita.parquet')
+    except Exception as e:
+        if os.path.exists(path):
+            os.remove(path)
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/laporan/cetak')
 @login_required
 def cetak_laporan():
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    query = '''
-        SELECT b.nama, b.nik, p.tanggal_ukur, p.berat_badan, p.tinggi_badan, p.lingkar_lengan, k.status_gizi
-        FROM pengukuran p
-        JOIN balita b ON p.balita_id = b.id
-        JOIN klasifikasi k ON p.id = k.pengukuran_id
-    '''
-    
-    params = []
-    if start_date and end_date:
-        query += ' WHERE p.tanggal_ukur BETWEEN ? AND ?'
-        params.extend([start_date, end_date])
-    elif start_date:
-        query += ' WHERE p.tanggal_ukur >= ?'
-        params.append(start_date)
-    elif end_date:
-        query += ' WHERE p.tanggal_ukur <= ?'
-        params.append(end_date)
-        
-    query += ' ORDER BY p.tanggal_ukur DESC'
-    
+    query, params = query_laporan(start_date, end_date, urutan='DESC')
     conn = get_db()
-    if params:
-        data = conn.execute(query, params).fetchall()
-    else:
-        data = conn.execute(query).fetchall()
+    data = conn.execute(query, params).fetchall()
     conn.close()
     
     return render_template('laporan/cetak.html', 
@@ -1280,21 +1865,61 @@ def cetak_laporan():
 # ROUTE PARAMETER KNN (ADMIN ONLY)
 # =============================================
 
+# Konfigurasi StratifiedKFold evaluasi; ikut di-hash agar perubahan CV menghitung ulang hasil
+KONFIGURASI_CV = {'n_splits': 5, 'shuffle': True, 'random_state': 42}
+
+def data_evaluasi(conn):
+    """Fitur dan target prototipe LVQ dalam urutan tetap (urutan mempengaruhi pembagian fold)"""
+    data = conn.execute('''
+        SELECT feature1, feature2, feature3, target
+        FROM dataset_lvq
+        ORDER BY id
+    ''').fetchall()
+    X = np.array([[row['feature1'], row['feature2'], row['feature3']] for row in data], dtype=float)
+    y = np.array([row['target'] for row in data])
+    return X, y
+
+def kunci_evaluasi(X, y, nilai_k, bobot):
+    """Hash SHA-256 dari semua input yang menentukan hasil evaluasi model"""
+    h = hashlib.sha256()
+    h.update(np.ascontiguousarray(X, dtype=np.float64).tobytes())
+    h.update('\0'.join(map(str, y)).encode())
+    h.update(json.dumps({'nilai_k': int(nilai_k), 'bobot': [float(b) for b in bobot[:3]],
+                         'cv': KONFIGURASI_CV}, sort_keys=True).encode())
+    return h.hexdigest()
+
+def evaluasi_tersimpan(conn, kunci):
+    """Hasil evaluasi dari tabel evaluasi_model untuk hash input tertentu, None jika belum ada"""
+    row = conn.execute('SELECT hasil, timestamp FROM evaluasi_model WHERE kunci_input = ?', (kunci,)).fetchone()
+    if row is None:
+        return None
+    return {'hasil': json.loads(row['hasil']), 'finished_at': row['timestamp']}
+
+def simpan_evaluasi(conn, kunci, nilai_k, bobot, hasil):
+    conn.execute('''
+        INSERT OR IGNORE INTO evaluasi_model
+            (kunci_input, nilai_k, bobot, hasil, accuracy, sensitivity, specificity, cv_mean, cv_std, timestamp)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+    ''', (kunci, nilai_k, json.dumps([float(b) for b in bobot[:3]]), json.dumps(hasil), hasil['accuracy'],
+          hasil['mean_sensitivitas'], hasil['mean_spesifisitas'], hasil['cv_mean'], hasil['cv_std']))
+    conn.commit()
+
+@metrik.terukur('evaluasi_model_with_parameters')
 def evaluasi_model_with_parameters(nilai_k, bobot):
+    """Evaluasi KNN atas prototipe LVQ; hasil untuk input yang sama diambil dari evaluasi_model"""
+    from sklearn.metrics import accuracy_score, confusion_matrix
+    from sklearn.model_selection import StratifiedKFold, cross_val_score
+    KNN, _ = kelas_model()
     conn = get_db()
     try:
-        # Ambil data hasil sampling LVQ
-        data = conn.execute('''
-            SELECT feature1, feature2, feature3, target
-            FROM dataset_lvq
-        ''').fetchall()
-        
-        if not data:
+        X, y = data_evaluasi(conn)
+        if not len(X):
             raise Exception("Dataset hasil sampling LVQ kosong!")
 
-        # Siapkan data
-        X = np.array([[row['feature1'], row['feature2'], row['feature3']] for row in data])
-        y = np.array([row['target'] for row in data])
+        kunci = kunci_evaluasi(X, y, nilai_k, bobot)
+        tersimpan = evaluasi_tersimpan(conn, kunci)
+        if tersimpan:
+            return tersimpan['hasil']
 
         # Pastikan y mengandung semua kelas yang diharapkan
         class_names = ['normal', 'kurang', 'buruk']
@@ -1305,12 +1930,12 @@ def evaluasi_model_with_parameters(nilai_k, bobot):
         model = KNN(k=nilai_k, bobot=bobot[:3])
 
         # Cross validation 
-        cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+        cv = StratifiedKFold(**KONFIGURASI_CV)
         cv_scores = cross_val_score(model, X, y, cv=cv, scoring='accuracy')
         cv_scores = cv_scores * 100
 
         # Split data untuk evaluasi final
-        skf = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+        skf = StratifiedKFold(**KONFIGURASI_CV)
         train_idx, test_idx = next(skf.split(X, y))
         X_train, X_test = X[train_idx], X[test_idx]
         y_train, y_test = y[train_idx], y[test_idx]
@@ -1348,19 +1973,21 @@ def evaluasi_model_with_parameters(nilai_k, bobot):
             presisi.append(prec)
             f1_scores.append(f1)
         
-        return {
-            'accuracy': accuracy,
-            'mean_sensitivitas': np.mean(sensitivitas),
-            'mean_spesifisitas': np.mean(spesifisitas),
-            'cv_mean': np.mean(cv_scores),
-            'cv_std': np.std(cv_scores),
+        hasil = {
+            'accuracy': float(accuracy),
+            'mean_sensitivitas': float(np.mean(sensitivitas)),
+            'mean_spesifisitas': float(np.mean(spesifisitas)),
+            'cv_mean': float(np.mean(cv_scores)),
+            'cv_std': float(np.std(cv_scores)),
             'confusion_matrix': matrix.tolist(),
-            'sensitivitas_per_kelas': sensitivitas,
-            'spesifisitas_per_kelas': spesifisitas,
-            'presisi_per_kelas': presisi,
-            'f1_per_kelas': f1_scores,
+            'sensitivitas_per_kelas': [float(v) for v in sensitivitas],
+            'spesifisitas_per_kelas': [float(v) for v in spesifisitas],
+            'presisi_per_kelas': [float(v) for v in presisi],
+            'f1_per_kelas': [float(v) for v in f1_scores],
             'class_names': class_names  # Tambahkan nama kelas
         }
+        simpan_evaluasi(conn, kunci, nilai_k, bobot, hasil)
+        return hasil
     except Exception as e:
         raise Exception(f"Error dalam evaluasi model: {str(e)}")
     finally:
@@ -1402,15 +2029,13 @@ def parameter():
                  bobot_lila, bobot_umur, bobot_jk)
             )
             
-            # Evaluasi model
-            hasil = evaluasi_model_with_parameters(
-                nilai_k,
-                (bobot_berat, bobot_tinggi, bobot_lila, bobot_umur, bobot_jk)
-            )
-            
-            session['last_evaluation'] = hasil
+            naikkan_versi(conn, 'model')
             conn.commit()
-            flash(f'Parameter berhasil disimpan dengan akurasi: {hasil["accuracy"]:.2f}%', 'success')
+
+            # Evaluasi model dijalankan di latar belakang, hasilnya tampil di halaman evaluasi
+            params = conn.execute('SELECT * FROM parameter_knn WHERE id = ?', (parameter_id,)).fetchone()
+            job_runner.submit('evaluasi_model', parameter_evaluasi(conn, params), session['user_id'])
+            flash('Parameter berhasil disimpan. Evaluasi model sedang berjalan.', 'success')
             
         except Exception as e:
             conn.rollback()
@@ -1429,11 +2054,125 @@ def parameter():
             SELECT ph.*, u.username as pengubah
             FROM parameter_history ph
             JOIN users u ON ph.changed_by = u.id
+            WHERE ph.sumber = 'manual'
             ORDER BY changed_at DESC LIMIT 10
         ''').fetchall()
+    desa_list = conn.execute('SELECT id, nama_desa FROM desa_cimarga ORDER BY nama_desa').fetchall()
+    n_usang = hitung_klasifikasi_usang(conn, get_versi(conn, 'model'))
     conn.close()
     
-    return render_template('admin/parameter.html', params=params, history=history)
+    return render_template('admin/parameter.html', params=params, history=history,
+                           job_pencarian=job_runner.terakhir('pencarian_parameter'),
+                           pencarian_terakhir=job_runner.terakhir_selesai('pencarian_parameter'),
+                           desa_list=desa_list, n_usang=n_usang,
+                           job_reklasifikasi=job_runner.terakhir('reklasifikasi'),
+                           reklasifikasi_terakhir=job_runner.terakhir_selesai('reklasifikasi'))
+
+# Fold cross validation (tensor kuadrat selisih per fitur) per proses worker,
+# disiapkan ulang hanya jika versi 'model' (prototipe LVQ) berubah
+_fold_cache = {'kunci': None, 'folds': None}
+_fold_cache_lock = threading.Lock()
+
+def get_fold_evaluasi(conn):
+    """Fold evaluasi dari cache, None jika prototipe LVQ kosong"""
+    kunci = (app.config['DATABASE'], get_versi(conn, 'model'))
+    if _fold_cache['kunci'] == kunci:
+        return _fold_cache['folds']
+    with _fold_cache_lock:
+        if _fold_cache['kunci'] != kunci:
+            from models.tuning import siapkan_fold
+            X, y = data_evaluasi(conn)
+            _fold_cache['folds'] = siapkan_fold(X, y, KONFIGURASI_CV) if len(X) else None
+            _fold_cache['kunci'] = kunci
+        return _fold_cache['folds']
+
+# Nilai k yang ikut dinilai pada pratinjau agar k terbaik untuk bobot tersebut terlihat
+K_PRATINJAU = range(1, 16)
+
+@app.route('/parameter/pratinjau')
+@login_required
+def pratinjau_parameter():
+    """
+    Akurasi cross validation untuk k dan bobot BB/TB/LILA dari slider form
+    parameter, tanpa menyimpan parameter maupun fit ulang model.
+    """
+    try:
+        nilai_k = int(request.args['nilai_k'])
+        bobot = [float(request.args[nama]) for nama in ('bobot_bb', 'bobot_tb', 'bobot_ll')]
+        if nilai_k < 1:
+            raise ValueError('Nilai k minimal 1')
+        if not all(math.isfinite(b) for b in bobot):
+            raise ValueError('Bobot harus berupa angka hingga')
+    except (KeyError, ValueError) as e:
+        return jsonify({'error': f'Parameter tidak valid: {e}'}), 400
+
+    conn = get_db()
+    try:
+        folds = get_fold_evaluasi(conn)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    finally:
+        conn.close()
+    if folds is None:
+        return jsonify({'error': 'Dataset hasil sampling LVQ kosong'}), 400
+
+    from models.tuning import skor_bobot
+    daftar_k = sorted(set(K_PRATINJAU) | {nilai_k})
+    try:
+        rata, simpangan = skor_bobot(folds, bobot, daftar_k)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    i = daftar_k.index(nilai_k)
+    terbaik = int(np.argmax(rata))
+    return jsonify({
+        'nilai_k': nilai_k,
+        'cv_mean': float(rata[i]),
+        'cv_std': float(simpangan[i]),
+        'k_terbaik': daftar_k[terbaik],
+        'cv_mean_terbaik': float(rata[terbaik]),
+        'per_k': [{'nilai_k': k, 'cv_mean': float(m), 'cv_std': float(sd)}
+                  for k, m, sd in zip(daftar_k, rata, simpangan)],
+    })
+
+# Batas ukuran pencarian parameter per job
+MAX_KANDIDAT_BOBOT = 2000
+MAX_NILAI_K = 50
+BATAS_LEADERBOARD = 10
+
+def _daftar_angka(teks, tipe):
+    """'1, 3 5' -> [1, 3, 5]; ValueError jika ada nilai yang bukan angka"""
+    return [tipe(v) for v in re.split(r'[,;\s]+', teks.strip()) if v]
+
+@app.route('/parameter/pencarian', methods=['POST'])
+@login_required
+@admin_required
+def pencarian_parameter():
+    """Mengantrekan pencarian grid/acak atas nilai k dan bobot BB/TB/LILA"""
+    mode = request.form.get('mode', 'grid')
+    try:
+        daftar_k = _daftar_angka(request.form.get('daftar_k', ''), int)
+        if not daftar_k or not all(1 <= k <= MAX_NILAI_K for k in daftar_k):
+            raise ValueError(f'Nilai k harus antara 1 dan {MAX_NILAI_K}')
+        parameter = {'mode': mode, 'daftar_k': sorted(set(daftar_k)), 'diminta_oleh': session['user_id']}
+        if mode == 'acak':
+            n_sampel = int(request.form.get('n_sampel', 0))
+            if not 1 <= n_sampel <= MAX_KANDIDAT_BOBOT:
+                raise ValueError(f'Jumlah sampel bobot harus antara 1 dan {MAX_KANDIDAT_BOBOT}')
+            parameter.update(n_sampel=n_sampel, seed=int(request.form.get('seed') or 0))
+        else:
+            nilai_bobot = _daftar_angka(request.form.get('nilai_bobot', ''), float)
+            if not nilai_bobot or any(b < 0 for b in nilai_bobot):
+                raise ValueError('Nilai bobot harus diisi dan tidak boleh negatif')
+            if len(set(nilai_bobot)) ** 3 > MAX_KANDIDAT_BOBOT:
+                raise ValueError(f'Grid bobot terlalu besar (maks. {MAX_KANDIDAT_BOBOT} kombinasi)')
+            parameter['nilai_bobot'] = sorted(set(nilai_bobot))
+    except ValueError as e:
+        flash(f'Input pencarian tidak valid: {e}', 'danger')
+        return redirect(url_for('parameter'))
+
+    job_runner.submit('pencarian_parameter', parameter, session['user_id'])
+    flash('Pencarian parameter berjalan di latar belakang.', 'info')
+    return redirect(url_for('parameter'))
 
 @app.route('/admin/parameter/update', methods=['POST'])
 @admin_required
@@ -1475,7 +2214,8 @@ def update_parameter():
             (parameter_id, changed_by, nilai_k, bobot_berat, bobot_tinggi, bobot_lila, bobot_umur, bobot_jk)
             VALUES (1, ?, ?, ?, ?, ?, ?, ?)
         ''', (session['user_id'], nilai_k, bobot_berat, bobot_tinggi, bobot_lila, bobot_umur, bobot_jk))
-        
+
+        naikkan_versi(conn, 'model')
         conn.commit()
         flash('Parameter berhasil diperbarui', 'success')
     except sqlite3.OperationalError as e:
@@ -1530,8 +2270,65 @@ def tambah_dataset_training():
         flash('Data training berhasil ditambahkan.', 'success')
         return redirect(url_for('kelola_dataset_training'))
     return render_template('dataset/tambah_dataset_training.html')
-import csv
-from werkzeug.utils import secure_filename
+
+
+# Kolom wajib file impor dataset training dan status gizi yang diterima
+KOLOM_DATASET_TRAINING = ['feature1', 'feature2', 'feature3', 'target']
+STATUS_GIZI = ('normal', 'kurang', 'lebih', 'buruk')
+# Jumlah baris per chunk saat mengimpor dataset training
+UKURAN_CHUNK_IMPOR = 5000
+
+def baca_dataset_bertahap(stream, filename, chunksize=UKURAN_CHUNK_IMPOR):
+    """Generator DataFrame per chunk dari file CSV/XLSX tanpa memuat seluruh file"""
+    import pandas as pd
+    if filename.endswith('.xlsx'):
+        import zipfile
+        from xml.etree.ElementTree import ParseError
+        from openpyxl import load_workbook
+        from openpyxl.utils.exceptions import InvalidFileException
+        # File rusak (bukan zip, zip tanpa workbook, XML sheet rusak) dilaporkan sebagai ValueError
+        try:
+            wb = load_workbook(stream, read_only=True, data_only=True)
+            try:
+                rows = wb.active.iter_rows(values_only=True)
+                header = [str(h).strip() if h is not None else '' for h in next(rows, ())]
+                batch = []
+                for row in rows:
+                    batch.append(row[:len(header)])
+                    if len(batch) == chunksize:
+                        yield pd.DataFrame(batch, columns=header)
+                        batch = []
+                if batch:
+                    yield pd.DataFrame(batch, columns=header)
+            finally:
+                wb.close()
+        except (zipfile.BadZipFile, KeyError, InvalidFileException, ParseError) as e:
+            raise ValueError(f'File Excel tidak dapat dibaca: {e}') from e
+    else:
+        yield from pd.read_csv(stream, chunksize=chunksize, dtype=str, encoding='utf-8')
+
+def validasi_chunk_dataset(chunk):
+    """Konversi satu chunk sekaligus; baris dengan fitur non-angka atau status tidak dikenal ditolak"""
+    import pandas as pd
+    fitur = chunk[['feature1', 'feature2', 'feature3']].apply(pd.to_numeric, errors='coerce')
+    target = chunk['target'].astype(str).str.strip().str.lower()
+    valid = fitur.notna().all(axis=1) & target.isin(STATUS_GIZI)
+    return fitur[valid].assign(target=target[valid]), int((~valid).sum())
+
+def impor_dataset_training(conn, stream, filename):
+    """Impor dataset training per chunk dengan executemany, mengembalikan ringkasan jumlah baris"""
+    diterima = ditolak = 0
+    for i, chunk in enumerate(baca_dataset_bertahap(stream, filename)):
+        if i == 0 and not all(col in chunk.columns for col in KOLOM_DATASET_TRAINING):
+            raise ValueError('Kolom wajib: ' + ', '.join(KOLOM_DATASET_TRAINING))
+        valid, n_ditolak = validasi_chunk_dataset(chunk)
+        conn.executemany(
+            'INSERT INTO dataset_training (feature1, feature2, feature3, target) VALUES (?, ?, ?, ?)',
+            valid.itertuples(index=False, name=None)
+        )
+        diterima += len(valid)
+        ditolak += n_ditolak
+    return {'diterima': diterima, 'ditolak': ditolak}
 
 @app.route('/unggah_dataset_training', methods=['GET', 'POST'])
 @login_required
@@ -1541,52 +2338,18 @@ def unggah_dataset_training():
         if not file or (not file.filename.endswith('.csv') and not file.filename.endswith('.xlsx')):
             flash('File harus berformat CSV atau Excel (.xlsx)', 'danger')
             return redirect(request.url)
-        filename = secure_filename(file.filename)
-        
-        # Simpan file ke folder uploads
-        UPLOAD_FOLDER = os.path.join(os.getcwd(), "uploads")
-        os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(filepath)
+
         conn = get_db()
         try:
-            if file.filename.endswith('.xlsx'):
-                df = pd.read_excel(filepath)
-                # Validasi kolom
-                if not all(col in df.columns for col in ['feature1', 'feature2', 'feature3', 'target']):
-                    flash('Kolom wajib: feature1, feature2, feature3, target', 'danger')
-                    return redirect(request.url)
-                # Masukkan baris ke database
-                for _, row in df.iterrows():
-                    try:
-                        bb = float(row['feature1'])
-                        tb = float(row['feature2'])
-                        lila = float(row['feature3'])
-                        status = str(row['target'])
-                        conn.execute(
-                            'INSERT INTO dataset_training (feature1, feature2, feature3, target) VALUES (?, ?, ?, ?)',
-                            (bb, tb, lila, status)
-                        )
-                    except Exception:
-                        continue
-            else:
-                import csv
-                with open(filepath, newline='', encoding='utf-8') as csvfile:
-                    reader = csv.DictReader(csvfile)
-                    for row in reader:
-                        try:
-                            bb = float(row['feature1'])
-                            tb = float(row['feature2'])
-                            lila = float(row['feature3'])
-                            status = str(row['target'])
-                            conn.execute(
-                                'INSERT INTO dataset_training (feature1, feature2, feature3, target) VALUES (?, ?, ?, ?)',
-                                (bb, tb, lila, status)
-                            )
-                        except Exception:
-                            continue
+            # File dibaca langsung dari stream upload per chunk, tidak disimpan ke uploads/
+            ringkasan = impor_dataset_training(conn, file.stream, file.filename)
             conn.commit()
-            flash('Dataset training berhasil diunggah.', 'success')
+            flash(f"Dataset training berhasil diunggah: {ringkasan['diterima']} baris diterima, "
+                  f"{ringkasan['ditolak']} baris ditolak.", 'success')
+        except ValueError as e:
+            conn.rollback()
+            flash(str(e), 'danger')
+            return redirect(request.url)
         finally:
             conn.close()
         return redirect(url_for('kelola_dataset_training'))
@@ -1604,6 +2367,183 @@ def hapus_semua_dataset_training():
 
 
 
+# =============================================
+# JOB LATAR BELAKANG
+# =============================================
+
+# Job memakai koneksinya sendiri (connect_db), bukan koneksi milik request
+job_runner = JobRunner(connect_db, app=app)
+
+# Hyperparameter LVQ untuk job sampling
+LVQ_SAMPLING = {'n_prototypes_per_class': 10, 'learning_rate': 0.1, 'n_epochs': 50}
+# Minibatch (LVQ_MINIBATCH): sekitar LVQ_UPDATE_PER_EPOCH update per epoch berapa pun
+# ukuran dataset training, learning rate turun per epoch dan berhenti lebih awal
+# jika pergeseran prototipe sudah di bawah LVQ_TOL
+LVQ_BATCH_MIN = 32
+LVQ_UPDATE_PER_EPOCH = 100
+LVQ_DECAY = 0.1
+LVQ_TOL = 1e-3
+
+def parameter_lvq_sampling(n_training, minibatch):
+    """Argumen LVQ untuk job sampling atas n_training baris data training"""
+    parameter = dict(LVQ_SAMPLING)
+    if minibatch:
+        parameter.update(batch_size=max(LVQ_BATCH_MIN, n_training // LVQ_UPDATE_PER_EPOCH),
+                         decay=LVQ_DECAY, tol=LVQ_TOL)
+    return parameter
+
+@job_runner.register('lvq_sampling')
+def job_lvq_sampling(progres):
+    """Melatih LVQ dari dataset_training lalu mengganti isi dataset_lvq"""
+    _, LVQ = kelas_model()
+    conn = get_db()
+    try:
+        progres(0.05, 'Membaca dataset training')
+        data_training = conn.execute('SELECT feature1, feature2, feature3, target FROM dataset_training').fetchall()
+        if not data_training:
+            raise Exception("Dataset training kosong!")
+        X_train = np.array([[row['feature1'], row['feature2'], row['feature3']] for row in data_training])
+        y_train = np.array([row['target'] for row in data_training])
+
+        progres(0.1, 'Melatih LVQ')
+        lvq = LVQ(**parameter_lvq_sampling(len(X_train), app.config['LVQ_MINIBATCH']))
+        lvq.fit(X_train, y_train)
+        protos, proto_labels = lvq.get_prototypes()
+
+        progres(0.9, 'Menyimpan prototipe')
+        # Kosongkan tabel prototipe hasil LVQ
+        conn.execute('DELETE FROM dataset_lvq')
+        # Masukkan prototipe ke dataset_lvq
+        conn.executemany(
+            'INSERT INTO dataset_lvq (feature1, feature2, feature3, target) VALUES (?, ?, ?, ?)',
+            [(float(proto[0]), float(proto[1]), float(proto[2]), str(label))
+             for proto, label in zip(protos, proto_labels)]
+        )
+        naikkan_versi(conn, 'model')
+        conn.commit()
+        try:
+            artefak.terbitkan(direktori_model(), 'lvq', lvq, get_versi(conn, 'model'),
+                              hash_data=artefak.hash_data(X_train, y_train), n_training=len(X_train))
+        except OSError as e:
+            app.logger.warning('Artefak LVQ tidak dapat disimpan: %s', e)
+        return {
+            'n_training': len(X_train),
+            'n_prototipe': len(protos),
+            'n_epochs': lvq.n_epochs_,
+            'fit_time': lvq.fit_time_,
+        }
+    finally:
+        conn.close()
+
+@job_runner.register('evaluasi_model')
+def job_evaluasi_model(progres, nilai_k, bobot, kunci=None):
+    """Evaluasi model; kunci hanya membedakan job untuk input yang berbeda"""
+    progres(0.1, 'Cross validation')
+    return evaluasi_model_with_parameters(nilai_k, bobot)
+
+@job_runner.register('pencarian_parameter')
+def job_pencarian_parameter(progres, daftar_k, diminta_oleh, mode='grid', nilai_bobot=None,
+                            n_sampel=None, seed=None):
+    """Cross validation untuk semua kandidat (k, bobot); leaderboard dicatat di parameter_history"""
+    from models.tuning import cari_parameter, kandidat_acak, kandidat_grid
+    conn = get_db()
+    try:
+        progres(0.05, 'Menyiapkan fold')
+        X, y = data_evaluasi(conn)
+        if not len(X):
+            raise Exception("Dataset hasil sampling LVQ kosong!")
+        params = conn.execute('SELECT * FROM parameter_knn ORDER BY created_at DESC, id DESC LIMIT 1').fetchone()
+        if not params:
+            raise Exception("Parameter KNN belum diatur")
+        # Bobot umur dan jenis kelamin tidak dipakai model; bobot BB/TB/LILA diskalakan
+        # agar total kelima bobot tetap 1 (skala bobot tidak mengubah urutan tetangga)
+        sisa = 1 - params['bobot_umur'] - params['bobot_jk']
+        if sisa <= 0:
+            raise Exception("Bobot umur dan jenis kelamin sudah bernilai 1, tidak ada sisa untuk BB/TB/LILA")
+
+        kandidat = kandidat_acak(n_sampel, seed=seed) if mode == 'acak' else kandidat_grid(nilai_bobot)
+        mulai = time.perf_counter()
+        leaderboard = cari_parameter(
+            X, y, daftar_k, kandidat, KONFIGURASI_CV, n_proses=app.config['TUNING_PROSES'],
+            progres=lambda fraksi: progres(0.1 + 0.8 * fraksi, 'Cross validation')
+        )
+        durasi = time.perf_counter() - mulai
+
+        progres(0.95, 'Menyimpan leaderboard')
+        teratas = leaderboard[:BATAS_LEADERBOARD]
+        for baris in teratas:
+            baris['bobot'] = [round(b * sisa, 6) for b in baris['bobot']]
+        conn.executemany('''
+            INSERT INTO parameter_history
+                (parameter_id, changed_by, nilai_k, bobot_berat, bobot_tinggi, bobot_lila, bobot_umur,
+                 bobot_jk, changed_at, sumber, peringkat, cv_mean, cv_std)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, datetime('now'), 'pencarian', ?, ?, ?)
+        ''', [(params['id'], diminta_oleh, baris['nilai_k'], *baris['bobot'], params['bobot_umur'],
+               params['bobot_jk'], peringkat, baris['cv_mean'], baris['cv_std'])
+              for peringkat, baris in enumerate(teratas, 1)])
+        conn.commit()
+        return {
+            'leaderboard': teratas,
+            'bobot_umur': params['bobot_umur'],
+            'bobot_jk': params['bobot_jk'],
+            'n_kandidat': len(leaderboard),
+            'durasi': durasi,
+        }
+    finally:
+        conn.close()
+
+def parameter_evaluasi(conn, params):
+    """Parameter job evaluasi untuk parameter_knn dan prototipe yang sedang aktif"""
+    bobot = [params['bobot_berat'], params['bobot_tinggi'], params['bobot_lila'],
+             params['bobot_umur'], params['bobot_jk']]
+    X, y = data_evaluasi(conn)
+    return {
+        'nilai_k': params['nilai_k'],
+        'bobot': bobot,
+        'kunci': kunci_evaluasi(X, y, params['nilai_k'], bobot),
+    }
+
+def evaluasi_terakhir(conn, params):
+    """
+    Hasil evaluasi tersimpan untuk parameter/prototipe saat ini beserta job
+    terbaru (antri, berjalan atau gagal) untuk input yang sama, tanpa
+    mengantrekan job baru (lihat jalankan_evaluasi_model). Jika hasil untuk
+    input ini belum ada, hasil tersimpan terakhir dikembalikan dengan
+    'parameter_lain' = True serta nilai_k dan bobot yang dievaluasinya.
+    """
+    parameter = parameter_evaluasi(conn, params)
+    tersimpan = evaluasi_tersimpan(conn, parameter['kunci'])
+    if tersimpan:
+        return tersimpan, None
+    row = conn.execute('''
+        SELECT hasil, timestamp, nilai_k, bobot FROM evaluasi_model
+        WHERE hasil IS NOT NULL ORDER BY timestamp DESC, rowid DESC LIMIT 1
+    ''').fetchone()
+    terakhir = None
+    if row:
+        terakhir = {'hasil': json.loads(row['hasil']), 'finished_at': row['timestamp'], 'parameter_lain': True,
+                    'nilai_k': row['nilai_k'], 'bobot': json.loads(row['bobot']) if row['bobot'] else None}
+    job = job_runner.terakhir('evaluasi_model')
+    if job is not None and (job['parameter'] != parameter or job['status'] == 'selesai'):
+        job = None
+    return terakhir, job
+
+@app.route('/cache/statistik')
+@login_required
+@admin_required
+def statistik_cache():
+    """Penghitung hit/miss cache respons di worker ini"""
+    return jsonify(cache_respons.statistik())
+
+@app.route('/jobs/<int:job_id>')
+@login_required
+def status_job(job_id):
+    """Status dan progres job untuk polling dari halaman"""
+    job = job_runner.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job tidak ditemukan'}), 404
+    return jsonify(job)
+
 # =============================================
 # ROUTE LVQ (ADMIN ONLY)
 # =============================================
@@ -1616,27 +2556,15 @@ def lvq_prototype():
         'SELECT id, feature1, feature2, feature3, target FROM dataset_lvq'
     ).fetchall()
     conn.close()
-    return render_template('lvq_prototype.html', data_lvq=data_lvq)
+    return render_template('lvq_prototype.html', data_lvq=data_lvq,
+                           job_terbaru=job_runner.terakhir('lvq_sampling'),
+                           job_terakhir=job_runner.terakhir_selesai('lvq_sampling'))
 
 @app.route('/lvq_sampling', methods=['POST'])
 @login_required
 def lvq_sampling():
-    conn = get_db()
-    data_training = conn.execute('SELECT feature1, feature2, feature3, target FROM dataset_training').fetchall()
-    X_train = np.array([[row['feature1'], row['feature2'], row['feature3']] for row in data_training])
-    y_train = np.array([row['target'] for row in data_training])
-    lvq = LVQ(n_prototypes_per_class=10, learning_rate=0.1, n_epochs=50)
-    lvq.fit(X_train, y_train)
-    protos, proto_labels = lvq.get_prototypes()
-    # Kosongkan tabel prototipe hasil LVQ
-    conn.execute('DELETE FROM dataset_lvq')
-    # Masukkan prototipe ke dataset_lvq
-    for proto, label in zip(protos, proto_labels):
-        conn.execute('INSERT INTO dataset_lvq (feature1, feature2, feature3, target) VALUES (?, ?, ?, ?)',
-                     (float(proto[0]), float(proto[1]), float(proto[2]), label))
-    conn.commit()
-    conn.close()
-    flash('Proses sampling LVQ selesai. Dataset prototipe siap dipakai KNN!', 'success')
+    job_runner.submit('lvq_sampling', user_id=session.get('user_id'))
+    flash('Proses sampling LVQ berjalan di latar belakang.', 'info')
     return redirect(url_for('lvq_prototype'))
 
 @app.route('/lvq_prototype/delete_all', methods=['POST'])
@@ -1644,6 +2572,7 @@ def lvq_sampling():
 def delete_all_lvq_prototype():
     conn = get_db()
     conn.execute('DELETE FROM dataset_lvq')
+    naikkan_versi(conn, 'model')
     conn.commit()
     conn.close()
     flash('Semua prototipe LVQ berhasil dihapus.', 'success')
@@ -1681,21 +2610,29 @@ def evaluasi_model():
         else:
             lvq_stats['reduction_ratio'] = 0
 
-        # Evaluasi model jika parameter dan dataset tersedia
+        # Hasil evaluasi tersimpan; evaluasi ulang diantrekan lewat tombol Evaluasi Ulang
         model_evaluation = None
+        last_updated = None
+        evaluasi_lain = None
+        job = None
         if params and lvq_stats['total_prototypes'] > 0:
-            model_evaluation = evaluasi_model_with_parameters(
-                params['nilai_k'],
-                (params['bobot_berat'], params['bobot_tinggi'], 
-                 params['bobot_lila'], params['bobot_umur'], 
-                 params['bobot_jk'])
-            )
+            terakhir, job = evaluasi_terakhir(conn, params)
+            if terakhir:
+                model_evaluation = terakhir['hasil']
+                last_updated = terakhir['finished_at']
+                if terakhir.get('parameter_lain'):
+                    evaluasi_lain = terakhir
+            if job and job['status'] == 'gagal':
+                flash(f"Error saat evaluasi model: {job['pesan']}", "error")
 
         # Render template dengan semua data yang diperlukan
         return render_template('evaluasi_model.html',
                              params=params,
                              lvq_stats=lvq_stats,
-                             model_evaluation=model_evaluation)
+                             model_evaluation=model_evaluation,
+                             last_updated=last_updated,
+                             evaluasi_lain=evaluasi_lain,
+                             job=job)
                              
     except Exception as e:
         flash(f"Error saat evaluasi model: {str(e)}", "error")
@@ -1706,8 +2643,25 @@ def evaluasi_model():
     finally:
         conn.close()
         
+@app.route('/evaluasi_model/jalankan', methods=['POST'])
+@login_required
+def jalankan_evaluasi_model():
+    """Mengantrekan evaluasi ulang untuk parameter dan prototipe saat ini"""
+    conn = get_db()
+    try:
+        params = conn.execute('SELECT * FROM parameter_knn ORDER BY created_at DESC LIMIT 1').fetchone()
+        if not params:
+            flash('Parameter KNN belum diatur', 'danger')
+        else:
+            job_runner.submit('evaluasi_model', parameter_evaluasi(conn, params), session['user_id'])
+            flash('Evaluasi model sedang berjalan di latar belakang.', 'info')
+    finally:
+        conn.close()
+    return redirect(url_for('evaluasi_model'))
+
 @app.route('/evaluasi_model/data')
 @login_required
+@cache_respons.route('model')
 def get_evaluation_data():
     conn = get_db()
     try:
@@ -1717,22 +2671,27 @@ def get_evaluation_data():
         ''').fetchone()
         
         if not params:
-            return jsonify({'error': 'Parameter tidak tersedia'})
-            
-        evaluation = evaluasi_model_with_parameters(
-            params['nilai_k'],
-            (params['bobot_berat'], params['bobot_tinggi'], 
-             params['bobot_lila'], params['bobot_umur'], 
-             params['bobot_jk'])
-        )
+            response = jsonify({'error': 'Parameter tidak tersedia'})
+            response.cache_control.no_store = True
+            return response
+
+        terakhir, job = evaluasi_terakhir(conn, params)
         
-        return jsonify({
-            'model_evaluation': evaluation,
-            'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        response = jsonify({
+            'model_evaluation': terakhir['hasil'] if terakhir else None,
+            'last_updated': terakhir['finished_at'] if terakhir else None,
+            'parameter_lain': bool(terakhir and terakhir.get('parameter_lain')),
+            'job': job
         })
+        # Hasil belum final selama job evaluasi masih berjalan atau hasilnya milik
+        # parameter lain (evaluasi untuk parameter ini bisa selesai kapan saja), jangan di-cache
+        response.cache_control.no_store = job is not None or not terakhir or terakhir.get('parameter_lain', False)
+        return response
         
     except Exception as e:
-        return jsonify({'error': str(e)})
+        response = jsonify({'error': str(e)})
+        response.cache_control.no_store = True
+        return response
     finally:
         conn.close()
 
@@ -1740,6 +2699,121 @@ def get_evaluation_data():
 # FUNGSI UPLOAD DATA
 # =============================================
 
+KOLOM_UPLOAD_BALITA = [
+    'nik', 'nama', 'nama orangtua', 'jenis kelamin', 'usia_tahun', 'usia_bulan',
+    'tgl pengukuran', 'berat badan (KG)', 'Tinggi badan (CM)', 'LILA (CM)'
+]
+
+def tanggal_lahir_dari_usia(tgl_ukur, tahun, bulan):
+    """
+    Versi vektor dari `tgl_ukur - relativedelta(years=tahun, months=bulan)`:
+    tanggal dipotong ke hari terakhir bulan jika bulan tujuan lebih pendek.
+    """
+    import pandas as pd
+    total_bulan = tgl_ukur.dt.year * 12 + (tgl_ukur.dt.month - 1) - (tahun * 12 + bulan)
+    awal_bulan = pd.to_datetime(pd.DataFrame({
+        'year': total_bulan // 12, 'month': total_bulan % 12 + 1, 'day': 1
+    }))
+    hari = np.minimum(tgl_ukur.dt.day, awal_bulan.dt.days_in_month)
+    return awal_bulan + pd.to_timedelta(hari - 1, unit='D')
+
+def baca_upload_balita(df):
+    """Konversi seluruh kolom sheet upload sekaligus ke DataFrame siap simpan"""
+    import pandas as pd
+    def angka(kolom):
+        return pd.to_numeric(df[kolom].astype(str).str.replace(',', '.'))
+
+    tgl_ukur = pd.to_datetime(df['tgl pengukuran']).fillna(pd.Timestamp(datetime.today().date()))
+    tahun = pd.to_numeric(df['usia_tahun']).fillna(0).astype(int)
+    bulan = pd.to_numeric(df['usia_bulan']).fillna(0).astype(int)
+    return pd.DataFrame({
+        'nik': df['nik'].astype(str).str.strip(),
+        'nama': df['nama'].astype(str).str.strip(),
+        'nama_ortu': df['nama orangtua'],
+        'jenis_kelamin': df['jenis kelamin'],
+        'usia_tahun': tahun,
+        'usia_bulan': bulan,
+        'tanggal_lahir': tanggal_lahir_dari_usia(tgl_ukur, tahun, bulan).dt.strftime('%Y-%m-%d'),
+        'tanggal_ukur': tgl_ukur.dt.strftime('%Y-%m-%d'),
+        'berat': angka('berat badan (KG)'),
+        'tinggi': angka('Tinggi badan (CM)'),
+        'lila': angka('LILA (CM)'),
+    })
+
+def _id_balita_per_kunci(conn):
+    """Map (nik, nama) -> id balita untuk semua kunci di tabel sementara _impor_balita"""
+    rows = conn.execute('''
+        SELECT b.id, b.nik, b.nama
+        FROM balita b
+        JOIN _impor_balita t ON b.nik = t.nik AND b.nama = t.nama
+    ''').fetchall()
+    return {(row['nik'], row['nama']): row['id'] for row in rows}
+
+def impor_balita_pengukuran(conn, data, model):
+    """
+    Menyimpan hasil baca_upload_balita dalam satu transaksi:
+    satu lookup balita, insert executemany, dan satu panggilan prediksi KNN.
+    Mengembalikan ringkasan berisi jumlah baris dan daftar balita yang sudah ada.
+    """
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        # Satu lookup untuk semua pasangan (nik, nama) di file
+        kunci = data[['nik', 'nama']].drop_duplicates()
+        conn.execute('CREATE TEMP TABLE IF NOT EXISTS _impor_balita (nik TEXT, nama TEXT)')
+        conn.execute('DELETE FROM _impor_balita')
+        conn.executemany('INSERT INTO _impor_balita (nik, nama) VALUES (?, ?)',
+                         kunci.itertuples(index=False, name=None))
+        sudah_ada = _id_balita_per_kunci(conn)
+
+        # Baris yang balitanya sudah ada di database atau muncul lebih dulu di file
+        pasangan = list(zip(data['nik'], data['nama']))
+        baru = ~data.duplicated(['nik', 'nama']) & np.array([p not in sudah_ada for p in pasangan])
+        notif_pengukuran = [
+            'Balita dengan NIK {} dan nama {} sudah ada. Data yang ditambah adalah pengukuran baru.'.format(nik, nama)
+            for nik, nama in zip(data.loc[~baru, 'nik'], data.loc[~baru, 'nama'])
+        ]
+
+        balita_baru = data.loc[baru, ['nik', 'nama', 'tanggal_lahir', 'usia_tahun', 'usia_bulan',
+                                      'jenis_kelamin', 'nama_ortu']]
+        conn.executemany(
+            '''INSERT INTO balita (nik, nama, tanggal_lahir, usia_tahun, usia_bulan, jenis_kelamin, nama_ortu)
+               VALUES (?, ?, ?, ?, ?, ?, ?)''',
+            balita_baru.astype(object).itertuples(index=False, name=None)
+        )
+        id_balita = _id_balita_per_kunci(conn)
+
+        # Id AUTOINCREMENT baris baru pasti lebih besar dari id terbesar sebelum insert,
+        # dan tidak ada penulis lain selama transaksi IMMEDIATE ini
+        id_terakhir = conn.execute('SELECT COALESCE(MAX(id), 0) FROM pengukuran').fetchone()[0]
+        conn.executemany(
+            '''INSERT INTO pengukuran (balita_id, tanggal_ukur, berat_badan, tinggi_badan, lingkar_lengan)
+               VALUES (?, ?, ?, ?, ?)''',
+            zip([id_balita[p] for p in pasangan], data['tanggal_ukur'],
+                data['berat'].tolist(), data['tinggi'].tolist(), data['lila'].tolist())
+        )
+        pengukuran_ids = [row[0] for row in conn.execute(
+            'SELECT id FROM pengukuran WHERE id > ? ORDER BY id', (id_terakhir,)
+        )]
+
+        # === KLASIFIKASI OTOMATIS (satu prediksi untuk semua baris) ===
+        status_gizi = model.predict(data[['berat', 'tinggi', 'lila']].to_numpy())
+        conn.executemany(
+            '''INSERT INTO klasifikasi (pengukuran_id, status_gizi, tanggal_klasifikasi, versi_model)
+               VALUES (?, ?, ?, ?)''',
+            zip(pengukuran_ids, status_gizi.tolist(), data['tanggal_ukur'],
+                itertools.repeat(getattr(model, 'versi_model_', None)))
+        )
+        conn.execute('DROP TABLE _impor_balita')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return {
+        'n_baris': len(data),
+        'n_balita_baru': len(balita_baru),
+        'notif_pengukuran': notif_pengukuran,
+    }
+
 @app.route('/balita/upload', methods=['GET', 'POST'])
 @login_required
 def upload_balita_pengukuran():
@@ -1755,75 +2829,23 @@ def upload_balita_pengukuran():
 
         conn = None
         try:
+            import pandas as pd
+            mulai = time.perf_counter()
             df = pd.read_excel(file)
-            required_columns = [
-                'nik', 'nama', 'nama orangtua', 'jenis kelamin', 'usia_tahun', 'usia_bulan',
-                'tgl pengukuran', 'berat badan (KG)', 'Tinggi badan (CM)', 'LILA (CM)'
-            ]
-            if not all(col in df.columns for col in required_columns):
-                flash(f'Kolom wajib: {", ".join(required_columns)}', 'danger')
+            if not all(col in df.columns for col in KOLOM_UPLOAD_BALITA):
+                flash(f'Kolom wajib: {", ".join(KOLOM_UPLOAD_BALITA)}', 'danger')
                 return redirect(url_for('upload_balita_pengukuran'))
 
+            data = baca_upload_balita(df)
             conn = get_db()
-            notif_pengukuran = []
-            for _, row in df.iterrows():
-                nik = str(row['nik']).strip()
-                nama = row['nama'].strip()
-                tahun = int(row['usia_tahun']) if pd.notnull(row['usia_tahun']) else 0
-                bulan = int(row['usia_bulan']) if pd.notnull(row['usia_bulan']) else 0
-
-                if pd.notnull(row['tgl pengukuran']):
-                    tgl_ukur = pd.to_datetime(row['tgl pengukuran']).date()
-                else:
-                    tgl_ukur = datetime.today().date()
-
-                tanggal_lahir = tgl_ukur - relativedelta(years=tahun, months=bulan)
-
-                # Cek balita berdasarkan NIK dan nama
-                balita = conn.execute(
-                    'SELECT id FROM balita WHERE nik = ? AND nama = ?',
-                    (nik, nama)
-                ).fetchone()
-
-                if not balita:
-                    # Tambah balita baru jika belum ada
-                    conn.execute(
-                        '''INSERT INTO balita (nik, nama, tanggal_lahir, usia_tahun, usia_bulan, jenis_kelamin, nama_ortu)
-                           VALUES (?, ?, ?, ?, ?, ?, ?)''',
-                        (nik, nama, tanggal_lahir, tahun, bulan, row['jenis kelamin'], row['nama orangtua'])
-                    )
-                    balita_id = conn.execute('SELECT last_insert_rowid()').fetchone()[0]
-                else:
-                    # Jika sudah ada, tambahkan notifikasi
-                    notif_pengukuran.append('Balita dengan NIK {} dan nama {} sudah ada. Data yang ditambah adalah pengukuran baru.'.format(nik, nama))
-                    balita_id = balita['id']
-
-                # Masukkan pengukuran
-                berat = float(str(row['berat badan (KG)']).replace(',', '.'))
-                tinggi = float(str(row['Tinggi badan (CM)']).replace(',', '.'))
-                lila = float(str(row['LILA (CM)']).replace(',', '.'))
-
-                conn.execute(
-                    '''INSERT INTO pengukuran (balita_id, tanggal_ukur, berat_badan, tinggi_badan, lingkar_lengan)
-                       VALUES (?, ?, ?, ?, ?)''',
-                    (
-                        balita_id,
-                        tgl_ukur,
-                        berat,
-                        tinggi,
-                        lila
-                    )
-                )
-                pengukuran_id = conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+            model = get_model_knn(conn)
+            if model is None:
+                flash('Dataset LVQ kosong, lakukan sampling LVQ dahulu', 'danger')
+                return redirect(url_for('upload_balita_pengukuran'))
 
-                # === KLASIFIKASI OTOMATIS ===
-                status_gizi = klasifikasi_knn(berat, tinggi, lila)
-                conn.execute(
-                    '''INSERT INTO klasifikasi (pengukuran_id, status_gizi, tanggal_klasifikasi)
-                       VALUES (?, ?, ?)''',
-                    (pengukuran_id, status_gizi, tgl_ukur)
-                )
-            conn.commit()
+            hasil = impor_balita_pengukuran(conn, data, model)
+            durasi = time.perf_counter() - mulai
+            notif_pengukuran = hasil['notif_pengukuran']
             # Batasi jumlah notifikasi agar session cookie tidak terlalu besar!
             max_notif = 5
             if notif_pengukuran:
@@ -1831,7 +2853,8 @@ def upload_balita_pengukuran():
                     flash(notif, 'info')
                 if len(notif_pengukuran) > max_notif:
                     flash(f"dan {len(notif_pengukuran)-max_notif} balita lainnya sudah ada...", "info")
-            flash('Data balita, pengukuran, dan status gizi berhasil diunggah', 'success')
+            flash(f"Data balita, pengukuran, dan status gizi berhasil diunggah: {hasil['n_baris']} baris "
+                  f"dalam {durasi:.2f} detik ({hasil['n_baris'] / max(durasi, 1e-6):.0f} baris/detik)", 'success')
         except Exception as e:
             flash(f'Error: {str(e)}', 'danger')
         finally:
@@ -1851,33 +2874,344 @@ def get_knn_parameters():
     conn.close()
     return params
 
-def klasifikasi_knn(berat_badan, tinggi_badan, lingkar_lengan):
-    conn = get_db()
+# Jumlah baris per halaman daftar balita dan pengukuran
+PER_PAGE = 50
+
+# Total data per (query, parameter) disimpan sebentar agar COUNT(*) tidak
+# dijalankan ulang di setiap perpindahan halaman
+TTL_TOTAL = 60
+MAX_CACHE_TOTAL = 256
+_cache_total = {}
+_cache_total_lock = threading.Lock()
+
+def encode_kursor(nilai):
+    """Nilai kunci baris -> string aman untuk URL"""
+    return base64.urlsafe_b64encode(json.dumps(list(nilai)).encode()).decode().rstrip('=')
+
+def decode_kursor(teks):
+    """Kebalikan encode_kursor, None jika kursor tidak valid"""
+    try:
+        nilai = json.loads(base64.urlsafe_b64decode(teks + '=' * (-len(teks) % 4)))
+    except (ValueError, TypeError):
+        return None
+    return nilai if isinstance(nilai, list) else None
+
+def ambil_halaman_keyset(conn, query, params, kunci, turun=False, per_page=PER_PAGE):
+    """
+    Satu halaman hasil `query` (yang diakhiri klausa WHERE) diurutkan menurut
+    `kunci` = [(kolom SQL, nama kolom hasil), ...]. Posisi dibaca dari argumen
+    `setelah`/`sebelum` di request, sehingga halaman berapa pun hanya membaca
+    per_page + 1 baris lewat indeks, tanpa OFFSET.
+    """
+    kolom = ', '.join(sql for sql, _ in kunci)
+    setelah = decode_kursor(request.args.get('setelah', ''))
+    sebelum = None if setelah else decode_kursor(request.args.get('sebelum', ''))
+    mundur = sebelum is not None
+    posisi = setelah or sebelum
+    if posisi is not None and len(posisi) != len(kunci):
+        posisi = None
+        mundur = False
+
+    # Maju pada urutan naik berarti ">", mundur atau urutan turun membalik arahnya
+    arah_turun = turun != mundur
+    params = list(params)
+    if posisi is not None:
+        query += f' AND ({kolom}) {"<" if arah_turun else ">"} ({", ".join("?" * len(kunci))})'
+        params.extend(posisi)
+    urutan = ' DESC' if arah_turun else ''
+    query += ' ORDER BY ' + ', '.join(sql + urutan for sql, _ in kunci) + ' LIMIT ?'
+    params.append(per_page + 1)
+
+    rows = conn.execute(query, params).fetchall()
+    ada_lagi = len(rows) > per_page
+    rows = rows[:per_page]
+    if mundur:
+        rows.reverse()
+
+    def kursor(row):
+        return encode_kursor(row[nama] for _, nama in kunci)
+
+    # Nomor halaman hanya untuk penomoran baris di tampilan
+    nomor = max(1, request.args.get('page', 1, type=int)) if posisi is not None else 1
+    halaman = {'rows': rows, 'nomor': nomor, 'per_page': per_page, 'setelah': None, 'sebelum': None}
+    if rows:
+        # Halaman tujuan mundur pasti masih punya halaman berikutnya, dan sebaliknya
+        if ada_lagi or mundur:
+            halaman['setelah'] = kursor(rows[-1])
+        if (ada_lagi and mundur) or (posisi is not None and not mundur):
+            halaman['sebelum'] = kursor(rows[0])
+    return halaman
+
+def hitung_total_cache(conn, query, params):
+    """Hasil COUNT(*) dari cache (maks. TTL_TOTAL detik), dihitung ulang jika kedaluwarsa"""
+    kunci = (app.config['DATABASE'], query, tuple(params))
+    sekarang = time.monotonic()
+    with _cache_total_lock:
+        tersimpan = _cache_total.get(kunci)
+    if tersimpan and sekarang - tersimpan[0] < TTL_TOTAL:
+        return tersimpan[1]
+    total = conn.execute(query, params).fetchone()[0]
+    with _cache_total_lock:
+        if len(_cache_total) >= MAX_CACHE_TOTAL:
+            _cache_total.pop(next(iter(_cache_total)))
+        _cache_total[kunci] = (sekarang, total)
+    return total
+
+# Model KNN ter-fit per proses worker beserta kuncinya (database, versi 'model'),
+# disimpan sebagai satu tuple agar pembaca tanpa lock tidak melihat pasangan campuran
+_model_cache = {'isi': (None, None)}
+_model_cache_lock = threading.Lock()
+
+def _data_model_knn(conn):
+    """(X, y, k, bobot) dari dataset_lvq dan parameter_knn terbaru, None jika prototipe kosong"""
     data_protos = conn.execute('SELECT feature1, feature2, feature3, target FROM dataset_lvq').fetchall()
     if not data_protos:
-        return "Dataset LVQ kosong, lakukan sampling LVQ dahulu"
-        
+        return None
+
     X_train = [[row['feature1'], row['feature2'], row['feature3']] for row in data_protos]
     y_train = [row['target'] for row in data_protos]
-    
-    params = conn.execute('SELECT * FROM parameter_knn').fetchone()
-    nilai_k = params['nilai_k'] if params else 3
+
+    params = conn.execute('SELECT * FROM parameter_knn ORDER BY created_at DESC, id DESC LIMIT 1').fetchone()
+    nilai_k = int(params['nilai_k']) if params else 3
     bobot = [
-        float(params['bobot_berat']) if params else 1,
-        float(params['bobot_tinggi']) if params else 1,
-        float(params['bobot_lila']) if params else 1
+        float(params['bobot_berat']) if params else 1.0,
+        float(params['bobot_tinggi']) if params else 1.0,
+        float(params['bobot_lila']) if params else 1.0
     ]
-    
+    return X_train, y_train, nilai_k, bobot
+
+def _fit_model_knn(X_train, y_train, nilai_k, bobot):
+    """Fit KNN dari data hasil _data_model_knn"""
+    KNN, _ = kelas_model()
     model = KNN(k=nilai_k, bobot=bobot)
     model.fit(X_train, y_train)
+    return model
+
+def direktori_model():
+    """Direktori artefak model untuk database aktif"""
+    return app.config['MODEL_DIR'] or os.path.splitext(app.config['DATABASE'])[0] + '.model'
+
+def _model_knn_versi(conn):
+    """
+    (versi, model) KNN yang konsisten dengan database. Versi 'model', prototipe
+    dan parameter dibaca dalam satu transaksi baca. Artefak terbitan proses lain
+    hanya dipakai jika versi, hash data, k dan bobotnya cocok; jika tidak, model
+    di-fit lalu diterbitkan selama versinya masih yang terbaru.
+    """
+    KNN, _ = kelas_model()
+    transaksi_sendiri = not conn.in_transaction
+    if transaksi_sendiri:
+        conn.execute('BEGIN')
+    try:
+        versi = get_versi(conn, 'model')
+        data = _data_model_knn(conn)
+    finally:
+        if transaksi_sendiri:
+            conn.rollback()
+    if data is None:
+        return versi, None
+
+    X_train, y_train, nilai_k, bobot = data
+    info = {'hash_data': artefak.hash_data(X_train, y_train), 'k': nilai_k, 'bobot': bobot}
+    direktori = direktori_model()
+    termuat = artefak.muat(direktori, 'knn', KNN, versi=versi, **info)
+    if termuat is not None:
+        model = termuat[1]
+    else:
+        model = _fit_model_knn(X_train, y_train, nilai_k, bobot)
+        # Data yang dibaca di dalam transaksi tulis milik pemanggil belum tentu ter-commit
+        if transaksi_sendiri and get_versi(conn, 'model') == versi:
+            try:
+                artefak.terbitkan(direktori, 'knn', model, versi, **info)
+            except OSError as e:
+                app.logger.warning('Artefak KNN tidak dapat disimpan: %s', e)
+    model.hash_data_ = info['hash_data']
+    return versi, model
+
+def get_model_knn(conn):
+    """
+    Mengambil model KNN dari cache; jika versi 'model' berubah, model versi baru
+    dimuat dari artefak (atau di-fit lalu diterbitkan) dan ditukar sekaligus.
+    Versi 'model' yang dipakai tersimpan di atribut `versi_model_`.
+    """
+    kunci = (app.config['DATABASE'], get_versi(conn, 'model'))
+    isi = _model_cache['isi']
+    if isi[0] == kunci:
+        return isi[1]
+    with _model_cache_lock:
+        if _model_cache['isi'][0] != kunci:
+            versi, model = _model_knn_versi(conn)
+            if model is not None:
+                model.versi_model_ = versi
+            _model_cache['isi'] = ((app.config['DATABASE'], versi), model)
+        return _model_cache['isi'][1]
+
+def muat_model_awal():
+    """
+    Isi cache model saat worker start agar request pertama tidak menunggu.
+    Artefak yang sudah diterbitkan dipakai jika masih cocok dengan database.
+    """
+    conn = connect_db()
+    try:
+        get_model_knn(conn)
+    finally:
+        conn.close()
+
+def mulai_muat_model_awal():
+    """
+    Jalankan muat_model_awal di thread terpisah jika artefak model sudah ada,
+    agar impor scikit-learn tidak menunda start worker; request yang butuh
+    model lebih dulu akan memuatnya sendiri. Hanya dipanggil saat melayani
+    request (gunicorn.conf.py dan app.run), bukan saat app diimpor oleh test,
+    CLI atau benchmark.
+    """
+    if os.path.exists(os.path.join(direktori_model(), 'knn.json')):
+        threading.Thread(target=muat_model_awal, name='muat-model', daemon=True).start()
+
+@metrik.terukur('klasifikasi_knn')
+def klasifikasi_knn(berat_badan, tinggi_badan, lingkar_lengan):
+    """
+    (status gizi, versi 'model' yang memprediksinya) untuk satu pengukuran;
+    (None, None) jika dataset LVQ masih kosong.
+    """
+    conn = get_db()
+    try:
+        model = get_model_knn(conn)
+    finally:
+        conn.close()
+    if model is None:
+        return None, None
+
     fitur_balita = [[berat_badan, tinggi_badan, lingkar_lengan]]
     status_gizi = model.predict(fitur_balita)[0]
-    return status_gizi
+    return status_gizi, model.versi_model_
+
+# Jumlah pengukuran per chunk reklasifikasi (satu predict dan satu transaksi per chunk)
+UKURAN_CHUNK_REKLASIFIKASI = 5000
+
+def _filter_reklasifikasi(start_date=None, end_date=None, desa_id=None):
+    """Potongan WHERE dan parameter untuk filter tanggal ukur dan desa"""
+    kondisi, params = '', []
+    if start_date:
+        kondisi += ' AND p.tanggal_ukur >= ?'
+        params.append(start_date)
+    if end_date:
+        kondisi += ' AND p.tanggal_ukur <= ?'
+        params.append(end_date)
+    if desa_id:
+        kondisi += ' AND p.balita_id IN (SELECT id FROM balita WHERE desa_id = ?)'
+        params.append(desa_id)
+    return kondisi, params
+
+def hitung_klasifikasi_usang(conn, versi, **filter_data):
+    """
+    Jumlah klasifikasi yang dibuat oleh versi model selain `versi`. `IS NOT ?`
+    dipecah menjadi NULL, < dan > agar setiap bagian dicari lewat
+    idx_klasifikasi_versi_model, sehingga biayanya sebanding jumlah baris usang
+    dan bukan jumlah seluruh klasifikasi.
+    """
+    kondisi, params = _filter_reklasifikasi(**filter_data)
+    return conn.execute(f'''
+        SELECT COUNT(*) FROM (
+            SELECT pengukuran_id FROM klasifikasi WHERE versi_model IS NULL
+            UNION ALL SELECT pengukuran_id FROM klasifikasi WHERE versi_model < ?
+            UNION ALL SELECT pengukuran_id FROM klasifikasi WHERE versi_model > ?
+        ) k JOIN pengukuran p ON p.id = k.pengukuran_id
+        WHERE 1{kondisi}
+    ''', [versi, versi, *params]).fetchone()[0]
+
+def reklasifikasi(conn, model, start_date=None, end_date=None, desa_id=None, semua=False, progres=None):
+    """
+    Klasifikasi ulang pengukuran per UKURAN_CHUNK_REKLASIFIKASI baris (urut id)
+    dengan satu model.predict per chunk. Status yang berubah ditulis dengan
+    executemany dan semua baris yang diproses ditandai versi model ini,
+    sehingga proses berikutnya hanya menyentuh baris usang (kecuali semua=True).
+    """
+    versi = model.versi_model_
+    kondisi, params = _filter_reklasifikasi(start_date, end_date, desa_id)
+    if not semua:
+        kondisi += ' AND k.versi_model IS NOT ?'
+        params.append(versi)
+    query = f'''
+        SELECT p.id, p.berat_badan, p.tinggi_badan, p.lingkar_lengan, k.status_gizi
+        FROM pengukuran p JOIN klasifikasi k ON k.pengukuran_id = p.id
+        WHERE p.id > ?{kondisi}
+        ORDER BY p.id LIMIT ?
+    '''
+    total = conn.execute(f'''
+        SELECT COUNT(*) FROM pengukuran p JOIN klasifikasi k ON k.pengukuran_id = p.id
+        WHERE 1=1{kondisi}
+    ''', params).fetchone()[0]
+
+    n_diproses = 0
+    perubahan = Counter()
+    id_terakhir = 0
+    while True:
+        rows = conn.execute(query, [id_terakhir, *params, UKURAN_CHUNK_REKLASIFIKASI]).fetchall()
+        if not rows:
+            break
+        prediksi = model.predict(np.array([row[1:4] for row in rows], dtype=float)).tolist()
+        berubah = [(baru, versi, row[0]) for row, baru in zip(rows, prediksi) if baru != row[4]]
+        tetap = [(versi, row[0]) for row, baru in zip(rows, prediksi) if baru == row[4]]
+        conn.executemany('''
+            UPDATE klasifikasi SET status_gizi = ?, versi_model = ?, tanggal_klasifikasi = date('now')
+            WHERE pengukuran_id = ?
+        ''', berubah)
+        conn.executemany('UPDATE klasifikasi SET versi_model = ? WHERE pengukuran_id = ?', tetap)
+        conn.commit()
+
+        perubahan.update(f'{row[4]} -> {baru}' for row, baru in zip(rows, prediksi) if baru != row[4])
+        n_diproses += len(rows)
+        id_terakhir = rows[-1][0]
+        if progres:
+            progres(n_diproses / max(total, 1))
+    return {
+        'versi_model': versi,
+        'n_diproses': n_diproses,
+        'n_berubah': sum(perubahan.values()),
+        'perubahan': dict(perubahan.most_common()),
+    }
+
+@job_runner.register('reklasifikasi')
+def job_reklasifikasi(progres, start_date=None, end_date=None, desa_id=None, semua=False):
+    """Reklasifikasi pengukuran dengan model KNN saat ini"""
+    conn = get_db()
+    try:
+        model = get_model_knn(conn)
+        if model is None:
+            raise Exception("Dataset LVQ kosong, lakukan sampling LVQ dahulu")
+        progres(0.01, 'Klasifikasi ulang pengukuran')
+        return reklasifikasi(conn, model, start_date, end_date, desa_id, semua,
+                             progres=lambda fraksi: progres(fraksi, 'Klasifikasi ulang pengukuran'))
+    finally:
+        conn.close()
+
+@app.route('/reklasifikasi', methods=['POST'])
+@login_required
+@admin_required
+def jalankan_reklasifikasi():
+    """Mengantrekan reklasifikasi untuk semua pengukuran atau subset tanggal/desa"""
+    parameter = {
+        'start_date': request.form.get('start_date') or None,
+        'end_date': request.form.get('end_date') or None,
+        'desa_id': request.form.get('desa_id', type=int) or None,
+        'semua': request.form.get('semua') == '1',
+    }
+    for tanggal in (parameter['start_date'], parameter['end_date']):
+        if tanggal:
+            try:
+                datetime.strptime(tanggal, '%Y-%m-%d')
+            except ValueError:
+                flash('Format tanggal harus YYYY-MM-DD', 'danger')
+                return redirect(url_for('parameter'))
+    job_runner.submit('reklasifikasi', parameter, session['user_id'])
+    flash('Reklasifikasi berjalan di latar belakang.', 'info')
+    return redirect(url_for('parameter'))
 
 # =============================================
 # JALANKAN APLIKASI
 # =============================================
 
-print("Daftar file di folder templates:", os.listdir(os.path.join(app.root_path, 'templates')))
 if __name__ == '__main__':
+    mulai_muat_model_awal()
     app.run(debug=True)
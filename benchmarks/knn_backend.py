@@ -0,0 +1,64 @@
+"""
+Benchmark backend pencarian tetangga KNN (brute vs KD-tree vs ball tree).
+
+Menampilkan waktu fit + prediksi untuk beberapa ukuran data training,
+baik untuk satu query (klasifikasi satu pengukuran) maupun batch query
+(klasifikasi ulang massal), sebagai dasar nilai AMBANG_TREE dan AMBANG_BRUTE di models/knn.py.
+Kolom auto menunjukkan backend yang dipilih algorithm='auto'.
+
+Jalankan dari root repository:
+    python -m benchmarks.knn_backend
+"""
+import argparse
+import time
+
+import numpy as np
+
+from models.knn import KNN, AMBANG_TREE, AMBANG_BRUTE
+
+UKURAN_TRAINING = [40, 100, 250, 500, 1000, 2000, 5000, 10000, 50000]
+ALGORITMA = ['brute', 'kd_tree', 'ball_tree', 'auto']
+
+
+def ukur(algorithm, X, y, X_query, ulang):
+    """Rata-rata waktu (detik) fit + predict untuk satu konfigurasi"""
+    model = KNN(k=5, bobot=[0.35, 0.30, 0.15], algorithm=algorithm)
+    mulai = time.perf_counter()
+    model.fit(X, y)
+    waktu_fit = time.perf_counter() - mulai
+
+    mulai = time.perf_counter()
+    for _ in range(ulang):
+        model.predict(X_query)
+    waktu_predict = (time.perf_counter() - mulai) / ulang
+    return waktu_fit, waktu_predict
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--batch', type=int, default=5000, help='jumlah query untuk mode batch')
+    parser.add_argument('--ulang', type=int, default=200, help='pengulangan untuk mode satu query')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    skala = np.array([20.0, 110.0, 18.0])
+    print(f"AMBANG_TREE saat ini: {AMBANG_TREE}, AMBANG_BRUTE saat ini: {AMBANG_BRUTE}\n")
+    print(f"{'n_train':>8} {'mode':>7} " + ' '.join(f"{a:>12}" for a in ALGORITMA) + '   tercepat')
+
+    for n_train in UKURAN_TRAINING:
+        X = rng.random((n_train, 3)) * skala
+        y = rng.choice(['normal', 'kurang', 'buruk'], size=n_train)
+        for mode, n_query, ulang in (('single', 1, args.ulang), ('batch', args.batch, 1)):
+            X_query = rng.random((n_query, 3)) * skala
+            hasil = {}
+            for algorithm in ALGORITMA:
+                waktu_fit, waktu_predict = ukur(algorithm, X, y, X_query, ulang)
+                # Mode single: fit dihitung sekali, prediksi diulang (seperti model cache)
+                hasil[algorithm] = waktu_predict if mode == 'single' else waktu_fit + waktu_predict
+            tercepat = min((a for a in hasil if a != 'auto'), key=hasil.get)
+            kolom = ' '.join(f"{hasil[a] * 1000:>10.3f}ms" for a in ALGORITMA)
+            print(f"{n_train:>8} {mode:>7} {kolom}   {tercepat}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,285 @@
+"""
+Benchmark jalur utama aplikasi: model, impor data dan endpoint laporan.
+
+Setiap kasus dijalankan untuk beberapa ukuran data terhadap database SQLite
+sementara (lewat test client Flask untuk route), lalu median waktunya
+dibandingkan dengan baseline di benchmarks/baseline.json. Kasus yang lebih
+lambat dari AMBANG x baseline dianggap regresi.
+
+Jalankan dari root repository:
+    python -m benchmarks.suite                  # bandingkan dengan baseline
+    python -m benchmarks.suite --simpan-baseline  # perbarui baseline mesin ini
+    python -m benchmarks.suite --filter laporan
+
+Baseline bergantung pada mesin; simpan ulang setelah pindah mesin atau
+setelah optimasi yang disengaja.
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from database_sementara import DatabaseSementara
+
+PATH_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# Kasus gagal jika median > AMBANG x baseline dan selisihnya > MIN_SELISIH_DETIK
+AMBANG = float(os.environ.get('BENCHMARK_AMBANG', 1.5))
+MIN_SELISIH_DETIK = 0.005
+
+STATUS = ['normal', 'kurang', 'lebih', 'buruk']
+SKALA_FITUR = np.array([20.0, 110.0, 18.0])
+
+
+def data_acak(n, seed=0):
+    """n baris fitur (berat, tinggi, lila) dan status gizi acak"""
+    rng = np.random.default_rng(seed)
+    X = rng.random((n, 3)) * SKALA_FITUR
+    y = np.array(STATUS)[np.arange(n) % len(STATUS)]
+    return X, y
+
+
+class Lingkungan(DatabaseSementara):
+    """Database SQLite sementara beserta koneksi dan test client dengan sesi admin"""
+
+    def __init__(self):
+        super().__init__('benchmark.db')
+
+    def __enter__(self):
+        super().__enter__()
+        self.conn = self.aplikasi.connect_db()
+        self.client = self.client_admin()
+        return self
+
+    def __exit__(self, *exc):
+        self.conn.close()
+        super().__exit__(*exc)
+
+    def isi_prototipe(self, n):
+        X, y = data_acak(n, seed=1)
+        self.conn.execute('DELETE FROM dataset_lvq')
+        self.conn.executemany('INSERT INTO dataset_lvq (feature1, feature2, feature3, target) VALUES (?, ?, ?, ?)',
+                              [(*map(float, x), str(t)) for x, t in zip(X, y)])
+        self.conn.commit()
+
+    def isi_pengukuran(self, n):
+        """n balita masing-masing dengan satu pengukuran dan klasifikasi sepanjang 2024"""
+        X, y = data_acak(n, seed=2)
+        self.conn.executemany(
+            'INSERT INTO balita (id, nik, nama, tanggal_lahir, jenis_kelamin, nama_ortu) VALUES (?, ?, ?, ?, ?, ?)',
+            [(i, str(3600000000000000 + i), f'Anak {i}', '2022-01-01', 'LP'[i % 2], 'Ortu') for i in range(1, n + 1)]
+        )
+        self.conn.executemany(
+            'INSERT INTO pengukuran (id, balita_id, tanggal_ukur, berat_badan, tinggi_badan, lingkar_lengan) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            [(i, i, f'2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}', *map(float, X[i - 1])) for i in range(1, n + 1)]
+        )
+        self.conn.executemany(
+            "INSERT INTO klasifikasi (pengukuran_id, status_gizi, tanggal_klasifikasi) VALUES (?, ?, '2024-12-31')",
+            [(i, str(y[i - 1])) for i in range(1, n + 1)]
+        )
+        self.conn.commit()
+
+    def kosongkan(self, *tabel):
+        for nama in tabel:
+            self.conn.execute(f'DELETE FROM {nama}')
+        self.conn.commit()
+
+
+def ukur(jalankan, siapkan=None, ulang=5, pemanasan=1):
+    """Median dan minimum waktu (detik) `jalankan`; `siapkan` dipanggil sebelum setiap run tanpa diukur"""
+    waktu = []
+    for i in range(pemanasan + ulang):
+        if siapkan:
+            siapkan()
+        mulai = time.perf_counter()
+        jalankan()
+        if i >= pemanasan:
+            waktu.append(time.perf_counter() - mulai)
+    return {'median': statistics.median(waktu), 'min': min(waktu), 'ulang': ulang}
+
+
+# =============================================
+# KASUS BENCHMARK
+# =============================================
+# Setiap kasus: fungsi(n) yang mengembalikan hasil ukur(); KASUS memetakan
+# nama -> (fungsi, daftar ukuran)
+
+def bench_knn_predict(n):
+    """KNN.predict 1000 query atas n data training"""
+    from models.knn import KNN
+    X, y = data_acak(n)
+    X_query, _ = data_acak(1000, seed=3)
+    model = KNN(k=5, bobot=[0.35, 0.30, 0.15]).fit(X, y)
+    return ukur(lambda: model.predict(X_query))
+
+
+def bench_lvq_fit(n):
+    """LVQ.fit dengan konfigurasi minibatch job sampling LVQ (LVQ_MINIBATCH=1) atas n data training"""
+    from app import parameter_lvq_sampling
+    from models.lvq import LVQ
+    X, y = data_acak(n)
+    def jalankan():
+        LVQ(**parameter_lvq_sampling(n, minibatch=True), random_state=0).fit(X, y)
+    return ukur(jalankan, ulang=3)
+
+
+def bench_evaluasi_model(n):
+    """evaluasi_model_with_parameters atas n prototipe (hasil tersimpan dihapus setiap run)"""
+    with Lingkungan() as env:
+        env.isi_prototipe(n)
+        def jalankan():
+            with env.aplikasi.app.app_context():
+                env.aplikasi.evaluasi_model_with_parameters(5, [0.35, 0.30, 0.15])
+        return ukur(jalankan, siapkan=lambda: env.kosongkan('evaluasi_model'), ulang=3)
+
+
+def bench_upload_balita_pengukuran(n):
+    """POST /balita/upload dengan file Excel n baris ke database kosong"""
+    import pandas as pd
+    X, _ = data_acak(n, seed=4)
+    df = pd.DataFrame({
+        'nik': [str(3600000000000000 + i) for i in range(n)],
+        'nama': [f'Anak {i}' for i in range(n)],
+        'nama orangtua': 'Ortu',
+        'jenis kelamin': 'L',
+        'usia_tahun': 2,
+        'usia_bulan': np.arange(n) % 12,
+        'tgl pengukuran': '2024-06-01',
+        'berat badan (KG)': X[:, 0],
+        'Tinggi badan (CM)': X[:, 1],
+        'LILA (CM)': X[:, 2],
+    })
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    isi = buffer.getvalue()
+
+    with Lingkungan() as env:
+        env.isi_prototipe(200)
+        def jalankan():
+            response = env.client.post('/balita/upload', data={'file': (io.BytesIO(isi), 'upload.xlsx')})
+            assert response.status_code == 302
+        hasil = ukur(jalankan, siapkan=lambda: env.kosongkan('klasifikasi', 'pengukuran', 'balita'), ulang=3)
+        assert env.conn.execute('SELECT COUNT(*) FROM klasifikasi').fetchone()[0] == n
+        return hasil
+
+
+def bench_unggah_dataset_training(n):
+    """POST /unggah_dataset_training dengan file CSV n baris"""
+    X, y = data_acak(n, seed=5)
+    isi = ('feature1,feature2,feature3,target\n' + ''.join(
+        f'{a:.2f},{b:.2f},{c:.2f},{t}\n' for (a, b, c), t in zip(X, y))).encode()
+    with Lingkungan() as env:
+        def jalankan():
+            response = env.client.post('/unggah_dataset_training',
+                                       data={'file': (io.BytesIO(isi), 'training.csv')})
+            assert response.status_code == 302
+        hasil = ukur(jalankan, siapkan=lambda: env.kosongkan('dataset_training'), ulang=3)
+        assert env.conn.execute('SELECT COUNT(*) FROM dataset_training').fetchone()[0] == n
+        return hasil
+
+
+def bench_laporan_data(n):
+    """GET /laporan/data satu tahun atas n pengukuran (cache respons dilewati lewat query unik)"""
+    with Lingkungan() as env:
+        env.isi_pengukuran(n)
+        urutan = iter(range(10 ** 6))
+        def jalankan():
+            response = env.client.get(f'/laporan/data?start_date=2024-01-01&end_date=2024-12-31&run={next(urutan)}')
+            assert response.status_code == 200 and len(response.get_json()['table_data']) == n
+        return ukur(jalankan)
+
+
+def bench_laporan_excel(n):
+    """GET /laporan/excel satu tahun atas n pengukuran, termasuk mengalirkan seluruh body"""
+    with Lingkungan() as env:
+        env.isi_pengukuran(n)
+        def jalankan():
+            response = env.client.get('/laporan/excel?start_date=2024-01-01&end_date=2024-12-31')
+            assert response.status_code == 200
+            assert len(response.data) == int(response.headers['Content-Length'])
+            response.close()
+        return ukur(jalankan, ulang=3)
+
+
+KASUS = {
+    'knn_predict': (bench_knn_predict, [300, 3000]),
+    'lvq_fit': (bench_lvq_fit, [1000, 10000]),
+    'evaluasi_model': (bench_evaluasi_model, [100, 400]),
+    'upload_balita_pengukuran': (bench_upload_balita_pengukuran, [100, 1000]),
+    'unggah_dataset_training': (bench_unggah_dataset_training, [1000, 20000]),
+    'laporan_data': (bench_laporan_data, [1000, 10000]),
+    'laporan_excel': (bench_laporan_excel, [1000, 10000]),
+}
+
+
+def daftar_kasus(filter_nama=None):
+    """List (kunci, fungsi, n) dengan kunci seperti 'knn_predict[n=300]'"""
+    return [(f'{nama}[n={n}]', fungsi, n)
+            for nama, (fungsi, ukuran) in KASUS.items() if not filter_nama or filter_nama in nama
+            for n in ukuran]
+
+
+def muat_baseline(path=PATH_BASELINE):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def simpan_baseline(hasil, path=PATH_BASELINE):
+    """Gabungkan hasil ke baseline yang sudah ada lalu tulis ulang secara atomik"""
+    baseline = muat_baseline(path)
+    baseline.update(hasil)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write('\n')
+    os.replace(tmp, path)
+
+
+def regresi(kunci, hasil, baseline, ambang=AMBANG):
+    """Pesan regresi jika hasil lebih lambat dari ambang x baseline, None jika tidak ada baseline atau masih wajar"""
+    dasar = baseline.get(kunci)
+    if dasar is None:
+        return None
+    sekarang, lama = hasil['median'], dasar['median']
+    if sekarang > ambang * lama and sekarang - lama > MIN_SELISIH_DETIK:
+        return f'{kunci}: {sekarang * 1000:.1f}ms, baseline {lama * 1000:.1f}ms (> {ambang:g}x)'
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--filter', help='hanya kasus yang namanya mengandung teks ini')
+    parser.add_argument('--ambang', type=float, default=AMBANG, help='rasio maksimal terhadap baseline')
+    parser.add_argument('--simpan-baseline', action='store_true', help='tulis hasil ke benchmarks/baseline.json')
+    args = parser.parse_args()
+
+    baseline = muat_baseline()
+    hasil, gagal = {}, []
+    print(f"{'kasus':<40} {'median':>10} {'baseline':>10}")
+    for kunci, fungsi, n in daftar_kasus(args.filter):
+        hasil[kunci] = fungsi(n)
+        dasar = baseline.get(kunci, {}).get('median')
+        kolom_dasar = f'{dasar * 1000:>8.1f}ms' if dasar else f"{'-':>10}"
+        print(f"{kunci:<40} {hasil[kunci]['median'] * 1000:>8.1f}ms {kolom_dasar}")
+        pesan = regresi(kunci, hasil[kunci], baseline, args.ambang)
+        if pesan:
+            gagal.append(pesan)
+
+    if args.simpan_baseline:
+        simpan_baseline(hasil)
+        print(f'\nBaseline disimpan ke {PATH_BASELINE}')
+    elif gagal:
+        print('\nRegresi:\n  ' + '\n  '.join(gagal))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
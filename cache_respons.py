@@ -0,0 +1,199 @@
+"""
+Cache respons untuk halaman dan endpoint JSON yang mahal dihitung.
+
+Kunci cache = path + query string + versi data (+ isi sesi yang dirender untuk
+halaman yang menampilkan data sesi), sehingga cache tidak perlu dihapus manual: setiap
+perubahan data menaikkan versi dan otomatis menghasilkan kunci baru. Entri
+lama hilang lewat TTL atau LRU.
+
+Backend `CacheMemori` hanya berlaku per proses; `CacheSQLite` menyimpan
+entri di file SQLite sehingga dipakai bersama oleh semua worker gunicorn.
+"""
+import hashlib
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, make_response, request, session
+from werkzeug.http import is_resource_modified
+
+# Isi sesi yang ikut dirender halaman per_user: navbar menampilkan nama, foto
+# dan menu sesuai role, jadi edit profil langsung menghasilkan kunci baru
+KUNCI_SESI = ('user_id', 'role', 'name', 'photo')
+
+class CacheMemori:
+    """Cache LRU dengan TTL di memori proses"""
+
+    def __init__(self, maks=512, ttl=300):
+        self.maks = maks
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, kunci):
+        with self._lock:
+            entri = self._data.get(kunci)
+            if entri is None:
+                return None
+            if time.monotonic() - entri[0] >= self.ttl:
+                del self._data[kunci]
+                return None
+            self._data.move_to_end(kunci)
+            return entri[1]
+
+    def set(self, kunci, nilai):
+        with self._lock:
+            self._data[kunci] = (time.monotonic(), nilai)
+            self._data.move_to_end(kunci)
+            while len(self._data) > self.maks:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class CacheSQLite:
+    """Cache LRU dengan TTL di file SQLite, dipakai bersama oleh semua proses"""
+
+    def __init__(self, path, maks=512, ttl=300):
+        self.path = path
+        self.maks = maks
+        self.ttl = ttl
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS cache_respons (
+                    kunci TEXT PRIMARY KEY,
+                    nilai BLOB NOT NULL,
+                    dibuat REAL NOT NULL,
+                    dipakai REAL NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_cache_respons_dipakai ON cache_respons (dipakai)')
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        return conn
+
+    def get(self, kunci):
+        sekarang = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute('SELECT nilai, dibuat FROM cache_respons WHERE kunci = ?', (kunci,)).fetchone()
+                if row is None:
+                    return None
+                if sekarang - row[1] >= self.ttl:
+                    conn.execute('DELETE FROM cache_respons WHERE kunci = ?', (kunci,))
+                    return None
+                conn.execute('UPDATE cache_respons SET dipakai = ? WHERE kunci = ?', (sekarang, kunci))
+            return pickle.loads(row[0])
+        finally:
+            conn.close()
+
+    def set(self, kunci, nilai):
+        sekarang = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('INSERT OR REPLACE INTO cache_respons (kunci, nilai, dibuat, dipakai) VALUES (?, ?, ?, ?)',
+                             (kunci, pickle.dumps(nilai), sekarang, sekarang))
+                conn.execute('''
+                    DELETE FROM cache_respons WHERE kunci IN (
+                        SELECT kunci FROM cache_respons ORDER BY dipakai DESC LIMIT -1 OFFSET ?
+                    )
+                ''', (self.maks,))
+        finally:
+            conn.close()
+
+    def __len__(self):
+        conn = self._connect()
+        try:
+            return conn.execute('SELECT COUNT(*) FROM cache_respons').fetchone()[0]
+        finally:
+            conn.close()
+
+
+class CacheRespons:
+    """
+    Dekorator route yang menyimpan body respons 200 di backend cache dan
+    mengirim ETag/Last-Modified agar browser cukup menerima 304.
+
+    `ambil_versi(nama_versi)` harus mengembalikan (tuple versi, datetime
+    perubahan terakhir atau None) untuk nama-nama versi data yang diberikan.
+    """
+
+    def __init__(self, backend, ambil_versi):
+        self.backend = backend
+        self.ambil_versi = ambil_versi
+        self._lock = threading.Lock()
+        self.hit = 0
+        self.miss = 0
+        self.tidak_berubah = 0
+
+    def _hitung(self, nama):
+        with self._lock:
+            setattr(self, nama, getattr(self, nama) + 1)
+
+    def statistik(self):
+        """Penghitung hit/miss proses ini dan jumlah entri di backend"""
+        return {
+            'backend': type(self.backend).__name__,
+            'hit': self.hit,
+            'miss': self.miss,
+            'tidak_berubah': self.tidak_berubah,
+            'entri': len(self.backend),
+        }
+
+    def route(self, *nama_versi, per_user=False):
+        """
+        Cache route berdasarkan versi data `nama_versi`. per_user=True untuk
+        halaman HTML yang isinya bergantung pada sesi login. View dapat
+        menolak penyimpanan dengan mengatur `response.cache_control.no_store`.
+        """
+        def dekorator(f):
+            @wraps(f)
+            def decorated(*args, **kwargs):
+                # Pesan flash yang menunggu ditampilkan harus dirender dan dikonsumsi
+                if session.get('_flashes'):
+                    return f(*args, **kwargs)
+
+                versi, terakhir_diubah = self.ambil_versi(nama_versi)
+                bagian = [request.path, sorted(request.args.items(multi=True)), versi]
+                if per_user:
+                    bagian.append([session.get(nama) for nama in KUNCI_SESI])
+                kunci = hashlib.sha1(repr(bagian).encode()).hexdigest()
+
+                # Body ditentukan sepenuhnya oleh kunci, jadi kunci sekaligus menjadi ETag
+                if not is_resource_modified(request.environ, etag=kunci, last_modified=terakhir_diubah):
+                    self._hitung('tidak_berubah')
+                    return self._bungkus(Response(status=304), kunci, terakhir_diubah)
+
+                entri = self.backend.get(kunci)
+                if entri is not None:
+                    self._hitung('hit')
+                    body, mimetype = entri
+                    return self._bungkus(Response(body, mimetype=mimetype), kunci, terakhir_diubah)
+
+                self._hitung('miss')
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed or response.cache_control.no_store:
+                    return response
+                self.backend.set(kunci, (response.get_data(), response.mimetype))
+                return self._bungkus(response, kunci, terakhir_diubah)
+            return decorated
+        return dekorator
+
+    @staticmethod
+    def _bungkus(response, etag, terakhir_diubah):
+        response.set_etag(etag)
+        if terakhir_diubah is not None:
+            response.last_modified = terakhir_diubah
+        # Browser tetap wajib revalidasi karena halaman bergantung pada login
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
@@ -0,0 +1,41 @@
+"""
+Database SQLite sementara yang sudah di-init_db beserta test client dengan
+sesi admin, dipakai bersama oleh test (test/lingkungan.py) dan benchmark
+(benchmarks/suite.py).
+"""
+import os
+import shutil
+import tempfile
+
+
+class DatabaseSementara:
+    """Context manager yang mengarahkan app ke database baru di direktori sementara"""
+
+    def __init__(self, nama='test.db'):
+        self.nama = nama
+
+    def __enter__(self):
+        import app as aplikasi
+        self.aplikasi = aplikasi
+        self.tmpdir = tempfile.mkdtemp()
+        self.config_lama = {}
+        self.atur_config(DATABASE=os.path.join(self.tmpdir, self.nama))
+        aplikasi.init_db()
+        return self
+
+    def __exit__(self, *exc):
+        self.aplikasi.app.config.update(self.config_lama)
+        shutil.rmtree(self.tmpdir)
+
+    def atur_config(self, **nilai):
+        """Ubah app.config; nilai lama dikembalikan saat keluar"""
+        for kunci in nilai:
+            self.config_lama.setdefault(kunci, self.aplikasi.app.config[kunci])
+        self.aplikasi.app.config.update(nilai)
+
+    def client_admin(self):
+        client = self.aplikasi.app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = 1
+            sess['role'] = 'admin'
+        return client
@@ -0,0 +1,9 @@
+"""
+Konfigurasi gunicorn, dibaca otomatis dari direktori kerja (lihat Dockerfile).
+"""
+
+
+def post_worker_init(worker):
+    # Artefak model dimuat setelah worker siap, bukan saat app diimpor
+    from app import mulai_muat_model_awal
+    mulai_muat_model_awal()
@@ -0,0 +1,200 @@
+"""
+Job latar belakang untuk proses berat (sampling LVQ, evaluasi model).
+
+Status setiap job disimpan di tabel `job` SQLite sehingga semua worker
+gunicorn dapat membaca progres dan hasilnya, sementara eksekusinya berjalan
+di thread pool milik worker yang menerima job tersebut.
+"""
+import json
+import os
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+SKEMA_JOB = '''
+    CREATE TABLE IF NOT EXISTS job (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        jenis TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'antri'
+            CHECK (status IN ('antri', 'berjalan', 'selesai', 'gagal')),
+        progress REAL NOT NULL DEFAULT 0,
+        pesan TEXT,
+        parameter TEXT,
+        hasil TEXT,
+        dibuat_oleh INTEGER,
+        pid INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        started_at TIMESTAMP,
+        finished_at TIMESTAMP
+    )
+'''
+
+STATUS_AKTIF = ('antri', 'berjalan')
+
+
+def _pid_hidup(pid):
+    """True jika proses dengan pid tersebut masih ada"""
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobRunner:
+    """
+    Menjalankan handler yang terdaftar per jenis job di thread pool.
+
+    `connect` adalah callable yang mengembalikan koneksi sqlite3 baru (dengan
+    row_factory sqlite3.Row); `app` dipakai untuk menyediakan app context Flask
+    bagi handler yang memanggil get_db().
+    """
+    def __init__(self, connect, app=None, max_workers=2):
+        self.connect = connect
+        self.app = app
+        self.max_workers = max_workers
+        self.handlers = {}
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def register(self, jenis):
+        """Dekorator untuk mendaftarkan handler: handler(progres, **parameter) -> dict"""
+        def decorator(f):
+            self.handlers[jenis] = f
+            return f
+        return decorator
+
+    def _get_executor(self):
+        # Executor dibuat saat pertama dipakai agar tidak ada thread yang ikut
+        # di-fork oleh gunicorn dari proses master
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix='job'
+                )
+            return self._executor
+
+    def submit(self, jenis, parameter=None, user_id=None):
+        """Menambahkan job ke antrian; job aktif dengan jenis dan parameter sama dipakai ulang"""
+        if jenis not in self.handlers:
+            raise ValueError(f"Jenis job tidak dikenal: {jenis}")
+        aktif = self.aktif(jenis, parameter)
+        if aktif:
+            return aktif['id']
+        conn = self.connect()
+        try:
+            cur = conn.execute(
+                'INSERT INTO job (jenis, parameter, dibuat_oleh, pid) VALUES (?, ?, ?, ?)',
+                (jenis, json.dumps(parameter or {}, sort_keys=True), user_id, os.getpid())
+            )
+            job_id = cur.lastrowid
+            conn.commit()
+        finally:
+            conn.close()
+        self._get_executor().submit(self._jalankan, job_id, jenis, parameter or {})
+        return job_id
+
+    def _update(self, job_id, sql, params):
+        conn = self.connect()
+        try:
+            conn.execute(f'UPDATE job SET {sql} WHERE id = ?', (*params, job_id))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _jalankan(self, job_id, jenis, parameter):
+        self._update(job_id, "status = 'berjalan', started_at = datetime('now')", ())
+
+        def progres(fraksi, pesan=None):
+            self._update(job_id, 'progress = ?, pesan = COALESCE(?, pesan)',
+                         (float(fraksi), pesan))
+
+        try:
+            if self.app is not None:
+                with self.app.app_context():
+                    hasil = self.handlers[jenis](progres, **parameter)
+            else:
+                hasil = self.handlers[jenis](progres, **parameter)
+            self._update(job_id, "status = 'selesai', progress = 1, hasil = ?, "
+                                 "finished_at = datetime('now')",
+                         (json.dumps(hasil),))
+        except Exception as e:
+            traceback.print_exc()
+            self._update(job_id, "status = 'gagal', pesan = ?, finished_at = datetime('now')",
+                         (str(e),))
+
+    def _baris_ke_dict(self, row):
+        if row is None:
+            return None
+        job = dict(row)
+        job['parameter'] = json.loads(job['parameter']) if job['parameter'] else {}
+        job['hasil'] = json.loads(job['hasil']) if job['hasil'] else None
+        return job
+
+    def _tandai_yatim(self, conn, job):
+        """Job aktif yang prosesnya sudah mati (worker restart) ditandai gagal"""
+        if job['status'] in STATUS_AKTIF and not _pid_hidup(job['pid']):
+            conn.execute(
+                "UPDATE job SET status = 'gagal', pesan = ?, finished_at = datetime('now') "
+                "WHERE id = ?", ('Worker berhenti sebelum job selesai', job['id'])
+            )
+            conn.commit()
+            job['status'] = 'gagal'
+            job['pesan'] = 'Worker berhenti sebelum job selesai'
+        return job
+
+    def get(self, job_id):
+        """Status, progres dan hasil satu job sebagai dict (None jika tidak ada)"""
+        conn = self.connect()
+        try:
+            job = self._baris_ke_dict(conn.execute('SELECT * FROM job WHERE id = ?', (job_id,)).fetchone())
+            return self._tandai_yatim(conn, job) if job else None
+        finally:
+            conn.close()
+
+    def aktif(self, jenis, parameter=None):
+        """Job jenis tertentu (dan parameter sama, jika diberikan) yang masih antri/berjalan"""
+        if parameter is not None:
+            # Samakan bentuknya dengan hasil json.loads (tuple -> list, dst.)
+            parameter = json.loads(json.dumps(parameter))
+        conn = self.connect()
+        try:
+            rows = conn.execute(
+                "SELECT * FROM job WHERE jenis = ? AND status IN ('antri', 'berjalan') ORDER BY id DESC",
+                (jenis,)
+            ).fetchall()
+            for row in rows:
+                job = self._tandai_yatim(conn, self._baris_ke_dict(row))
+                if parameter is not None and job['parameter'] != parameter:
+                    continue
+                if job['status'] in STATUS_AKTIF:
+                    return job
+            return None
+        finally:
+            conn.close()
+
+    def terakhir(self, jenis):
+        """Job jenis tertentu yang paling akhir dibuat, apa pun statusnya"""
+        conn = self.connect()
+        try:
+            job = self._baris_ke_dict(conn.execute(
+                'SELECT * FROM job WHERE jenis = ? ORDER BY id DESC LIMIT 1', (jenis,)
+            ).fetchone())
+            return self._tandai_yatim(conn, job) if job else None
+        finally:
+            conn.close()
+
+    def terakhir_selesai(self, jenis):
+        """Job jenis tertentu yang paling akhir selesai dengan sukses"""
+        conn = self.connect()
+        try:
+            return self._baris_ke_dict(conn.execute(
+                "SELECT * FROM job WHERE jenis = ? AND status = 'selesai' ORDER BY finished_at DESC, id DESC LIMIT 1",
+                (jenis,)
+            ).fetchone())
+        finally:
+            conn.close()
@@ -0,0 +1,220 @@
+"""
+Instrumentasi jalur panas dan ekspor metrik format teks Prometheus.
+
+Yang diukur: durasi request per route, durasi setiap statement SQL (eksekusi
+dan fetch), durasi fit/predict model beserta ukuran batch, serta durasi
+fungsi tertentu (klasifikasi, evaluasi, render PDF).
+
+Semua pencatatan hanya berjalan jika `aktif` bernilai True (lihat
+aktifkan()); saat nonaktif setiap titik ukur hanya memeriksa satu flag dan
+koneksi database tidak dibungkus sama sekali.
+
+Histogram disimpan per proses, jadi pada gunicorn dengan beberapa worker
+setiap scrape hanya melihat angka worker yang melayaninya.
+"""
+import re
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from functools import lru_cache, wraps
+
+# Batas atas bucket histogram durasi (detik) dan ukuran batch (baris)
+BUCKET_DETIK = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BUCKET_BATCH = (1, 10, 100, 1000, 10000, 100000, 1000000)
+
+# Jumlah kombinasi label maksimal per histogram; sisanya digabung ke label 'lainnya'
+MAKS_SERI = 500
+
+# Panjang maksimal teks SQL yang dipakai sebagai label
+MAKS_PANJANG_SQL = 200
+
+aktif = False
+
+
+def aktifkan(nilai=True):
+    """Nyalakan atau matikan pencatatan metrik untuk proses ini"""
+    global aktif
+    aktif = bool(nilai)
+
+
+def _escape(nilai):
+    return str(nilai).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _angka(nilai):
+    if nilai == float('inf'):
+        return '+Inf'
+    return repr(float(nilai)) if isinstance(nilai, float) else str(nilai)
+
+
+class Histogram:
+    """Histogram Prometheus dengan label, aman dipakai dari banyak thread"""
+
+    def __init__(self, nama, bantuan, label=(), bucket=BUCKET_DETIK):
+        self.nama = nama
+        self.bantuan = bantuan
+        self.label = tuple(label)
+        self.bucket = tuple(bucket)
+        self._seri = {}
+        self._lock = threading.Lock()
+
+    def observe(self, nilai, **label):
+        kunci = tuple(str(label[nama]) for nama in self.label)
+        idx = bisect_left(self.bucket, nilai)
+        with self._lock:
+            seri = self._seri.get(kunci)
+            if seri is None:
+                if len(self._seri) >= MAKS_SERI:
+                    kunci = ('lainnya',) * len(self.label)
+                    seri = self._seri.get(kunci)
+                if seri is None:
+                    seri = self._seri[kunci] = [[0] * (len(self.bucket) + 1), 0.0]
+            seri[0][idx] += 1
+            seri[1] += nilai
+
+    def reset(self):
+        with self._lock:
+            self._seri.clear()
+
+    def render(self):
+        """Baris-baris teks Prometheus untuk histogram ini"""
+        with self._lock:
+            salinan = [(kunci, list(jumlah), total) for kunci, (jumlah, total) in self._seri.items()]
+        baris = [f'# HELP {self.nama} {self.bantuan}', f'# TYPE {self.nama} histogram']
+        for kunci, jumlah, total in sorted(salinan):
+            label = [f'{nama}="{_escape(nilai)}"' for nama, nilai in zip(self.label, kunci)]
+            kumulatif = 0
+            for batas, n in zip(self.bucket + (float('inf'),), jumlah):
+                kumulatif += n
+                label_le = ','.join(label + [f'le="{_angka(batas)}"'])
+                baris.append(f'{self.nama}_bucket{{{label_le}}} {kumulatif}')
+            label_seri = '{' + ','.join(label) + '}' if label else ''
+            baris.append(f'{self.nama}_sum{label_seri} {_angka(total)}')
+            baris.append(f'{self.nama}_count{label_seri} {kumulatif}')
+        return baris
+
+
+DURASI_REQUEST = Histogram('gizi_request_durasi_detik', 'Durasi request per route',
+                           ('route', 'metode', 'status'))
+DURASI_SQL = Histogram('gizi_sql_durasi_detik', 'Durasi statement SQL per tahap (execute/fetch)',
+                       ('query', 'tahap'))
+DURASI_MODEL = Histogram('gizi_model_durasi_detik', 'Durasi fit/predict model', ('model', 'operasi'))
+BATCH_MODEL = Histogram('gizi_model_ukuran_batch', 'Jumlah baris per panggilan fit/predict model',
+                        ('model', 'operasi'), bucket=BUCKET_BATCH)
+DURASI_FUNGSI = Histogram('gizi_fungsi_durasi_detik', 'Durasi fungsi jalur panas', ('fungsi',))
+
+SEMUA_METRIK = [DURASI_REQUEST, DURASI_SQL, DURASI_MODEL, BATCH_MODEL, DURASI_FUNGSI]
+
+
+def render():
+    """Seluruh metrik dalam format teks Prometheus (version 0.0.4)"""
+    return '\n'.join(baris for metrik in SEMUA_METRIK for baris in metrik.render()) + '\n'
+
+
+def reset():
+    for metrik in SEMUA_METRIK:
+        metrik.reset()
+
+
+def terukur(nama_fungsi):
+    """Dekorator yang mencatat durasi fungsi ke DURASI_FUNGSI saat metrik aktif"""
+    def dekorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if not aktif:
+                return f(*args, **kwargs)
+            mulai = time.perf_counter()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                DURASI_FUNGSI.observe(time.perf_counter() - mulai, fungsi=nama_fungsi)
+        return decorated
+    return dekorator
+
+
+def ukur_model(kelas, nama_model, metode=('fit', 'predict')):
+    """
+    Bungkus metode kelas model (argumen pertama = X) agar durasi dan jumlah
+    baris setiap panggilan tercatat. Aman dipanggil berulang kali.
+    """
+    for nama_metode in metode:
+        asli = getattr(kelas, nama_metode)
+        if getattr(asli, '_terukur', False):
+            continue
+
+        def bungkus(asli, operasi):
+            @wraps(asli)
+            def decorated(self, X, *args, **kwargs):
+                if not aktif:
+                    return asli(self, X, *args, **kwargs)
+                mulai = time.perf_counter()
+                try:
+                    return asli(self, X, *args, **kwargs)
+                finally:
+                    DURASI_MODEL.observe(time.perf_counter() - mulai, model=nama_model, operasi=operasi)
+                    try:
+                        BATCH_MODEL.observe(len(X), model=nama_model, operasi=operasi)
+                    except TypeError:
+                        pass
+            decorated._terukur = True
+            return decorated
+
+        setattr(kelas, nama_metode, bungkus(asli, nama_metode))
+
+
+def label_sql(sql):
+    """Teks SQL yang dinormalkan untuk label: spasi dirapatkan, daftar placeholder diringkas"""
+    sql = ' '.join(sql.split())
+    sql = re.sub(r'\?(\s*,\s*\?)+', '?, ...', sql)
+    return sql[:MAKS_PANJANG_SQL]
+
+
+class CursorTerukur(sqlite3.Cursor):
+    """Cursor sqlite3 yang mencatat durasi execute dan fetch per statement"""
+
+    _label = None
+
+    def _ukur(self, tahap, fungsi, *args):
+        mulai = time.perf_counter()
+        try:
+            return fungsi(*args)
+        finally:
+            if self._label is not None:
+                DURASI_SQL.observe(time.perf_counter() - mulai, query=self._label, tahap=tahap)
+
+    def execute(self, sql, parameters=()):
+        self._label = label_sql(sql)
+        return self._ukur('execute', super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._label = label_sql(sql)
+        return self._ukur('execute', super().executemany, sql, seq_of_parameters)
+
+    def fetchone(self):
+        return self._ukur('fetch', super().fetchone)
+
+    def fetchmany(self, *args):
+        return self._ukur('fetch', super().fetchmany, *args)
+
+    def fetchall(self):
+        return self._ukur('fetch', super().fetchall)
+
+
+class KoneksiTerukur:
+    """Mixin koneksi sqlite3 yang mengarahkan execute lewat CursorTerukur"""
+
+    def cursor(self, factory=CursorTerukur):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+@lru_cache(maxsize=None)
+def koneksi_terukur(kelas):
+    """Subkelas `kelas` (turunan sqlite3.Connection) yang mencatat durasi setiap statement SQL"""
+    return type(kelas.__name__ + 'Terukur', (KoneksiTerukur, kelas), {})
@@ -0,0 +1,49 @@
+"""indeks untuk query utama
+
+Revision ID: 3f2c1a9d7b10
+Revises: 
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2c1a9d7b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+KOLOM_BALITA = [
+    ('nik', sa.Text()),
+    ('usia_tahun', sa.Integer()),
+    ('usia_bulan', sa.Integer()),
+]
+
+INDEKS = [
+    ('idx_pengukuran_balita', 'pengukuran', ['balita_id']),
+    ('idx_pengukuran_tanggal', 'pengukuran', ['tanggal_ukur', 'balita_id']),
+    ('idx_klasifikasi_status', 'klasifikasi', ['status_gizi', 'pengukuran_id']),
+    ('idx_klasifikasi_tanggal', 'klasifikasi', ['tanggal_klasifikasi', 'status_gizi']),
+    ('idx_balita_nik', 'balita', ['nik', 'nama']),
+    ('idx_balita_nama', 'balita', ['nama']),
+]
+
+
+def upgrade():
+    # Database lama dibuat tanpa kolom nik/usia padahal kode memakainya
+    kolom_ada = {k['name'] for k in sa.inspect(op.get_bind()).get_columns('balita')}
+    with op.batch_alter_table('balita') as batch_op:
+        for nama, tipe in KOLOM_BALITA:
+            if nama not in kolom_ada:
+                batch_op.add_column(sa.Column(nama, tipe, nullable=True))
+
+    for nama, tabel, kolom in INDEKS:
+        op.create_index(nama, tabel, kolom, if_not_exists=True)
+    op.execute('ANALYZE')
+
+
+def downgrade():
+    for nama, tabel, kolom in reversed(INDEKS):
+        op.drop_index(nama, table_name=tabel, if_exists=True)
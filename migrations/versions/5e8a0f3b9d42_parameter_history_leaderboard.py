@@ -0,0 +1,37 @@
+"""leaderboard pencarian parameter dicatat di parameter_history
+
+Revision ID: 5e8a0f3b9d42
+Revises: c27d9e4a1f58
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8a0f3b9d42'
+down_revision = 'c27d9e4a1f58'
+branch_labels = None
+depends_on = None
+
+KOLOM_LEADERBOARD = [
+    ('sumber', sa.Text(), {'nullable': False, 'server_default': 'manual'}),
+    ('peringkat', sa.Integer(), {}),
+    ('cv_mean', sa.REAL(), {}),
+    ('cv_std', sa.REAL(), {}),
+]
+
+
+def upgrade():
+    kolom_ada = {k['name'] for k in sa.inspect(op.get_bind()).get_columns('parameter_history')}
+    with op.batch_alter_table('parameter_history') as batch_op:
+        for nama, tipe, opsi in KOLOM_LEADERBOARD:
+            if nama not in kolom_ada:
+                batch_op.add_column(sa.Column(nama, tipe, **{'nullable': True, **opsi}))
+
+
+def downgrade():
+    with op.batch_alter_table('parameter_history') as batch_op:
+        for nama, _, _ in reversed(KOLOM_LEADERBOARD):
+            batch_op.drop_column(nama)
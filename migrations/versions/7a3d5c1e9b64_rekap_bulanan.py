@@ -0,0 +1,157 @@
+"""rekap_bulanan dijaga trigger dan diisi dari data yang ada
+
+Revision ID: 7a3d5c1e9b64
+Revises: d61c4b8e2a07
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '7a3d5c1e9b64'
+down_revision = 'd61c4b8e2a07'
+branch_labels = None
+depends_on = None
+
+# Sama dengan SKEMA_REKAP di app.py pada saat revisi ini dibuat
+SKEMA_REKAP = [
+    '''
+    CREATE TABLE IF NOT EXISTS rekap_bulanan (
+        bulan TEXT NOT NULL,
+        tahun TEXT NOT NULL,
+        desa_id INTEGER NOT NULL DEFAULT 0,
+        status_gizi TEXT NOT NULL,
+        jumlah INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (bulan, desa_id, status_gizi)
+    ) WITHOUT ROWID
+    ''',
+    # Klasifikasi baru/terhapus menambah/mengurangi satu hitungan. Join ke pengukuran dan
+    # balita sengaja INNER: saat cascade dari hapus pengukuran/balita, baris induknya sudah
+    # hilang sehingga trigger ini tidak menghitung dua kali
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_rekap_klasifikasi_insert AFTER INSERT ON klasifikasi
+    BEGIN
+        INSERT INTO rekap_bulanan (bulan, tahun, desa_id, status_gizi, jumlah)
+        SELECT strftime('%Y-%m', p.tanggal_ukur), strftime('%Y', p.tanggal_ukur),
+               COALESCE(b.desa_id, 0), NEW.status_gizi, 1
+        FROM pengukuran p JOIN balita b ON b.id = p.balita_id
+        WHERE p.id = NEW.pengukuran_id
+        ON CONFLICT (bulan, desa_id, status_gizi) DO UPDATE SET jumlah = jumlah + excluded.jumlah;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_rekap_klasifikasi_delete AFTER DELETE ON klasifikasi
+    BEGIN
+        INSERT INTO rekap_bulanan (bulan, tahun, desa_id, status_gizi, jumlah)
+        SELECT strftime('%Y-%m', p.tanggal_ukur), strftime('%Y', p.tanggal_ukur),
+               COALESCE(b.desa_id, 0), OLD.status_gizi, -1
+        FROM pengukuran p JOIN balita b ON b.id = p.balita_id
+        WHERE p.id = OLD.pengukuran_id
+        ON CONFLICT (bulan, desa_id, status_gizi) DO UPDATE SET jumlah = jumlah + excluded.jumlah;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_rekap_klasifikasi_update
+    AFTER UPDATE OF status_gizi, pengukuran_id ON klasifikasi
+    BEGIN
+        INSERT INTO rekap_bulanan (bulan, tahun, desa_id, status_gizi, jumlah)
+        SELECT strftime('%Y-%m', p.tanggal_ukur), strftime('%Y', p.tanggal_ukur),
+               COALESCE(b.desa_id, 0), OLD.status_gizi, -1
+        FROM pengukuran p JOIN balita b ON b.id = p.balita_id
+        WHERE p.id = OLD.pengukuran_id
+        ON CONFLICT (bulan, desa_id, status_gizi) DO UPDATE SET jumlah = jumlah + excluded.jumlah;
+        INSERT INTO rekap_bulanan (bulan, tahun, desa_id, status_gizi, jumlah)
+        SELECT strftime('%Y-%m', p.tanggal_ukur), strftime('%Y', p.tanggal_ukur),
+               COALESCE(b.desa_id, 0), NEW.status_gizi, 1
+        FROM pengukuran p JOIN balita b ON b.id = p.balita_id
+        WHERE p.id = NEW.pengukuran_id
+        ON CONFLICT (bulan, desa_id, status_gizi) DO UPDATE SET jumlah = jumlah + excluded.jumlah;
+    END
+    ''',
+    # Hapus pengukuran: kurangi sebelum baris (dan klasifikasinya) hilang
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_rekap_pengukuran_delete BEFORE DELETE ON pengukuran
+    BEGIN
+        INSERT INTO rekap_bulanan (bulan, tahun, desa_id, status_gizi, jumlah)
+        SELECT strftime('%Y-%m', OLD.tanggal_ukur), strftime('%Y', OLD.tanggal_ukur),
+               COALESCE(b.desa_id, 0), k.status_gizi, -1
+        FROM klasifikasi k JOIN balita b ON b.id = OLD.balita_id
+        WHERE k.pengukuran_id = OLD.id
+        ON CONFLICT (bulan, desa_id, status_gizi) DO UPDATE SET jumlah = jumlah + excluded.jumlah;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_rekap_pengukuran_update
+    AFTER UPDATE OF tanggal_ukur, balita_id ON pengukuran
+    BEGIN
+        INSERT INTO rekap_bulanan (bulan, tahun, desa_id, status_gizi, jumlah)
+        SELECT strftime('%Y-%m', OLD.tanggal_ukur), strftime('%Y', OLD.tanggal_ukur),
+               COALESCE(b.desa_id, 0), k.status_gizi, -1
+        FROM klasifikasi k JOIN balita b ON b.id = OLD.balita_id
+        WHERE k.pengukuran_id = OLD.id
+        ON CONFLICT (bulan, desa_id, status_gizi) DO UPDATE SET jumlah = jumlah + excluded.jumlah;
+        INSERT INTO rekap_bulanan (bulan, tahun, desa_id, status_gizi, jumlah)
+        SELECT strftime('%Y-%m', NEW.tanggal_ukur), strftime('%Y', NEW.tanggal_ukur),
+               COALESCE(b.desa_id, 0), k.status_gizi, 1
+        FROM klasifikasi k JOIN balita b ON b.id = NEW.balita_id
+        WHERE k.pengukuran_id = NEW.id
+        ON CONFLICT (bulan, desa_id, status_gizi) DO UPDATE SET jumlah = jumlah + excluded.jumlah;
+    END
+    ''',
+    # Hapus balita: kurangi semua pengukurannya sekaligus sebelum cascade berjalan
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_rekap_balita_delete BEFORE DELETE ON balita
+    BEGIN
+        INSERT INTO rekap_bulanan (bulan, tahun, desa_id, status_gizi, jumlah)
+        SELECT strftime('%Y-%m', p.tanggal_ukur), strftime('%Y', p.tanggal_ukur),
+               COALESCE(OLD.desa_id, 0), k.status_gizi, -COUNT(*)
+        FROM pengukuran p JOIN klasifikasi k ON k.pengukuran_id = p.id
+        WHERE p.balita_id = OLD.id
+        GROUP BY 1, 2, 4
+        ON CONFLICT (bulan, desa_id, status_gizi) DO UPDATE SET jumlah = jumlah + excluded.jumlah;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_rekap_balita_desa AFTER UPDATE OF desa_id ON balita
+    WHEN COALESCE(OLD.desa_id, 0) != COALESCE(NEW.desa_id, 0)
+    BEGIN
+        INSERT INTO rekap_bulanan (bulan, tahun, desa_id, status_gizi, jumlah)
+        SELECT strftime('%Y-%m', p.tanggal_ukur), strftime('%Y', p.tanggal_ukur),
+               desa.id, k.status_gizi, desa.arah * COUNT(*)
+        FROM pengukuran p JOIN klasifikasi k ON k.pengukuran_id = p.id
+        JOIN (SELECT COALESCE(OLD.desa_id, 0) AS id, -1 AS arah
+              UNION ALL SELECT COALESCE(NEW.desa_id, 0), 1) desa
+        WHERE p.balita_id = NEW.id
+        GROUP BY 1, 2, 3, 4
+        ON CONFLICT (bulan, desa_id, status_gizi) DO UPDATE SET jumlah = jumlah + excluded.jumlah;
+    END
+    ''',
+]
+
+
+def upgrade():
+    for ddl in SKEMA_REKAP:
+        op.execute(ddl)
+    # Isi awal dari klasifikasi yang sudah ada; database yang sudah diisi app tidak disentuh
+    op.execute('''
+        INSERT INTO rekap_bulanan (bulan, tahun, desa_id, status_gizi, jumlah)
+        SELECT strftime('%Y-%m', p.tanggal_ukur), strftime('%Y', p.tanggal_ukur),
+               COALESCE(b.desa_id, 0), k.status_gizi, COUNT(*)
+        FROM pengukuran p
+        JOIN klasifikasi k ON k.pengukuran_id = p.id
+        JOIN balita b ON b.id = p.balita_id
+        WHERE NOT EXISTS (SELECT 1 FROM rekap_bulanan)
+        GROUP BY 1, 2, 3, 4
+    ''')
+
+
+def downgrade():
+    op.execute('DROP TRIGGER IF EXISTS trg_rekap_balita_desa')
+    op.execute('DROP TRIGGER IF EXISTS trg_rekap_balita_delete')
+    op.execute('DROP TRIGGER IF EXISTS trg_rekap_pengukuran_update')
+    op.execute('DROP TRIGGER IF EXISTS trg_rekap_pengukuran_delete')
+    op.execute('DROP TRIGGER IF EXISTS trg_rekap_klasifikasi_update')
+    op.execute('DROP TRIGGER IF EXISTS trg_rekap_klasifikasi_delete')
+    op.execute('DROP TRIGGER IF EXISTS trg_rekap_klasifikasi_insert')
+    op.execute('DROP TABLE IF EXISTS rekap_bulanan')
@@ -0,0 +1,28 @@
+"""indeks keyset (tanggal_ukur, id) untuk daftar pengukuran
+
+Revision ID: 8b41e07c5d23
+Revises: 3f2c1a9d7b10
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8b41e07c5d23'
+down_revision = '3f2c1a9d7b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # id ikut di indeks agar ORDER BY tanggal_ukur DESC, id DESC tidak perlu sort tambahan
+    op.drop_index('idx_pengukuran_tanggal', table_name='pengukuran', if_exists=True)
+    op.create_index('idx_pengukuran_tanggal_id', 'pengukuran', ['tanggal_ukur', 'id', 'balita_id'],
+                    if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('idx_pengukuran_tanggal_id', table_name='pengukuran', if_exists=True)
+    op.create_index('idx_pengukuran_tanggal', 'pengukuran', ['tanggal_ukur', 'balita_id'],
+                    if_not_exists=True)
@@ -0,0 +1,73 @@
+"""indeks full-text balita_fts beserta trigger sinkronnya
+
+Revision ID: 9c2e6f0a4d18
+Revises: 7a3d5c1e9b64
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c2e6f0a4d18'
+down_revision = '7a3d5c1e9b64'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+# Sama dengan SKEMA_FTS di app.py pada saat revisi ini dibuat
+SKEMA_FTS = [
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS balita_fts USING fts5(
+        nama, nama_ortu, nik,
+        content='balita', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_balita_fts_insert AFTER INSERT ON balita
+    BEGIN
+        INSERT INTO balita_fts (rowid, nama, nama_ortu, nik)
+        VALUES (NEW.id, NEW.nama, NEW.nama_ortu, NEW.nik);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_balita_fts_delete AFTER DELETE ON balita
+    BEGIN
+        INSERT INTO balita_fts (balita_fts, rowid, nama, nama_ortu, nik)
+        VALUES ('delete', OLD.id, OLD.nama, OLD.nama_ortu, OLD.nik);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_balita_fts_update AFTER UPDATE OF nama, nama_ortu, nik ON balita
+    BEGIN
+        INSERT INTO balita_fts (balita_fts, rowid, nama, nama_ortu, nik)
+        VALUES ('delete', OLD.id, OLD.nama, OLD.nama_ortu, OLD.nik);
+        INSERT INTO balita_fts (rowid, nama, nama_ortu, nik)
+        VALUES (NEW.id, NEW.nama, NEW.nama_ortu, NEW.nik);
+    END
+    ''',
+]
+
+
+def upgrade():
+    # Sama seperti migrasi_fts: SQLite tanpa FTS5 tetap jalan, pencarian memakai LIKE
+    try:
+        op.execute(SKEMA_FTS[0])
+    except sa.exc.OperationalError as e:
+        logger.warning('FTS5 tidak tersedia, balita_fts dilewati: %s', e)
+        return
+    for ddl in SKEMA_FTS[1:]:
+        op.execute(ddl)
+    op.execute("INSERT INTO balita_fts (balita_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    op.execute('DROP TRIGGER IF EXISTS trg_balita_fts_update')
+    op.execute('DROP TRIGGER IF EXISTS trg_balita_fts_delete')
+    op.execute('DROP TRIGGER IF EXISTS trg_balita_fts_insert')
+    op.execute('DROP TABLE IF EXISTS balita_fts')
@@ -0,0 +1,55 @@
+"""versi_data beserta trigger yang menaikkan versi 'data'
+
+Revision ID: b5f8d2a7c391
+Revises: 9c2e6f0a4d18
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5f8d2a7c391'
+down_revision = '9c2e6f0a4d18'
+branch_labels = None
+depends_on = None
+
+# Sama dengan versi_data di SKEMA_TAMBAHAN dan SKEMA_VERSI_DATA di app.py
+# pada saat revisi ini dibuat
+TRIGGER_VERSI_DATA = [
+    ('balita_insert', 'INSERT', 'balita'),
+    ('balita_update', 'UPDATE', 'balita'),
+    ('balita_delete', 'DELETE', 'balita'),
+    ('pengukuran_insert', 'INSERT', 'pengukuran'),
+    ('pengukuran_update', 'UPDATE', 'pengukuran'),
+    ('pengukuran_delete', 'DELETE', 'pengukuran'),
+    ('klasifikasi_insert', 'INSERT', 'klasifikasi'),
+    # Reklasifikasi yang hanya menandai versi_model bukan perubahan data
+    ('klasifikasi_update_data', 'UPDATE OF pengukuran_id, status_gizi, tanggal_klasifikasi', 'klasifikasi'),
+    ('klasifikasi_delete', 'DELETE', 'klasifikasi'),
+]
+
+
+def upgrade():
+    op.execute('''
+    CREATE TABLE IF NOT EXISTS versi_data (
+        nama TEXT PRIMARY KEY,
+        versi INTEGER NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    op.execute('DROP TRIGGER IF EXISTS trg_versi_data_klasifikasi_update')
+    for nama, kejadian, tabel in TRIGGER_VERSI_DATA:
+        op.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS trg_versi_data_{nama} AFTER {kejadian} ON {tabel}
+    BEGIN
+        INSERT INTO versi_data (nama, versi, updated_at) VALUES ('data', 1, datetime('now'))
+        ON CONFLICT(nama) DO UPDATE SET versi = versi + 1, updated_at = datetime('now');
+    END
+    ''')
+
+
+def downgrade():
+    for nama, _, _ in reversed(TRIGGER_VERSI_DATA):
+        op.execute(f'DROP TRIGGER IF EXISTS trg_versi_data_{nama}')
+    op.execute('DROP TABLE IF EXISTS versi_data')
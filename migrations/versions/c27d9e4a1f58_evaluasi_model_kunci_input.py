@@ -0,0 +1,40 @@
+"""hasil evaluasi model disimpan per hash input
+
+Revision ID: c27d9e4a1f58
+Revises: 8b41e07c5d23
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c27d9e4a1f58'
+down_revision = '8b41e07c5d23'
+branch_labels = None
+depends_on = None
+
+KOLOM_EVALUASI = [
+    ('kunci_input', sa.Text()),
+    ('nilai_k', sa.Integer()),
+    ('bobot', sa.Text()),
+    ('hasil', sa.Text()),
+]
+
+
+def upgrade():
+    kolom_ada = {k['name'] for k in sa.inspect(op.get_bind()).get_columns('evaluasi_model')}
+    with op.batch_alter_table('evaluasi_model') as batch_op:
+        for nama, tipe in KOLOM_EVALUASI:
+            if nama not in kolom_ada:
+                batch_op.add_column(sa.Column(nama, tipe, nullable=True))
+    op.create_index('idx_evaluasi_model_kunci', 'evaluasi_model', ['kunci_input'], unique=True,
+                    if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('idx_evaluasi_model_kunci', table_name='evaluasi_model', if_exists=True)
+    with op.batch_alter_table('evaluasi_model') as batch_op:
+        for nama, _ in reversed(KOLOM_EVALUASI):
+            batch_op.drop_column(nama)
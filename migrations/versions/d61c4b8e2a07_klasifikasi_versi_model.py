@@ -0,0 +1,33 @@
+"""versi model yang menghasilkan status_gizi di klasifikasi
+
+Revision ID: d61c4b8e2a07
+Revises: 5e8a0f3b9d42
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd61c4b8e2a07'
+down_revision = '5e8a0f3b9d42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # NULL = diklasifikasi sebelum versi model dicatat, dianggap usang oleh reklasifikasi
+    kolom_ada = {k['name'] for k in sa.inspect(op.get_bind()).get_columns('klasifikasi')}
+    if 'versi_model' not in kolom_ada:
+        with op.batch_alter_table('klasifikasi') as batch_op:
+            batch_op.add_column(sa.Column('versi_model', sa.Integer(), nullable=True))
+    # Jumlah klasifikasi usang di halaman parameter dihitung lewat indeks ini
+    op.create_index('idx_klasifikasi_versi_model', 'klasifikasi', ['versi_model', 'pengukuran_id'],
+                    if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('idx_klasifikasi_versi_model', table_name='klasifikasi', if_exists=True)
+    with op.batch_alter_table('klasifikasi') as batch_op:
+        batch_op.drop_column('versi_model')
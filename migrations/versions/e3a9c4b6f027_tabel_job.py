@@ -0,0 +1,40 @@
+"""tabel job untuk status job latar belakang
+
+Revision ID: e3a9c4b6f027
+Revises: b5f8d2a7c391
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3a9c4b6f027'
+down_revision = 'b5f8d2a7c391'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Sama dengan SKEMA_JOB di jobs.py pada saat revisi ini dibuat
+    op.execute('''
+    CREATE TABLE IF NOT EXISTS job (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        jenis TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'antri'
+            CHECK (status IN ('antri', 'berjalan', 'selesai', 'gagal')),
+        progress REAL NOT NULL DEFAULT 0,
+        pesan TEXT,
+        parameter TEXT,
+        hasil TEXT,
+        dibuat_oleh INTEGER,
+        pid INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        started_at TIMESTAMP,
+        finished_at TIMESTAMP
+    )
+    ''')
+
+
+def downgrade():
+    op.execute('DROP TABLE IF EXISTS job')
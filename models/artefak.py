@@ -0,0 +1,105 @@
+"""
+Artefak model ter-fit di disk beserta manifest versinya.
+
+Setiap jenis model (mis. 'knn', 'lvq') punya satu manifest `<jenis>.json`
+yang menunjuk ke file .npz aktif. File artefak dan manifest ditulis ke file
+sementara lalu dipindah dengan os.replace, sehingga proses lain selalu
+membaca versi lama atau versi baru secara utuh.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+from datetime import datetime, timezone
+
+import numpy as np
+
+
+def hash_data(X, y):
+    """sha256 data training (fitur float64 dan label) untuk dicatat di manifest"""
+    h = hashlib.sha256(np.ascontiguousarray(X, dtype=np.float64).tobytes())
+    h.update('\0'.join(map(str, y)).encode())
+    return h.hexdigest()
+
+
+def _tulis_atomik(direktori, nama, tulis):
+    fd, tmp = tempfile.mkstemp(dir=direktori, prefix=f'.{nama}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            tulis(f)
+        os.replace(tmp, os.path.join(direktori, nama))
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def baca_manifest(direktori, jenis):
+    """Isi manifest jenis model, None jika belum pernah diterbitkan atau rusak"""
+    try:
+        with open(os.path.join(direktori, f'{jenis}.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _versi_file(nama, jenis):
+    """Nomor versi dari nama file `<jenis>_v<versi>.npz`, None jika bukan artefak jenis ini"""
+    awalan = f'{jenis}_v'
+    if nama.startswith(awalan) and nama.endswith('.npz') and nama[len(awalan):-4].isdigit():
+        return int(nama[len(awalan):-4])
+    return None
+
+
+def terbitkan(direktori, jenis, model, versi, **info):
+    """
+    Simpan `model` (punya method simpan()) sebagai artefak versi `versi`,
+    arahkan manifest ke file tersebut lalu hapus artefak versi yang lebih lama.
+    `info` ikut dicatat di manifest dan metadata artefak.
+
+    Jika manifest sudah menunjuk versi yang lebih baru, tidak ada yang ditulis
+    dan hasilnya None; artefak versi yang lebih baru tidak pernah dihapus.
+    """
+    os.makedirs(direktori, exist_ok=True)
+    aktif = baca_manifest(direktori, jenis)
+    if aktif is not None and isinstance(aktif.get('versi'), int) and aktif['versi'] > versi:
+        return None
+
+    nama_file = f'{jenis}_v{versi}.npz'
+    _tulis_atomik(direktori, nama_file, lambda f: model.simpan(f, versi=versi, **info))
+
+    manifest = {
+        'jenis': jenis,
+        'versi': versi,
+        'file': nama_file,
+        'dibuat': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        **info,
+    }
+    _tulis_atomik(direktori, f'{jenis}.json', lambda f: f.write(json.dumps(manifest, indent=2).encode()))
+
+    for nama in os.listdir(direktori):
+        versi_file = _versi_file(nama, jenis)
+        if versi_file is not None and versi_file < versi:
+            try:
+                os.remove(os.path.join(direktori, nama))
+            except OSError:
+                pass
+    return manifest
+
+
+def muat(direktori, jenis, kelas, versi=None, **cocok):
+    """
+    (manifest, model) dari artefak yang sedang aktif, dimuat dengan
+    kelas.muat(). None jika belum ada, versinya bukan `versi` (jika
+    diberikan), isi manifest tidak sama dengan `cocok` (mis. hash_data, k)
+    atau filenya tidak bisa dibaca.
+    """
+    manifest = baca_manifest(direktori, jenis)
+    if manifest is None or (versi is not None and manifest.get('versi') != versi):
+        return None
+    if any(manifest.get(kunci) != nilai for kunci, nilai in cocok.items()):
+        return None
+    try:
+        return manifest, kelas.muat(os.path.join(direktori, manifest['file']))
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        return None
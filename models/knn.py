@@ -1,76 +1,193 @@
+import json
+
 import numpy as np
 from sklearn.base import BaseEstimator, ClassifierMixin
 from sklearn.preprocessing import MinMaxScaler
+from sklearn.neighbors import KDTree, BallTree
 from copy import deepcopy
 
+# Batas memori (byte) untuk matriks selisih satu blok query saat prediksi
+MAX_BLOK_BYTES = 32 * 1024 * 1024
+
+# Jumlah data training minimal sebelum algorithm='auto' membangun KD-tree saat fit
+AMBANG_TREE = 100
+
+# Dengan algorithm='auto', prediksi tetap memakai brute force selama
+# n_train * n_query tidak melebihi nilai ini walaupun tree tersedia.
+# Dari benchmarks/knn_backend.py: satu query lebih cepat dengan brute force
+# sampai ~5.000 baris training, batch besar sudah unggul dengan tree sejak puluhan baris.
+AMBANG_BRUTE = 5000
+
+TREE_CLASSES = {'kd_tree': KDTree, 'ball_tree': BallTree}
+
 class KNN(BaseEstimator, ClassifierMixin):
     """
     K-Nearest Neighbors classifier dengan bobot.
     Mengimplementasikan scikit-learn estimator interface.
     """
-    def __init__(self, k=3, bobot=None):
+    def __init__(self, k=3, bobot=None, batch_size=None, algorithm='auto', leaf_size=40):
         # Store parameters exactly as passed
         self.k = k
         self.bobot = bobot
-        
+        self.batch_size = batch_size
+        self.algorithm = algorithm
+        self.leaf_size = leaf_size
+
     def _get_bobot(self):
         """Helper method untuk mendapatkan bobot dalam format numpy array"""
         if self.bobot is None:
             return np.ones(3)
         return np.array(self.bobot)
-        
+
+    def _get_weights(self, n_features):
+        """Bobot dipotong/di-pad (nilai 1) agar sesuai dengan jumlah fitur"""
+        weights = np.asarray(self.bobot_[:n_features], dtype=float)
+        if len(weights) < n_features:
+            weights = np.pad(weights, (0, n_features - len(weights)),
+                             'constant', constant_values=1)
+        return weights
+
     def fit(self, X, y):
         """Fit model dengan data training"""
+        X = np.asarray(X, dtype=float)
         # Initialize attributes that aren't parameters
         self.scaler_ = MinMaxScaler()
         self.X_train_ = self.scaler_.fit_transform(X)
         self.y_train_ = np.array(y)
+        self._siapkan()
+        return self
+
+    def _siapkan(self):
+        """State turunan dari X_train_ dan y_train_: kode label, bobot dan indeks tree"""
+        # Label dikodekan ke integer sekali saja agar voting tidak perlu np.unique per baris
+        self.classes_, self.y_kode_ = np.unique(self.y_train_, return_inverse=True)
         # Initialize bobot array
         self.bobot_ = self._get_bobot()
-        return self
-        
+        self.weights_ = self._get_weights(self.X_train_.shape[1])
+        self.algorithm_ = self._pilih_algorithm(len(self.X_train_))
+        self.tree_ = None
+        if self.algorithm_ != 'brute':
+            # Bobot "dipanggang" ke ruang fitur: jarak Euclid biasa di ruang ini
+            # sama dengan jarak berbobot, sehingga indeks tree tetap benar
+            self.scale_bobot_ = np.sqrt(self.weights_)
+            self.tree_ = TREE_CLASSES[self.algorithm_](
+                self.X_train_ * self.scale_bobot_, leaf_size=self.leaf_size
+            )
+
+    def _pilih_algorithm(self, n_train):
+        """Tentukan backend pencarian tetangga: brute, kd_tree atau ball_tree"""
+        if self.algorithm == 'auto':
+            return 'kd_tree' if n_train >= AMBANG_TREE else 'brute'
+        if self.algorithm != 'brute' and self.algorithm not in TREE_CLASSES:
+            raise ValueError(f"Algoritma tidak dikenal: {self.algorithm}")
+        return self.algorithm
+
+    def _pakai_tree(self, n_query):
+        """Apakah prediksi untuk n_query baris memakai tree (hanya 'auto' yang menimbang ukuran batch)"""
+        if self.tree_ is None:
+            return False
+        return self.algorithm != 'auto' or len(self.X_train_) * n_query > AMBANG_BRUTE
+
+    def _ukuran_blok(self, pakai_tree=False):
+        """Jumlah query per blok sehingga matriks selisih tetap di bawah MAX_BLOK_BYTES"""
+        if self.batch_size:
+            return int(self.batch_size)
+        if pakai_tree:
+            return 10000
+        n_train, n_features = self.X_train_.shape
+        return max(1, MAX_BLOK_BYTES // max(1, n_train * n_features * 8))
+
+    def _jarak_blok(self, X_blok):
+        """Kuadrat jarak berbobot antara satu blok query dan seluruh data training"""
+        diff = X_blok[:, None, :] - self.X_train_[None, :, :]
+        np.square(diff, out=diff)
+        # sqrt tidak diperlukan karena urutan tetangga tidak berubah
+        return diff @ self.weights_
+
+    def _tetangga_blok(self, X_blok, pakai_tree=False):
+        """Indeks k tetangga terdekat untuk setiap baris dalam blok"""
+        if pakai_tree:
+            k = min(self.k, len(self.X_train_))
+            return self.tree_.query(X_blok * self.scale_bobot_, k=k, return_distance=False)
+        distances = self._jarak_blok(X_blok)
+        n_train = distances.shape[1]
+        k = min(self.k, n_train)
+        if k < n_train:
+            # Seleksi parsial O(n) alih-alih sorting penuh
+            return np.argpartition(distances, k - 1, axis=1)[:, :k]
+        return np.broadcast_to(np.arange(n_train), distances.shape)
+
+    def _voting(self, idx_knn):
+        """Voting mayoritas untuk semua baris sekaligus, seri dimenangkan kelas terkecil"""
+        n_query = idx_knn.shape[0]
+        n_kelas = len(self.classes_)
+        kode = self.y_kode_[idx_knn] + (np.arange(n_query) * n_kelas)[:, None]
+        counts = np.bincount(kode.ravel(), minlength=n_query * n_kelas)
+        return np.argmax(counts.reshape(n_query, n_kelas), axis=1)
+
     def predict(self, X):
-        """Prediksi kelas untuk sampel X"""
+        """Prediksi kelas untuk sampel X (diproses per blok query)"""
         check_is_fitted = getattr(BaseEstimator, "_check_is_fitted", None)
         if check_is_fitted is not None:
             check_is_fitted(self)
         else:
             if not hasattr(self, 'X_train_'):
                 raise ValueError("Model belum di-fit dengan data training")
-            
+
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
         X_scaled = self.scaler_.transform(X)
-        predictions = []
-        
-        for x in X_scaled:
-            # Pastikan bobot sesuai dengan jumlah fitur
-            weights = self.bobot_[:X.shape[1]]
-            if len(weights) < X.shape[1]:
-                weights = np.pad(weights, (0, X.shape[1] - len(weights)), 
-                               'constant', constant_values=1)
-                
-            # Hitung jarak dengan bobot
-            distances = np.sqrt(np.sum(weights * (self.X_train_ - x) ** 2, axis=1))
-            
-            # Ambil k tetangga terdekat
-            idx_knn = np.argsort(distances)[:self.k]
-            labels_knn = self.y_train_[idx_knn]
-            
-            # Voting mayoritas
-            unique, counts = np.unique(labels_knn, return_counts=True)
-            predictions.append(unique[np.argmax(counts)])
-            
-        return np.array(predictions)
-        
+        predictions = np.empty(len(X_scaled), dtype=self.classes_.dtype)
+
+        pakai_tree = self._pakai_tree(len(X_scaled))
+        blok = self._ukuran_blok(pakai_tree)
+        for start in range(0, len(X_scaled), blok):
+            idx_knn = self._tetangga_blok(X_scaled[start:start + blok], pakai_tree)
+            predictions[start:start + blok] = self.classes_[self._voting(idx_knn)]
+
+        return predictions
+
+    def simpan(self, file, **metadata):
+        """
+        Simpan state hasil fit ke `file` sebagai .npz tanpa pickle: data
+        training terskala, label (sebagai teks beserta dtype aslinya), rentang
+        scaler, k, bobot dan `metadata` (harus bisa di-JSON). Indeks tree
+        dibangun ulang saat dimuat.
+        """
+        np.savez(file, X_train=self.X_train_, y_train=self.y_train_.astype(str),
+                 dtype_label=self.y_train_.dtype.str,
+                 data_min=self.scaler_.data_min_, data_max=self.scaler_.data_max_,
+                 k=self.k, bobot=self.bobot_, algorithm=self.algorithm, leaf_size=self.leaf_size,
+                 batch_size=self.batch_size or 0, metadata=json.dumps(metadata))
+
+    @classmethod
+    def muat(cls, file):
+        """Model siap predict dari file hasil simpan(); metadata tersedia di `metadata_`"""
+        with np.load(file, allow_pickle=False) as data:
+            model = cls(k=int(data['k']), bobot=data['bobot'].tolist(), batch_size=int(data['batch_size']) or None,
+                        algorithm=str(data['algorithm']), leaf_size=int(data['leaf_size']))
+            # Scaler yang di-fit pada (min, max) menghasilkan transformasi yang sama persis
+            model.scaler_ = MinMaxScaler().fit(np.vstack([data['data_min'], data['data_max']]))
+            model.X_train_ = data['X_train']
+            model.y_train_ = data['y_train']
+            if 'dtype_label' in data.files:
+                model.y_train_ = model.y_train_.astype(str(data['dtype_label']))
+            model.metadata_ = json.loads(str(data['metadata']))
+        model._siapkan()
+        return model
+
     def score(self, X, y):
         """Implementasi score untuk scikit-learn compatibility"""
         return np.mean(self.predict(X) == y)
-        
+
     def get_params(self, deep=True):
         """Get parameters for this estimator."""
-        return {'k': self.k, 'bobot': self.bobot}
-        
+        return {'k': self.k, 'bobot': self.bobot, 'batch_size': self.batch_size,
+                'algorithm': self.algorithm, 'leaf_size': self.leaf_size}
+
     def set_params(self, **parameters):
         """Set the parameters of this estimator."""
         for parameter, value in parameters.items():
             setattr(self, parameter, value)
-        return self
\ No newline at end of file
+        return self
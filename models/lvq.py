@@ -1,38 +1,120 @@
+import json
+import time
 import numpy as np
 from sklearn.preprocessing import MinMaxScaler
 
 class LVQ:
-    def __init__(self, n_prototypes_per_class=1, learning_rate=0.1, n_epochs=100):
+    """
+    Learning Vector Quantization (LVQ1).
+    batch_size=None memakai update online per sampel (perilaku awal);
+    batch_size > 0 memakai minibatch LVQ yang memproses satu blok sampel sekaligus.
+    """
+    def __init__(self, n_prototypes_per_class=1, learning_rate=0.1, n_epochs=100,
+                 batch_size=None, decay=0.0, tol=None, random_state=None):
         self.n_prototypes_per_class = n_prototypes_per_class
         self.learning_rate = learning_rate
         self.n_epochs = n_epochs
+        self.batch_size = batch_size
+        # Learning rate epoch ke-t: learning_rate / (1 + decay * t)
+        self.decay = decay
+        # Berhenti lebih awal jika pergeseran prototipe maksimum dalam satu epoch < tol
+        self.tol = tol
+        self.random_state = random_state
         self.scaler = MinMaxScaler()
 
     def fit(self, X, y):
+        mulai = time.perf_counter()
+        rng = np.random.default_rng(self.random_state)
         X = self.scaler.fit_transform(X)
+        y = np.asarray(y)
         classes = np.unique(y)
         # Inisialisasi prototipe: pilih acak dari data tiap kelas
         self.prototypes = []
         self.prototype_labels = []
         for cls in classes:
             idx = np.where(y == cls)[0]
-            chosen_idx = np.random.choice(idx, self.n_prototypes_per_class, replace=False)
+            chosen_idx = rng.choice(idx, self.n_prototypes_per_class, replace=False)
             self.prototypes.extend(X[chosen_idx])
             self.prototype_labels.extend([cls] * self.n_prototypes_per_class)
         self.prototypes = np.array(self.prototypes)
         self.prototype_labels = np.array(self.prototype_labels)
         # Training LVQ
+        self.n_epochs_ = 0
         for epoch in range(self.n_epochs):
-            for xi, yi in zip(X, y):
-                # Cari prototipe terdekat
-                dists = np.linalg.norm(self.prototypes - xi, axis=1)
-                j = np.argmin(dists)
-                # Update
-                if self.prototype_labels[j] == yi:
-                    self.prototypes[j] += self.learning_rate * (xi - self.prototypes[j])
-                else:
-                    self.prototypes[j] -= self.learning_rate * (xi - self.prototypes[j])
+            lr = self.learning_rate / (1.0 + self.decay * epoch)
+            sebelum = self.prototypes.copy()
+            if self.batch_size:
+                self._epoch_minibatch(X, y, lr, rng)
+            else:
+                self._epoch_online(X, y, lr)
+            self.n_epochs_ = epoch + 1
+            if self.tol is not None and np.max(np.abs(self.prototypes - sebelum)) < self.tol:
+                break
+        self.fit_time_ = time.perf_counter() - mulai
+        return self
+
+    def _epoch_online(self, X, y, lr):
+        for xi, yi in zip(X, y):
+            # Cari prototipe terdekat
+            dists = np.linalg.norm(self.prototypes - xi, axis=1)
+            j = np.argmin(dists)
+            # Update
+            if self.prototype_labels[j] == yi:
+                self.prototypes[j] += lr * (xi - self.prototypes[j])
+            else:
+                self.prototypes[j] -= lr * (xi - self.prototypes[j])
+
+    def _epoch_minibatch(self, X, y, lr, rng):
+        n_protos, n_features = self.prototypes.shape
+        urutan = rng.permutation(len(X))
+        for start in range(0, len(X), self.batch_size):
+            idx = urutan[start:start + self.batch_size]
+            X_blok, y_blok = X[idx], y[idx]
+            # Prototipe terdekat untuk seluruh blok sekaligus; |x|^2 tidak
+            # memengaruhi argmin sehingga cukup |w|^2 - 2 x.w
+            norm_protos = np.einsum('pf,pf->p', self.prototypes, self.prototypes)
+            j = np.argmin(norm_protos - 2.0 * X_blok @ self.prototypes.T, axis=1)
+            # +1 menarik prototipe berlabel sama, -1 mendorong prototipe berlabel beda
+            arah = np.where(self.prototype_labels[j] == y_blok, 1.0, -1.0)
+            # Rata-rata update LVQ1 per prototipe: sum(arah * (x - w_j)) / n_j
+            pemilih = np.zeros((len(idx), n_protos))
+            pemilih[np.arange(len(idx)), j] = arah
+            sum_arah_x = pemilih.T @ X_blok
+            sum_arah = pemilih.sum(axis=0)
+            jumlah = np.bincount(j, minlength=n_protos)
+            aktif = jumlah > 0
+            self.prototypes[aktif] += lr * (
+                sum_arah_x[aktif] - sum_arah[aktif, None] * self.prototypes[aktif]
+            ) / jumlah[aktif, None]
+
+    def simpan(self, file, **metadata):
+        """
+        Simpan prototipe (skala terlatih), label (sebagai teks beserta dtype
+        aslinya), rentang scaler dan hyperparameter ke .npz tanpa pickle
+        """
+        parameter = {
+            'n_prototypes_per_class': self.n_prototypes_per_class, 'learning_rate': self.learning_rate,
+            'n_epochs': self.n_epochs, 'batch_size': self.batch_size, 'decay': self.decay,
+            'tol': self.tol, 'random_state': self.random_state,
+        }
+        np.savez(file, prototypes=self.prototypes, prototype_labels=self.prototype_labels.astype(str),
+                 dtype_label=self.prototype_labels.dtype.str,
+                 data_min=self.scaler.data_min_, data_max=self.scaler.data_max_,
+                 parameter=json.dumps(parameter), metadata=json.dumps(metadata))
+
+    @classmethod
+    def muat(cls, file):
+        """LVQ ter-fit dari file hasil simpan(); metadata tersedia di `metadata_`"""
+        with np.load(file, allow_pickle=False) as data:
+            model = cls(**json.loads(str(data['parameter'])))
+            model.scaler.fit(np.vstack([data['data_min'], data['data_max']]))
+            model.prototypes = data['prototypes']
+            model.prototype_labels = data['prototype_labels']
+            if 'dtype_label' in data.files:
+                model.prototype_labels = model.prototype_labels.astype(str(data['dtype_label']))
+            model.metadata_ = json.loads(str(data['metadata']))
+        return model
 
     def get_prototypes(self):
         # Prototipe dalam skala asli
-        return self.scaler.inverse_transform(self.prototypes), self.prototype_labels
\ No newline at end of file
+        return self.scaler.inverse_transform(self.prototypes), self.prototype_labels
@@ -0,0 +1,151 @@
+import itertools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.model_selection import StratifiedKFold
+from sklearn.preprocessing import MinMaxScaler
+
+# Batas memori (byte) tensor selisih satu fold; di atas ini pencarian ditolak
+MAX_FOLD_BYTES = 256 * 1024 * 1024
+
+
+def siapkan_fold(X, y, konfigurasi_cv):
+    """
+    Hitung sekali per fold kuadrat selisih fitur (sudah diskalakan seperti
+    KNN.fit) antara setiap data uji dan data latih, berbentuk
+    (n_uji, n_latih, n_fitur). Jarak berbobot kandidat mana pun cukup
+    `selisih @ bobot`.
+    """
+    X = np.asarray(X, dtype=float)
+    kelas, y_kode = np.unique(np.asarray(y), return_inverse=True)
+    folds = []
+    for idx_latih, idx_uji in StratifiedKFold(**konfigurasi_cv).split(X, y_kode):
+        scaler = MinMaxScaler()
+        X_latih = scaler.fit_transform(X[idx_latih])
+        X_uji = scaler.transform(X[idx_uji])
+        ukuran = len(idx_uji) * len(idx_latih) * X.shape[1] * 8
+        if ukuran > MAX_FOLD_BYTES:
+            raise ValueError(f"Data terlalu besar untuk pencarian parameter ({ukuran // 2**20} MB per fold)")
+        selisih = X_uji[:, None, :] - X_latih[None, :, :]
+        np.square(selisih, out=selisih)
+        folds.append({
+            'selisih': selisih,
+            'y_latih': y_kode[idx_latih],
+            'y_uji': y_kode[idx_uji],
+            'n_kelas': len(kelas),
+        })
+    return folds
+
+
+def skor_fold(fold, kandidat_bobot, daftar_k):
+    """
+    Akurasi satu fold untuk setiap (bobot, k), berbentuk (n_bobot, n_k).
+    Semua nilai k dinilai dari satu pengurutan tetangga per bobot; voting
+    seri dimenangkan kelas terkecil seperti KNN._voting.
+    """
+    selisih, y_latih, y_uji = fold['selisih'], fold['y_latih'], fold['y_uji']
+    n_latih = selisih.shape[1]
+    k_efektif = np.minimum(np.asarray(daftar_k), n_latih)
+    k_maks = int(k_efektif.max())
+    satu_hot = np.eye(fold['n_kelas'], dtype=np.int32)
+
+    skor = np.empty((len(kandidat_bobot), len(daftar_k)))
+    for i, bobot in enumerate(kandidat_bobot):
+        jarak = selisih @ bobot
+        if k_maks < n_latih:
+            tetangga = np.argpartition(jarak, k_maks - 1, axis=1)[:, :k_maks]
+            urut = np.take_along_axis(jarak, tetangga, axis=1).argsort(axis=1, kind='stable')
+            tetangga = np.take_along_axis(tetangga, urut, axis=1)
+        else:
+            tetangga = jarak.argsort(axis=1, kind='stable')
+        # Jumlah suara per kelas untuk k = 1..k_maks sekaligus: (n_uji, k_maks, n_kelas)
+        suara = np.cumsum(satu_hot[y_latih[tetangga]], axis=1)
+        prediksi = suara[:, k_efektif - 1, :].argmax(axis=2)
+        skor[i] = (prediksi == y_uji[:, None]).mean(axis=0)
+    return skor
+
+
+def skor_bobot(folds, bobot, daftar_k):
+    """
+    Akurasi cross validation (persen) satu vektor bobot untuk setiap k di
+    daftar_k dari fold yang sudah disiapkan: (rata-rata, simpangan baku),
+    masing-masing array sejajar daftar_k.
+    """
+    kandidat = normalisasi_bobot([bobot])
+    if not len(kandidat):
+        raise ValueError("Bobot harus tidak negatif dan tidak semuanya nol")
+    skor = np.stack([skor_fold(fold, kandidat, daftar_k)[0] for fold in folds]) * 100
+    return skor.mean(axis=0), skor.std(axis=0)
+
+
+def kandidat_grid(nilai_bobot, n_fitur=3):
+    """Semua kombinasi nilai_bobot untuk setiap fitur"""
+    return np.array(list(itertools.product(nilai_bobot, repeat=n_fitur)), dtype=float)
+
+
+def kandidat_acak(n_sampel, rentang=(0.0, 1.0), n_fitur=3, seed=None):
+    """n_sampel vektor bobot acak seragam dalam rentang"""
+    rng = np.random.default_rng(seed)
+    return rng.uniform(rentang[0], rentang[1], size=(n_sampel, n_fitur))
+
+
+def normalisasi_bobot(kandidat_bobot):
+    """
+    Skalakan setiap vektor bobot agar berjumlah 1 dan buang duplikat.
+    Urutan tetangga tidak berubah jika semua bobot dikali konstanta, jadi
+    kandidat yang sebanding cukup dinilai sekali.
+    """
+    kandidat_bobot = np.asarray(kandidat_bobot, dtype=float)
+    total = kandidat_bobot.sum(axis=1)
+    valid = (total > 0) & (kandidat_bobot >= 0).all(axis=1)
+    normal = kandidat_bobot[valid] / total[valid, None]
+    _, idx = np.unique(np.round(normal, 9), axis=0, return_index=True)
+    return normal[np.sort(idx)]
+
+
+def cari_parameter(X, y, daftar_k, kandidat_bobot, konfigurasi_cv, n_proses=None, progres=None):
+    """
+    Cross validation untuk setiap kombinasi k x bobot. Fold dibagikan ke
+    process pool (satu task per fold, n_proses=None memakai semua CPU,
+    dijalankan langsung jika hanya satu), setiap kandidat hanya membutuhkan
+    penjumlahan berbobot atas selisih yang sudah dihitung.
+
+    Mengembalikan leaderboard terurut (cv_mean tertinggi, cv_std terendah,
+    k terkecil) berisi dict nilai_k, bobot (berjumlah 1), cv_mean, cv_std
+    dalam persen.
+    """
+    daftar_k = sorted({int(k) for k in daftar_k if int(k) >= 1})
+    if not daftar_k:
+        raise ValueError("Daftar nilai k kosong")
+    kandidat_bobot = normalisasi_bobot(kandidat_bobot)
+    if not len(kandidat_bobot):
+        raise ValueError("Tidak ada kandidat bobot yang valid")
+
+    folds = siapkan_fold(X, y, konfigurasi_cv)
+    n_proses = min(n_proses or os.cpu_count() or 1, len(folds))
+    skor = []
+    if n_proses <= 1:
+        for i, fold in enumerate(folds):
+            skor.append(skor_fold(fold, kandidat_bobot, daftar_k))
+            if progres:
+                progres((i + 1) / len(folds))
+    else:
+        # spawn: proses anak tidak mewarisi thread/koneksi milik worker web
+        with ProcessPoolExecutor(max_workers=n_proses, mp_context=multiprocessing.get_context('spawn')) as executor:
+            futures = [executor.submit(skor_fold, fold, kandidat_bobot, daftar_k) for fold in folds]
+            for i, future in enumerate(futures):
+                skor.append(future.result())
+                if progres:
+                    progres((i + 1) / len(folds))
+
+    skor = np.stack(skor) * 100  # (n_fold, n_bobot, n_k)
+    rata, simpangan = skor.mean(axis=0), skor.std(axis=0)
+    leaderboard = [
+        {'nilai_k': k, 'bobot': [float(b) for b in kandidat_bobot[i]],
+         'cv_mean': float(rata[i, j]), 'cv_std': float(simpangan[i, j])}
+        for i in range(len(kandidat_bobot)) for j, k in enumerate(daftar_k)
+    ]
+    leaderboard.sort(key=lambda baris: (-baris['cv_mean'], baris['cv_std'], baris['nilai_k']))
+    return leaderboard
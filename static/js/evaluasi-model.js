@@ -33,6 +33,31 @@ function updateEvaluation() {
     fetch('/evaluasi_model/data')
         .then(response => response.json())
         .then(data => {
+            // Evaluasi ulang masih berjalan di latar belakang: tampilkan progres dan cek lagi sebentar lagi
+            const jobBox = document.getElementById('job-evaluasi');
+            const jobAktif = data.job && ['antri', 'berjalan'].includes(data.job.status);
+            if (jobBox) {
+                jobBox.classList.toggle('d-none', !jobAktif);
+                if (jobAktif) {
+                    jobBox.querySelector('.job-progress').textContent = Math.round(data.job.progress * 100);
+                }
+            }
+            if (jobAktif) {
+                setTimeout(updateEvaluation, 3000);
+            }
+
+            // Hasil yang tampil milik parameter lain sampai evaluasi parameter saat ini selesai
+            const bannerLain = document.getElementById('evaluasi-parameter-lain');
+            if (bannerLain) {
+                bannerLain.classList.toggle('d-none', !data.parameter_lain);
+            }
+
+            // Halaman dirender sebelum ada hasil evaluasi: muat ulang agar semua panel tampil
+            if (data.model_evaluation && !document.querySelector('.accuracy-value')) {
+                window.location.reload();
+                return;
+            }
+
             if (data.model_evaluation) {
                 // Update metrik utama
                 document.querySelector('.accuracy-value').textContent =                     
@@ -0,0 +1,27 @@
+"""
+Lingkungan test: TestCase dengan database SQLite sementara (lihat
+database_sementara.py), koneksi ke database itu dan test client admin.
+"""
+import unittest
+
+from database_sementara import DatabaseSementara
+
+
+class TestDenganDatabase(unittest.TestCase):
+    """
+    TestCase dengan database sementara: self.tmpdir, self.conn (connect_db)
+    dan self.client (sesi admin). Dibersihkan lewat addCleanup, jadi tearDown
+    subkelas selalu berjalan lebih dulu.
+    """
+
+    def setUp(self):
+        self.db = DatabaseSementara()
+        self.db.__enter__()
+        self.addCleanup(self.db.__exit__)
+        self.tmpdir = self.db.tmpdir
+        self.conn = self.db.aplikasi.connect_db()
+        self.addCleanup(self.conn.close)
+        self.client = self.db.client_admin()
+
+    def atur_config(self, **nilai):
+        self.db.atur_config(**nilai)
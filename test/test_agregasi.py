@@ -0,0 +1,66 @@
+import unittest
+
+import agregasi
+import app as aplikasi
+from lingkungan import TestDenganDatabase
+
+class TestPivot(unittest.TestCase):
+    def test_pivot_sekali_jalan(self):
+        rows = [('2024-02', 'normal', 3), ('2024-01', 'buruk', 1), ('2024-02', 'normal', 2),
+                ('2024-03', 'lebih', 4), ('2024-01', 'normal', None)]
+        labels, matriks = agregasi.pivot(rows, ['normal', 'kurang', 'buruk'])
+        # Label yang hanya berisi seri tersaring tidak ikut muncul
+        self.assertEqual(labels, ['2024-01', '2024-02'])
+        self.assertEqual(matriks, {'normal': [0, 5], 'kurang': [0, 0], 'buruk': [1, 0]})
+
+        labels, matriks = agregasi.pivot(rows)
+        self.assertEqual(labels, ['2024-01', '2024-02', '2024-03'])
+        self.assertEqual(list(matriks), ['buruk', 'lebih', 'normal'])
+
+    def test_datasets_chart(self):
+        datasets = agregasi.datasets_chart({'normal': [1, 2]}, {'normal': {'borderColor': '#000'}})
+        self.assertEqual(datasets, [{'label': 'Normal', 'data': [1, 2], 'borderColor': '#000'}])
+
+    def test_dimensi_tidak_dikenal(self):
+        with self.assertRaises(ValueError):
+            agregasi.query_rekap('bulan', 'nama; DROP TABLE balita')
+
+class TestGrafikLaporan(TestDenganDatabase):
+    def setUp(self):
+        super().setUp()
+        self.conn.executemany('INSERT INTO desa_cimarga (nama_desa) VALUES (?)', [('Cimarga',), ('Sudamanik',)])
+        self.conn.executemany(
+            'INSERT INTO balita (nama, tanggal_lahir, jenis_kelamin, nama_ortu, desa_id) VALUES (?, ?, ?, ?, ?)',
+            [('A', '2023-06-01', 'L', 'x', 1), ('B', '2021-01-01', 'P', 'x', 2), ('C', '2022-01-01', 'P', 'x', None)]
+        )
+        self.conn.executemany(
+            'INSERT INTO pengukuran (balita_id, tanggal_ukur, berat_badan, tinggi_badan, lingkar_lengan) '
+            'VALUES (?, ?, 10, 80, 13)', [(1, '2024-01-10'), (2, '2024-01-20'), (3, '2024-02-05'), (1, '2024-03-01')]
+        )
+        self.conn.executemany(
+            "INSERT INTO klasifikasi (pengukuran_id, status_gizi, tanggal_klasifikasi) VALUES (?, ?, '2024-01-01')",
+            [(1, 'normal'), (2, 'kurang'), (3, 'buruk'), (4, 'kurang')]
+        )
+        self.conn.commit()
+
+    def grafik(self, **args):
+        data = self.client.get('/laporan/grafik', query_string=args).json
+        return data['labels'], {d['label']: d['data'] for d in data['datasets']}
+
+    def test_grafik_per_kelompok(self):
+        self.assertEqual(self.grafik(label='desa'), (
+            ['Cimarga', 'Sudamanik', 'Tanpa Desa'],
+            {'Normal': [1, 0, 0], 'Kurang': [1, 1, 0], 'Lebih': [0, 0, 0], 'Buruk': [0, 0, 1]}))
+        self.assertEqual(self.grafik(label='kelompok_usia', seri='jenis_kelamin', end_date='2024-02-28'), (
+            ['0-11 bulan', '24-35 bulan', '36-47 bulan'], {'L': [1, 0, 0], 'P': [0, 1, 1]}))
+        self.assertEqual(self.client.get('/laporan/grafik?label=nama').status_code, 400)
+
+    def test_laporan_data_memakai_pivot(self):
+        chart = self.client.get('/laporan/data?start_date=2024-01-15&end_date=2024-03-31').json['chart_data']
+        self.assertEqual(chart['labels'], ['2024-01', '2024-02', '2024-03'])
+        self.assertEqual({d['label']: d['data'] for d in chart['datasets']},
+                         {'Normal': [0, 0, 0], 'Kurang': [1, 0, 1], 'Buruk': [0, 1, 0]})
+        self.assertEqual(chart['datasets'][0]['borderColor'], aplikasi.WARNA_STATUS['normal'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import os
+import unittest
+
+import numpy as np
+
+import app as aplikasi
+from models import artefak
+from models.knn import KNN
+from lingkungan import TestDenganDatabase
+
+class TestArtefakModel(TestDenganDatabase):
+    def setUp(self):
+        super().setUp()
+        self.cache_lama = aplikasi._model_cache['isi']
+        rng = np.random.default_rng(0)
+        self.conn.executemany(
+            'INSERT INTO dataset_lvq (feature1, feature2, feature3, target) VALUES (?, ?, ?, ?)',
+            [(*map(float, x), status) for x, status in
+             zip(rng.random((40, 3)) * [20, 100, 15], ['normal', 'kurang', 'lebih', 'buruk'] * 10)]
+        )
+        self.conn.commit()
+        self.X_query = rng.random((50, 3)) * [20, 100, 15]
+
+    def tearDown(self):
+        aplikasi._model_cache['isi'] = self.cache_lama
+
+    def model_worker_baru(self):
+        """Model seperti yang dilihat worker lain: cache proses kosong, fit dari database dilarang"""
+        aplikasi._model_cache['isi'] = (None, None)
+        fit_lama = aplikasi._fit_model_knn
+        def fit_dilarang(*args):
+            raise AssertionError('model seharusnya dimuat dari artefak')
+        aplikasi._fit_model_knn = fit_dilarang
+        try:
+            with aplikasi.app.app_context():
+                return aplikasi.get_model_knn(self.conn)
+        finally:
+            aplikasi._fit_model_knn = fit_lama
+
+    def test_terbit_muat_dan_tukar_versi(self):
+        direktori = os.path.join(self.tmpdir, 'test.model')
+        with aplikasi.app.app_context():
+            model = aplikasi.get_model_knn(self.conn)
+        manifest = artefak.baca_manifest(direktori, 'knn')
+        self.assertEqual((manifest['versi'], manifest['file']), (model.versi_model_, f'knn_v{model.versi_model_}.npz'))
+        self.assertEqual(manifest['hash_data'], model.hash_data_)
+
+        termuat = self.model_worker_baru()
+        self.assertIsNot(termuat, model)
+        np.testing.assert_array_equal(termuat.predict(self.X_query), model.predict(self.X_query))
+
+        # Worker baru mengisi cache dari artefak saat start
+        aplikasi._model_cache['isi'] = (None, None)
+        aplikasi.muat_model_awal()
+        self.assertEqual(aplikasi._model_cache['isi'][0], (aplikasi.app.config['DATABASE'], model.versi_model_))
+
+        # Parameter baru: versi naik, artefak baru diterbitkan dan artefak lama dihapus
+        self.conn.execute('INSERT INTO parameter_knn (nilai_k, bobot_berat, bobot_tinggi, bobot_lila, bobot_umur, '
+                          "bobot_jk, created_at) VALUES (1, 1, 0, 0, 0, 0, datetime('now', '+1 minute'))")
+        aplikasi.naikkan_versi(self.conn, 'model')
+        self.conn.commit()
+        with aplikasi.app.app_context():
+            baru = aplikasi.get_model_knn(self.conn)
+        self.assertEqual((baru.k, baru.versi_model_), (1, model.versi_model_ + 1))
+        self.assertEqual(sorted(os.listdir(direktori)), ['knn.json', f'knn_v{baru.versi_model_}.npz'])
+        self.assertEqual(self.model_worker_baru().k, 1)
+
+    def test_artefak_data_lain_tidak_dipakai(self):
+        with aplikasi.app.app_context():
+            model = aplikasi.get_model_knn(self.conn)
+        # dataset_lvq berubah tanpa versi 'model' ikut naik: artefak lama tidak boleh dipakai
+        self.conn.execute("UPDATE dataset_lvq SET target = 'normal'")
+        self.conn.commit()
+        aplikasi._model_cache['isi'] = (None, None)
+        with aplikasi.app.app_context():
+            baru = aplikasi.get_model_knn(self.conn)
+        self.assertEqual(baru.versi_model_, model.versi_model_)
+        self.assertNotEqual(baru.hash_data_, model.hash_data_)
+        self.assertEqual(set(baru.predict(self.X_query)), {'normal'})
+
+    def test_terbit_versi_lama_tidak_menimpa_versi_baru(self):
+        direktori = os.path.join(self.tmpdir, 'balapan')
+        with aplikasi.app.app_context():
+            model = aplikasi.get_model_knn(self.conn)
+        self.assertIsNotNone(artefak.terbitkan(direktori, 'knn', model, 5))
+        self.assertIsNone(artefak.terbitkan(direktori, 'knn', model, 4))
+        self.assertEqual(artefak.baca_manifest(direktori, 'knn')['versi'], 5)
+        self.assertEqual(sorted(os.listdir(direktori)), ['knn.json', 'knn_v5.npz'])
+
+    def test_artefak_rusak_diabaikan(self):
+        direktori = os.path.join(self.tmpdir, 'rusak')
+        os.makedirs(direktori)
+        with open(os.path.join(direktori, 'knn.json'), 'w') as f:
+            f.write('{"versi": 1, "file": "knn_v1.npz"}')
+        with open(os.path.join(direktori, 'knn_v1.npz'), 'wb') as f:
+            f.write(b'PK bukan zip')
+        self.assertIsNone(artefak.muat(direktori, 'knn', KNN))
+        self.assertIsNone(artefak.muat(direktori, 'lvq', KNN))
+
+if __name__ == '__main__':
+    unittest.main()
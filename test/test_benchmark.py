@@ -0,0 +1,28 @@
+import os
+import unittest
+
+from benchmarks import suite
+
+@unittest.skipUnless(os.environ.get('BENCHMARK') == '1', 'benchmark hanya dijalankan dengan BENCHMARK=1')
+class TestBenchmark(unittest.TestCase):
+    """
+    Gagal jika salah satu kasus lebih lambat dari BENCHMARK_AMBANG x baseline.
+    Jalankan: BENCHMARK=1 python -m pytest test/test_benchmark.py
+    """
+    def test_tidak_ada_regresi(self):
+        baseline = suite.muat_baseline()
+        for kunci, fungsi, n in suite.daftar_kasus(os.environ.get('BENCHMARK_FILTER')):
+            with self.subTest(kasus=kunci):
+                self.assertIsNone(suite.regresi(kunci, fungsi(n), baseline))
+
+class TestPembandingBaseline(unittest.TestCase):
+    def test_regresi(self):
+        baseline = {'a[n=1]': {'median': 0.1}, 'b[n=1]': {'median': 0.001}}
+        self.assertIsNone(suite.regresi('a[n=1]', {'median': 0.14}, baseline, ambang=1.5))
+        self.assertIn('a[n=1]', suite.regresi('a[n=1]', {'median': 0.16}, baseline, ambang=1.5))
+        # Selisih absolut di bawah MIN_SELISIH_DETIK dianggap derau
+        self.assertIsNone(suite.regresi('b[n=1]', {'median': 0.003}, baseline, ambang=1.5))
+        self.assertIsNone(suite.regresi('baru[n=1]', {'median': 9}, baseline))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import app as aplikasi
+from cache_respons import CacheMemori, CacheSQLite
+from lingkungan import TestDenganDatabase
+
+class TestBackendCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def periksa_backend(self, backend):
+        backend.set('a', (b'1', 'text/html'))
+        backend.set('b', (b'2', 'text/html'))
+        time.sleep(0.01)
+        self.assertEqual(backend.get('a'), (b'1', 'text/html'))
+        # 'a' baru dipakai, jadi 'b' yang dibuang saat kapasitas terlampaui
+        backend.set('c', (b'3', 'text/html'))
+        self.assertIsNone(backend.get('b'))
+        self.assertEqual(len(backend), 2)
+
+        backend.ttl = 0
+        self.assertIsNone(backend.get('a'))
+
+    def test_memori_lru_dan_ttl(self):
+        self.periksa_backend(CacheMemori(maks=2, ttl=60))
+
+    def test_sqlite_lru_dan_ttl(self):
+        path = os.path.join(self.tmpdir, 'cache.db')
+        self.periksa_backend(CacheSQLite(path, maks=2, ttl=60))
+        # Entri terlihat dari instance lain (worker lain) yang memakai file yang sama
+        CacheSQLite(path).set('x', (b'x', 'application/json'))
+        self.assertEqual(CacheSQLite(path).get('x'), (b'x', 'application/json'))
+
+class TestCacheRoute(TestDenganDatabase):
+    def setUp(self):
+        super().setUp()
+        self.conn.execute("INSERT INTO balita (nama, tanggal_lahir, jenis_kelamin, nama_ortu) "
+                          "VALUES ('A', '2022-01-01', 'L', 'x')")
+        self.conn.execute("INSERT INTO pengukuran (balita_id, tanggal_ukur, berat_badan, tinggi_badan, "
+                          "lingkar_lengan) VALUES (1, '2024-01-10', 10, 80, 13)")
+        self.conn.execute("INSERT INTO klasifikasi (pengukuran_id, status_gizi, tanggal_klasifikasi) "
+                          "VALUES (1, 'normal', '2024-01-10')")
+        self.conn.commit()
+        # Dekorator memegang instance cache saat modul dimuat, jadi backendnya yang diganti
+        self.backend_lama = aplikasi.cache_respons.backend
+        aplikasi.cache_respons.backend = CacheMemori()
+
+    def tearDown(self):
+        aplikasi.cache_respons.backend = self.backend_lama
+
+    def test_hit_304_dan_invalidasi(self):
+        url = '/laporan/data?start_date=2024-01-01&end_date=2024-12-31'
+        awal = aplikasi.cache_respons.statistik()
+        pertama = self.client.get(url)
+        kedua = self.client.get(url)
+        self.assertEqual(pertama.data, kedua.data)
+        self.assertEqual(pertama.headers['ETag'], kedua.headers['ETag'])
+        self.assertIn('Last-Modified', pertama.headers)
+        statistik = aplikasi.cache_respons.statistik()
+        self.assertEqual(statistik['miss'] - awal['miss'], 1)
+        self.assertEqual(statistik['hit'] - awal['hit'], 1)
+
+        tidak_berubah = self.client.get(url, headers={'If-None-Match': pertama.headers['ETag']})
+        self.assertEqual(tidak_berubah.status_code, 304)
+        self.assertEqual(tidak_berubah.data, b'')
+
+        # Perubahan klasifikasi menaikkan versi data: ETag lama tidak berlaku lagi
+        self.conn.execute("UPDATE klasifikasi SET status_gizi = 'buruk'")
+        self.conn.commit()
+        baru = self.client.get(url, headers={'If-None-Match': pertama.headers['ETag']})
+        self.assertEqual(baru.status_code, 200)
+        self.assertNotEqual(baru.headers['ETag'], pertama.headers['ETag'])
+        self.assertEqual(baru.json['chart_data']['datasets'][2]['data'], [1])
+
+    def test_halaman_per_user_dan_flash_tidak_di_cache(self):
+        etag_admin = self.client.get('/dashboard').headers['ETag']
+        with self.client.session_transaction() as sess:
+            sess['user_id'] = 2
+        etag_user = self.client.get('/dashboard').headers['ETag']
+        self.assertNotEqual(etag_user, etag_admin)
+
+        # Nama dan foto di navbar berasal dari sesi; edit profil tidak menyentuh versi data
+        with self.client.session_transaction() as sess:
+            sess['name'] = 'Nama Baru'
+            sess['photo'] = 'baru.png'
+        response = self.client.get('/dashboard', headers={'If-None-Match': etag_user})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Nama Baru', response.get_data(as_text=True))
+        self.assertIn('baru.png', response.get_data(as_text=True))
+
+        with self.client.session_transaction() as sess:
+            sess['_flashes'] = [('success', 'Data tersimpan')]
+        response = self.client.get('/dashboard')
+        self.assertIn('Data tersimpan', response.get_data(as_text=True))
+        self.assertNotIn('ETag', response.headers)
+        self.assertNotIn('Data tersimpan', self.client.get('/dashboard').get_data(as_text=True))
+
+if __name__ == '__main__':
+    unittest.main()
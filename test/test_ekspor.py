@@ -0,0 +1,181 @@
+import csv
+import importlib.util
+import io
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from openpyxl import load_workbook
+from pypdf import PdfReader, PdfWriter
+
+import app as aplikasi
+from lingkungan import TestDenganDatabase
+
+class TestEksporLaporan(TestDenganDatabase):
+    def setUp(self):
+        super().setUp()
+        self.atur_config(PDF_CACHE_DIR=os.path.join(self.tmpdir, 'pdf_cache'))
+        self.conn.executemany(
+            'INSERT INTO balita (nik, nama, tanggal_lahir, jenis_kelamin, nama_ortu) VALUES (?, ?, ?, ?, ?)',
+            [(str(3602010000000000 + i), f'Anak {i}', '2022-01-01', 'L', 'Ortu') for i in range(1, 31)]
+        )
+        self.conn.executemany(
+            'INSERT INTO pengukuran (balita_id, tanggal_ukur, berat_badan, tinggi_badan, lingkar_lengan) '
+            'VALUES (?, ?, 10.5, 80, 13)', [(i, f'2024-{i % 12 + 1:02d}-01') for i in range(1, 31)]
+        )
+        self.conn.executemany(
+            "INSERT INTO klasifikasi (pengukuran_id, status_gizi, tanggal_klasifikasi) VALUES (?, 'normal', '2024-01-01')",
+            [(i,) for i in range(1, 31)]
+        )
+        self.conn.commit()
+
+    def test_excel_write_only(self):
+        # Sampel lebar kolom lebih kecil dari jumlah baris agar sisa baris ikut terbaca dari cursor
+        sampel_lama = aplikasi.SAMPEL_LEBAR_KOLOM
+        aplikasi.SAMPEL_LEBAR_KOLOM = 5
+        try:
+            response = self.client.get('/laporan/excel?start_date=2024-03-01&end_date=2024-06-30')
+        finally:
+            aplikasi.SAMPEL_LEBAR_KOLOM = sampel_lama
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(int(response.headers['Content-Length']), len(response.data))
+
+        ws = load_workbook(io.BytesIO(response.data)).active
+        rows = list(ws.iter_rows(min_row=4, values_only=True))
+        self.assertEqual([judul for judul, _ in aplikasi.KOLOM_EKSPOR_LAPORAN],
+                         list(next(ws.iter_rows(min_row=3, max_row=3, values_only=True))))
+        self.assertEqual(len(rows), 12)
+        self.assertEqual([row[0] for row in rows], list(range(1, 13)))
+        self.assertEqual(sorted(row[3] for row in rows), [row[3] for row in rows])
+        self.assertTrue(all('2024-03-01' <= row[3] <= '2024-06-30' for row in rows))
+
+    def test_file_sementara_dihapus_walau_body_tidak_dibaca(self):
+        folder = os.path.join(self.tmpdir, 'sementara')
+        os.makedirs(folder)
+        tempdir_lama, tempfile.tempdir = tempfile.tempdir, folder
+        try:
+            response = self.client.get('/laporan/excel')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(os.listdir(folder), [])
+            response.close()
+            self.assertEqual(self.client.head('/laporan/excel').status_code, 200)
+            self.assertEqual(os.listdir(folder), [])
+        finally:
+            tempfile.tempdir = tempdir_lama
+
+    def test_csv_streaming(self):
+        lama = aplikasi.UKURAN_FETCH_EKSPOR
+        aplikasi.UKURAN_FETCH_EKSPOR = 4
+        try:
+            response = self.client.get('/laporan/csv?start_date=2024-03-01&end_date=2024-06-30')
+            self.assertTrue(response.is_streamed)
+            isi = response.get_data(as_text=True)
+        finally:
+            aplikasi.UKURAN_FETCH_EKSPOR = lama
+        rows = list(csv.reader(io.StringIO(isi)))
+        self.assertEqual(rows[0], ['nama', 'nik', 'tanggal_ukur', 'berat_badan', 'tinggi_badan',
+                                   'lingkar_lengan', 'status_gizi'])
+        self.assertEqual(len(rows), 13)
+        self.assertEqual(rows[1][3], '10.5')
+
+    @unittest.skipUnless(importlib.util.find_spec('pyarrow'), 'pyarrow tidak terpasang')
+    def test_parquet_row_group(self):
+        import pyarrow.parquet as pq
+        lama = aplikasi.UKURAN_ROW_GROUP
+        aplikasi.UKURAN_ROW_GROUP = 5
+        try:
+            response = self.client.get('/laporan/parquet')
+        finally:
+            aplikasi.UKURAN_ROW_GROUP = lama
+        self.assertEqual(response.status_code, 200)
+        berkas = pq.ParquetFile(io.BytesIO(response.data))
+        self.assertEqual(berkas.metadata.num_rows, 30)
+        self.assertEqual(berkas.metadata.num_row_groups, 6)
+
+    @unittest.skipUnless(importlib.util.find_spec('pyarrow'), 'pyarrow tidak terpasang')
+    def test_parquet_nik_integer(self):
+        import pyarrow.parquet as pq
+        # Kolom nik bertipe TEXT selalu menyimpan teks, jadi NIK integer (mis. dari
+        # database yang kolomnya dibuat tanpa tipe) ditiru lewat CAST di query
+        query_asli = aplikasi.query_laporan
+        def query_nik_integer(*args, **kwargs):
+            query, params = query_asli(*args, **kwargs)
+            return query.replace('b.nik', 'CAST(b.nik AS INTEGER) AS nik'), params
+        self.conn.execute("UPDATE balita SET nik = NULL WHERE id = 1")
+        self.conn.commit()
+        with mock.patch.object(aplikasi, 'query_laporan', query_nik_integer):
+            response = self.client.get('/laporan/parquet')
+        self.assertEqual(response.status_code, 200)
+        tabel = pq.read_table(io.BytesIO(response.data))
+        self.assertEqual(str(tabel.schema.field('nik').type), 'string')
+        nik = dict(zip(tabel.column('nama').to_pylist(), tabel.column('nik').to_pylist()))
+        self.assertIsNone(nik['Anak 1'])
+        self.assertEqual(nik['Anak 2'], '3602010000000002')
+
+    @unittest.skipUnless(importlib.util.find_spec('pyarrow'), 'pyarrow tidak terpasang')
+    def test_parquet_file_sementara_dihapus(self):
+        folder = os.path.join(self.tmpdir, 'sementara')
+        os.makedirs(folder)
+        tempdir_lama, tempfile.tempdir = tempfile.tempdir, folder
+        try:
+            self.client.get('/laporan/parquet').close()
+            self.assertEqual(os.listdir(folder), [])
+        finally:
+            tempfile.tempdir = tempdir_lama
+
+    def test_pdf_per_bagian_dan_cache(self):
+        # Ganti wkhtmltopdf dengan PDF satu halaman per bagian, tinggi halaman = jumlah baris
+        dirender = []
+        def render_palsu(html):
+            dirender.append(html)
+            writer = PdfWriter()
+            writer.add_blank_page(width=100, height=10 + html.count('<tr>'))
+            buffer = io.BytesIO()
+            writer.write(buffer)
+            return buffer.getvalue()
+
+        render_lama, bagian_lama = aplikasi._render_pdf_bagian, aplikasi.BARIS_PER_BAGIAN_PDF
+        aplikasi._render_pdf_bagian, aplikasi.BARIS_PER_BAGIAN_PDF = render_palsu, 7
+        try:
+            response = self.client.get('/laporan/pdf')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(int(response.headers['Content-Length']), len(response.data))
+            halaman = PdfReader(io.BytesIO(response.data)).pages
+            # 30 baris / 7 per bagian = 5 bagian, urutan bagian tetap terjaga
+            self.assertEqual([int(p.mediabox.height) - 11 for p in halaman], [7, 7, 7, 7, 2])
+            self.assertIn('<h2>', dirender[0])
+            self.assertTrue(all('<h2>' not in html for html in dirender[1:]))
+            response.close()
+
+            # Request kedua memakai file cache
+            self.assertEqual(self.client.get('/laporan/pdf').data, response.data)
+            self.assertEqual(len(dirender), 5)
+
+            # Perubahan data menaikkan versi sehingga PDF dirender ulang dan cache lama dihapus
+            self.conn.execute('DELETE FROM pengukuran WHERE id = 1')
+            self.conn.commit()
+            halaman = PdfReader(io.BytesIO(self.client.get('/laporan/pdf').data)).pages
+            self.assertEqual(len(halaman), 5)
+            self.assertEqual(len(dirender), 10)
+            self.assertEqual(len(os.listdir(aplikasi.app.config['PDF_CACHE_DIR'])), 1)
+
+            self.assertEqual(self.client.get('/laporan/pdf?start_date=kemarin').status_code, 400)
+        finally:
+            aplikasi._render_pdf_bagian, aplikasi.BARIS_PER_BAGIAN_PDF = render_lama, bagian_lama
+
+    def test_hapus_cache_pdf_lama(self):
+        folder = os.path.join(self.tmpdir, 'bersihkan')
+        os.makedirs(folder)
+        for nama in ('laporan_awal_akhir_v1.pdf', 'laporan_awal_akhir_v3.pdf', 'laporan_awal_akhir_v4.pdf',
+                     'laporan_basi.tmp', 'laporan_sedang_ditulis.tmp', 'lain.pdf'):
+            open(os.path.join(folder, nama), 'wb').close()
+        basi = time.time() - aplikasi.UMUR_TMP_PDF_DETIK - 60
+        os.utime(os.path.join(folder, 'laporan_basi.tmp'), (basi, basi))
+        aplikasi.hapus_cache_pdf_lama(folder, 3)
+        self.assertEqual(sorted(os.listdir(folder)), ['lain.pdf', 'laporan_awal_akhir_v3.pdf',
+                                                      'laporan_awal_akhir_v4.pdf', 'laporan_sedang_ditulis.tmp'])
+
+if __name__ == '__main__':
+    unittest.main()
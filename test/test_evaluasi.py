@@ -0,0 +1,74 @@
+import random
+import unittest
+
+from sklearn import model_selection
+
+import app as aplikasi
+from lingkungan import TestDenganDatabase
+
+class TestEvaluasiTersimpan(TestDenganDatabase):
+    def setUp(self):
+        super().setUp()
+        rnd = random.Random(1)
+        self.conn.executemany(
+            'INSERT INTO dataset_lvq (feature1, feature2, feature3, target) VALUES (?, ?, ?, ?)',
+            [(pusat + rnd.random(), pusat * 2 + rnd.random(), pusat + rnd.random(), target)
+             for pusat, target in [(1, 'buruk'), (5, 'kurang'), (9, 'normal')] for _ in range(10)]
+        )
+        self.conn.commit()
+
+        # Hitung berapa kali cross validation benar-benar dijalankan
+        self.cv_lama = model_selection.cross_val_score
+        self.jumlah_cv = 0
+        def cv_tercatat(*args, **kwargs):
+            self.jumlah_cv += 1
+            return self.cv_lama(*args, **kwargs)
+        model_selection.cross_val_score = cv_tercatat
+
+    def tearDown(self):
+        model_selection.cross_val_score = self.cv_lama
+
+    def evaluasi(self, nilai_k=3, bobot=(1, 1, 1, 1, 1)):
+        with aplikasi.app.app_context():
+            return aplikasi.evaluasi_model_with_parameters(nilai_k, list(bobot))
+
+    def test_hasil_dipakai_ulang_selama_input_sama(self):
+        pertama = self.evaluasi()
+        self.assertEqual(self.evaluasi(), pertama)
+        # Bobot umur/jk tidak dipakai model sehingga tidak memicu evaluasi ulang
+        self.evaluasi(bobot=(1, 1, 1, 2, 2))
+        self.assertEqual(self.jumlah_cv, 1)
+
+        self.evaluasi(nilai_k=5)
+        self.conn.execute('UPDATE dataset_lvq SET feature1 = feature1 + 0.5 WHERE id = 1')
+        self.conn.commit()
+        self.evaluasi()
+        self.assertEqual(self.jumlah_cv, 3)
+        self.assertEqual(self.conn.execute('SELECT COUNT(*) FROM evaluasi_model').fetchone()[0], 3)
+
+    def test_halaman_membaca_hasil_tersimpan_tanpa_job(self):
+        hasil = self.evaluasi()
+        params = {'nilai_k': 3, 'bobot_berat': 1, 'bobot_tinggi': 1, 'bobot_lila': 1,
+                  'bobot_umur': 1, 'bobot_jk': 1}
+        with aplikasi.app.test_request_context():
+            terakhir, job = aplikasi.evaluasi_terakhir(aplikasi.get_db(), params)
+        self.assertIsNone(job)
+        self.assertEqual(terakhir['hasil'], hasil)
+        self.assertIsNotNone(terakhir['finished_at'])
+
+    def test_hasil_parameter_lain_ditandai_tanpa_mengantrekan_job(self):
+        hasil = self.evaluasi(nilai_k=3)
+        params = {'nilai_k': 5, 'bobot_berat': 1, 'bobot_tinggi': 1, 'bobot_lila': 1,
+                  'bobot_umur': 1, 'bobot_jk': 1}
+        with aplikasi.app.test_request_context():
+            terakhir, job = aplikasi.evaluasi_terakhir(aplikasi.get_db(), params)
+        self.assertIsNone(job)
+        self.assertEqual(terakhir['hasil'], hasil)
+        self.assertTrue(terakhir['parameter_lain'])
+        self.assertEqual((terakhir['nilai_k'], terakhir['bobot']), (3, [1.0, 1.0, 1.0]))
+        # Membuka halaman (GET) tidak mengantrekan evaluasi
+        with aplikasi.app.app_context():
+            self.assertIsNone(aplikasi.job_runner.terakhir('evaluasi_model'))
+
+if __name__ == '__main__':
+    unittest.main()
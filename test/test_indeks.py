@@ -0,0 +1,130 @@
+import re
+import unittest
+
+import app as aplikasi
+from lingkungan import TestDenganDatabase
+
+# Tabel referensi kecil (dan tabel internal SQLite/FTS5) yang boleh di-scan penuh
+TABEL_KECIL = {'users', 'parameter_knn', 'parameter_history', 'dataset_training',
+               'dataset_lvq', 'desa_cimarga', 'job', 'versi_data', 'rekap_bulanan',
+               'sqlite_master', 'main.balita_fts_config'}
+
+# Nama tabel setelah FROM/JOIN beserta aliasnya (dengan atau tanpa AS)
+POLA_TABEL = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', re.IGNORECASE)
+KATA_KUNCI = {'where', 'join', 'left', 'inner', 'cross', 'natural', 'on', 'using',
+              'group', 'order', 'limit', 'union', 'having'}
+
+def alias_tabel(query):
+    """{alias atau nama tabel: nama tabel} untuk semua tabel di FROM/JOIN query"""
+    alias = {}
+    for tabel, nama in POLA_TABEL.findall(query):
+        alias[tabel] = tabel
+        if nama and nama.lower() not in KATA_KUNCI:
+            alias[nama] = tabel
+    return alias
+
+ROUTE = [
+    '/',
+    '/dashboard',
+    '/balita',
+    '/balita?nama=anak',
+    '/pengukuran',
+    '/laporan',
+    '/laporan/data?start_date=2024-01-01&end_date=2024-03-31',
+    '/laporan/cetak?start_date=2024-01-01&end_date=2024-03-31',
+]
+
+class TestIndeksQuery(TestDenganDatabase):
+    """Setiap query SELECT yang dijalankan route utama harus memakai indeks"""
+    def setUp(self):
+        super().setUp()
+        for i in range(1, 51):
+            self.conn.execute('INSERT INTO balita (nik, nama, tanggal_lahir, jenis_kelamin, nama_ortu) '
+                              'VALUES (?, ?, ?, ?, ?)', (str(3600000000000000 + i), f'anak {i}',
+                                                         '2022-01-01', 'L', 'ortu'))
+            self.conn.execute('INSERT INTO pengukuran (balita_id, tanggal_ukur, berat_badan, tinggi_badan, '
+                              'lingkar_lengan) VALUES (?, ?, 10, 80, 13)', (i, f'2024-{i % 9 + 1:02d}-01'))
+            self.conn.execute("INSERT INTO klasifikasi (pengukuran_id, status_gizi, tanggal_klasifikasi) "
+                              "VALUES (?, 'normal', '2024-01-01')", (i,))
+        self.conn.commit()
+
+        # Rekam semua SQL yang dijalankan lewat koneksi request
+        self.sql = []
+        sql = self.sql
+        self.koneksi_lama = aplikasi.KoneksiRequest
+        class KoneksiTercatat(self.koneksi_lama):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.set_trace_callback(sql.append)
+        aplikasi.KoneksiRequest = KoneksiTercatat
+
+    def tearDown(self):
+        aplikasi.KoneksiRequest = self.koneksi_lama
+
+    def scan_tanpa_indeks(self, query):
+        """
+        Langkah SCAN atas tabel besar. Scan lewat indeks tetap membaca seluruh
+        indeks, jadi hanya dibolehkan untuk scan berurutan yang dihentikan LIMIT
+        (tanpa sort tambahan) atau untuk query SELECT COUNT(*) yang memang
+        menghitung seluruh tabel.
+        """
+        plan = [row[3] for row in self.conn.execute('EXPLAIN QUERY PLAN ' + query)]
+        alias = alias_tabel(query)
+        teks = ' '.join(query.upper().split())
+        hitung_semua = teks.startswith('SELECT COUNT(*) FROM')
+        urut_dengan_limit = ('ORDER BY' in teks and re.search(r'\bLIMIT\b', teks)
+                             and not any('TEMP B-TREE FOR ORDER BY' in langkah for langkah in plan))
+        scan = []
+        for langkah in plan:
+            if not langkah.startswith('SCAN ') or langkah == 'SCAN CONSTANT ROW':
+                continue
+            nama = langkah.split()[1]
+            # Virtual table (FTS5) dengan constraint MATCH bukan scan penuh
+            if re.search(r'VIRTUAL TABLE INDEX \d+:\S+', langkah):
+                continue
+            if alias.get(nama, nama) in TABEL_KECIL:
+                continue
+            lewat_indeks = ' INDEX ' in langkah or 'INTEGER PRIMARY KEY' in langkah
+            if hitung_semua or (urut_dengan_limit and lewat_indeks):
+                continue
+            scan.append(langkah)
+        return scan
+
+    def test_query_route_memakai_indeks(self):
+        for url in ROUTE:
+            del self.sql[:]
+            self.assertEqual(self.client.get(url).status_code, 200, url)
+            select = [q for q in self.sql if q.lstrip().upper().startswith('SELECT')]
+            self.assertTrue(select, url)
+            for query in select:
+                with self.subTest(url=url, query=' '.join(query.split())[:80]):
+                    self.assertEqual(self.scan_tanpa_indeks(query), [])
+
+    def test_hitung_klasifikasi_usang_lewat_indeks(self):
+        self.conn.execute('UPDATE klasifikasi SET versi_model = 3 WHERE pengukuran_id > 5')
+        self.conn.execute('ANALYZE')
+        sql = []
+        self.conn.set_trace_callback(sql.append)
+        # Pengukuran 1-5 usang; tanggal ukurnya 2024-02 s.d. 2024-06 dan tidak ada yang punya desa
+        for filter_data, jumlah in [({}, 5), ({'start_date': '2024-03-01'}, 4), ({'desa_id': 1}, 0)]:
+            with self.subTest(**filter_data):
+                del sql[:]
+                self.assertEqual(aplikasi.hitung_klasifikasi_usang(self.conn, 3, **filter_data), jumlah)
+                # Trace callback menerima SQL dengan parameter yang sudah diisi
+                plan = [row[3] for row in self.conn.execute('EXPLAIN QUERY PLAN ' + sql[0])]
+                self.assertFalse([langkah for langkah in plan if langkah.startswith('SCAN klasifikasi')], plan)
+                self.assertEqual(sum('idx_klasifikasi_versi_model' in langkah for langkah in plan), 3, plan)
+        self.conn.set_trace_callback(None)
+
+    def test_pemeriksa_plan(self):
+        # Scan lewat indeks tanpa LIMIT tetap membaca seluruh tabel
+        self.assertEqual(self.scan_tanpa_indeks('SELECT * FROM balita b ORDER BY b.nama'),
+                         ['SCAN b USING INDEX idx_balita_nama'])
+        self.assertEqual(self.scan_tanpa_indeks('SELECT * FROM balita b ORDER BY b.nama LIMIT 10'), [])
+        self.assertEqual(self.scan_tanpa_indeks('SELECT COUNT(*) FROM pengukuran'), [])
+        self.assertTrue(self.scan_tanpa_indeks('SELECT * FROM pengukuran AS p WHERE p.berat_badan > 1'))
+        # Alias tabel kecil tetap dikenali
+        self.assertEqual(self.scan_tanpa_indeks('SELECT * FROM desa_cimarga d'), [])
+
+if __name__ == '__main__':
+    unittest.main()
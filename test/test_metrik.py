@@ -0,0 +1,58 @@
+import unittest
+
+import app as aplikasi
+import metrik
+from lingkungan import TestDenganDatabase
+
+class TestMetrik(TestDenganDatabase):
+    def setUp(self):
+        super().setUp()
+        self.conn.executemany('INSERT INTO dataset_lvq (feature1, feature2, feature3, target) VALUES (?, ?, ?, ?)',
+                              [(8, 70, 11, 'buruk'), (12, 88, 15, 'normal'), (15, 95, 17, 'lebih')])
+        self.conn.commit()
+        metrik.reset()
+
+    def tearDown(self):
+        metrik.aktifkan(False)
+        metrik.reset()
+
+    def test_nonaktif(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+        self.client.get('/balita')
+        self.assertNotIn('gizi_request_durasi_detik_count', metrik.render())
+
+    def test_metrics_prometheus(self):
+        metrik.aktifkan()
+        self.assertEqual(self.client.get('/balita?nama=anak').status_code, 200)
+        with aplikasi.app.app_context():
+            self.assertIn(aplikasi.klasifikasi_knn(12, 88, 15)[0], ('buruk', 'normal', 'lebih'))
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain; version=0.0.4'))
+        isi = response.get_data(as_text=True)
+        self.assertIn('# TYPE gizi_request_durasi_detik histogram', isi)
+        self.assertIn('gizi_request_durasi_detik_count{route="/balita",metode="GET",status="200"} 1', isi)
+        self.assertIn('gizi_model_ukuran_batch_bucket{model="knn",operasi="predict",le="1"} 1', isi)
+        self.assertIn('gizi_model_durasi_detik_count{model="knn",operasi="fit"} 1', isi)
+        self.assertIn('gizi_fungsi_durasi_detik_count{fungsi="klasifikasi_knn"} 1', isi)
+        self.assertIn('tahap="fetch"', isi)
+        self.assertTrue(any(baris.startswith('gizi_sql_durasi_detik_count{query="SELECT')
+                            for baris in isi.splitlines()))
+
+    def test_histogram(self):
+        histogram = metrik.Histogram('uji', 'Uji', ('nama',), bucket=(1, 5))
+        for nilai in (0.5, 1, 3, 10):
+            histogram.observe(nilai, nama='a"b')
+        self.assertEqual(histogram.render()[2:], [
+            'uji_bucket{nama="a\\"b",le="1"} 2',
+            'uji_bucket{nama="a\\"b",le="5"} 3',
+            'uji_bucket{nama="a\\"b",le="+Inf"} 4',
+            'uji_sum{nama="a\\"b"} 14.5',
+            'uji_count{nama="a\\"b"} 4',
+        ])
+        self.assertEqual(metrik.label_sql('SELECT *\n  FROM t WHERE id IN (?, ?,?)'),
+                         'SELECT * FROM t WHERE id IN (?, ...)')
+
+if __name__ == '__main__':
+    unittest.main()
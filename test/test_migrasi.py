@@ -0,0 +1,110 @@
+import importlib.util
+import os
+import random
+import shutil
+import sqlite3
+import unittest
+
+import app as aplikasi
+from database_sementara import DatabaseSementara
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@unittest.skipUnless(importlib.util.find_spec('flask_migrate'), 'Flask-Migrate tidak terpasang')
+class TestRevisiAlembic(unittest.TestCase):
+    """Revisi Alembic dijalankan pada salinan gizi_balita.db (skema sebelum migrasi_skema)"""
+    def setUp(self):
+        self.db = DatabaseSementara()
+        self.db.__enter__()
+        self.addCleanup(self.db.__exit__)
+        self.path = os.path.join(self.db.tmpdir, 'lama.db')
+        shutil.copy(os.path.join(ROOT, 'gizi_balita.db'), self.path)
+
+    def skema(self, path):
+        """Kolom setiap tabel (PRAGMA table_info) serta SQL indeks dan trigger"""
+        conn = sqlite3.connect(path)
+        try:
+            objek = {}
+            for jenis, nama, sql in conn.execute(
+                    "SELECT type, name, sql FROM sqlite_master "
+                    "WHERE name NOT LIKE 'sqlite_%' AND name != 'alembic_version'"):
+                if jenis == 'table':
+                    objek[nama] = conn.execute(f'PRAGMA table_info("{nama}")').fetchall()
+                else:
+                    objek[nama] = ' '.join((sql or '').split())
+            return objek
+        finally:
+            conn.close()
+
+    def upgrade(self, path):
+        from flask_migrate import upgrade
+        self.db.atur_config(DATABASE=path)
+        with aplikasi.app_migrasi().app_context():
+            upgrade()
+
+    def test_skema_sama_dengan_migrasi_skema(self):
+        runtime = os.path.join(self.db.tmpdir, 'runtime.db')
+        shutil.copy(self.path, runtime)
+        self.upgrade(self.path)
+        self.db.atur_config(DATABASE=runtime)
+        aplikasi.connect_db().close()
+
+        hasil_alembic, hasil_runtime = self.skema(self.path), self.skema(runtime)
+        self.assertEqual(sorted(hasil_alembic), sorted(hasil_runtime))
+        for nama in hasil_runtime:
+            self.assertEqual(hasil_alembic[nama], hasil_runtime[nama], nama)
+
+    def test_rekap_diisi_dari_data_lama(self):
+        rnd = random.Random(0)
+        with sqlite3.connect(self.path) as conn:
+            balita = [row[0] for row in conn.execute('SELECT id FROM balita ORDER BY id LIMIT 50')]
+            for _ in range(100):
+                cur = conn.execute('INSERT INTO pengukuran (balita_id, tanggal_ukur, berat_badan, tinggi_badan, '
+                                   'lingkar_lengan) VALUES (?, ?, 10, 80, 13)',
+                                   (rnd.choice(balita), f'2024-{rnd.randint(1, 12):02d}-01'))
+                conn.execute("INSERT INTO klasifikasi (pengukuran_id, status_gizi, tanggal_klasifikasi) "
+                             "VALUES (?, ?, '2024-01-01')", (cur.lastrowid, rnd.choice(aplikasi.STATUS_GIZI)))
+        conn.close()
+        self.upgrade(self.path)
+
+        conn = sqlite3.connect(self.path)
+        self.addCleanup(conn.close)
+        acuan = dict(((bulan, desa, status), jumlah) for bulan, desa, status, jumlah in conn.execute('''
+            SELECT strftime('%Y-%m', p.tanggal_ukur), COALESCE(b.desa_id, 0), k.status_gizi, COUNT(*)
+            FROM pengukuran p
+            JOIN klasifikasi k ON k.pengukuran_id = p.id
+            JOIN balita b ON b.id = p.balita_id
+            GROUP BY 1, 2, 3
+        '''))
+        rekap = dict(((bulan, desa, status), jumlah) for bulan, desa, status, jumlah in conn.execute(
+            'SELECT bulan, desa_id, status_gizi, jumlah FROM rekap_bulanan'))
+        self.assertEqual(sum(acuan.values()), 100)
+        self.assertEqual(rekap, acuan)
+
+        # Trigger ikut terpasang: hapus pengukuran langsung mengurangi rekap
+        conn.execute('DELETE FROM pengukuran WHERE id = (SELECT MIN(id) FROM pengukuran)')
+        self.assertEqual(conn.execute('SELECT SUM(jumlah) FROM rekap_bulanan').fetchone()[0], 99)
+
+    def test_balita_fts_diisi_dan_diikuti_trigger(self):
+        self.upgrade(self.path)
+        conn = sqlite3.connect(self.path)
+        self.addCleanup(conn.close)
+        id_balita, nama = conn.execute('SELECT id, nama FROM balita ORDER BY id LIMIT 1').fetchone()
+        cocok = [row[0] for row in conn.execute(
+            'SELECT rowid FROM balita_fts WHERE balita_fts MATCH ?', (aplikasi.kueri_fts(nama),))]
+        self.assertIn(id_balita, cocok)
+
+        conn.execute("UPDATE balita SET nama = 'Zulkarnaen' WHERE id = ?", (id_balita,))
+        self.assertEqual(conn.execute("SELECT rowid FROM balita_fts WHERE balita_fts MATCH 'zulkarnaen'").fetchall(),
+                         [(id_balita,)])
+
+    def test_versi_data_naik_saat_data_berubah(self):
+        self.upgrade(self.path)
+        conn = sqlite3.connect(self.path)
+        self.addCleanup(conn.close)
+        self.assertEqual(aplikasi.get_versi(conn, 'data'), 0)
+        conn.execute("UPDATE balita SET nama = nama || ' ' WHERE id = (SELECT MIN(id) FROM balita)")
+        self.assertEqual(aplikasi.get_versi(conn, 'data'), 1)
+
+if __name__ == '__main__':
+    unittest.main()
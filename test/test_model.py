@@ -1,17 +1,130 @@
+import io
 import unittest
 import numpy as np
-from models.knn import KNN_LVQ
+from models.knn import KNN
+from models.lvq import LVQ
 
-class TestKNNLVQ(unittest.TestCase):
+class TestKNN(unittest.TestCase):
     def setUp(self):
-        self.model = KNN_LVQ(k=3)
+        self.model = KNN(k=3)
         self.X_train = np.array([[1,2], [1,4], [2,3], [4,5], [4,7]])
         self.y_train = np.array(['A','A','B','B','B'])
-    
+
     def test_fit_and_predict(self):
         self.model.fit(self.X_train, self.y_train)
         predictions = self.model.predict(np.array([[1,3]]))
         self.assertIn(predictions[0], ['A','B'])
 
+    def test_predict_batch_sama_dengan_loop(self):
+        rng = np.random.default_rng(0)
+        X = rng.random((200, 3)) * [20, 100, 15]
+        y = rng.choice(['normal', 'kurang', 'buruk'], size=200)
+        X_query = rng.random((57, 3)) * [20, 100, 15]
+        model = KNN(k=5, bobot=[0.5, 0.3, 0.2], algorithm='brute').fit(X, y)
+
+        # Referensi: implementasi per baris dengan sorting penuh
+        X_scaled = model.scaler_.transform(X_query)
+        expected = []
+        for x in X_scaled:
+            distances = np.sum(model.weights_ * (model.X_train_ - x) ** 2, axis=1)
+            labels = model.y_train_[np.argsort(distances)[:5]]
+            unique, counts = np.unique(labels, return_counts=True)
+            expected.append(unique[np.argmax(counts)])
+
+        np.testing.assert_array_equal(model.predict(X_query), expected)
+        model.set_params(batch_size=7)
+        np.testing.assert_array_equal(model.predict(X_query), expected)
+
+    def test_tree_sama_dengan_brute(self):
+        rng = np.random.default_rng(1)
+        X = rng.random((500, 3)) * [20, 100, 15]
+        y = rng.choice(['normal', 'kurang', 'buruk'], size=500)
+        X_query = rng.random((300, 3)) * [20, 100, 15]
+        brute = KNN(k=5, bobot=[0.35, 0.30, 0.15], algorithm='brute').fit(X, y)
+        for algorithm in ('kd_tree', 'ball_tree', 'auto'):
+            model = KNN(k=5, bobot=[0.35, 0.30, 0.15], algorithm=algorithm).fit(X, y)
+            self.assertIsNotNone(model.tree_)
+            np.testing.assert_array_equal(model.predict(X_query), brute.predict(X_query))
+
+    def test_auto_memilih_backend_per_ukuran_batch(self):
+        rng = np.random.default_rng(2)
+        X = rng.random((1000, 3)) * [20, 100, 15]
+        y = rng.choice(['normal', 'kurang', 'buruk'], size=1000)
+        auto = KNN(k=5, algorithm='auto').fit(X, y)
+        self.assertFalse(auto._pakai_tree(1))
+        self.assertTrue(auto._pakai_tree(100))
+        self.assertTrue(KNN(k=5, algorithm='kd_tree').fit(X, y)._pakai_tree(1))
+        brute = KNN(k=5, algorithm='brute').fit(X, y)
+        X_query = rng.random((100, 3)) * [20, 100, 15]
+        for n in (1, 100):
+            np.testing.assert_array_equal(auto.predict(X_query[:n]), brute.predict(X_query[:n]))
+
+    def test_k_lebih_besar_dari_data_training(self):
+        model = KNN(k=10).fit(self.X_train, self.y_train)
+        self.assertEqual(list(model.predict([[1, 3], [4, 6]])), ['B', 'B'])
+
+    def test_simpan_dan_muat(self):
+        rng = np.random.default_rng(3)
+        X = rng.random((300, 3)) * [20, 100, 15]
+        y = rng.choice(['normal', 'kurang', 'buruk'], size=300)
+        X_query = rng.random((100, 3)) * [25, 110, 18]
+        model = KNN(k=5, bobot=[0.35, 0.30, 0.15]).fit(X, y)
+        buffer = io.BytesIO()
+        model.simpan(buffer, versi=7)
+        buffer.seek(0)
+        termuat = KNN.muat(buffer)
+        self.assertEqual(termuat.metadata_, {'versi': 7})
+        self.assertEqual((termuat.k, termuat.algorithm_), (5, model.algorithm_))
+        np.testing.assert_array_equal(termuat.predict(X_query), model.predict(X_query))
+
+    def test_muat_mengembalikan_tipe_label(self):
+        model = KNN(k=1).fit(self.X_train, np.array([0, 0, 1, 1, 1]))
+        buffer = io.BytesIO()
+        model.simpan(buffer)
+        buffer.seek(0)
+        hasil = KNN.muat(buffer).predict([[1, 3], [6, 8]])
+        self.assertEqual(hasil.dtype, model.y_train_.dtype)
+        self.assertEqual(list(hasil), [0, 1])
+
+class TestLVQ(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        centers = {'normal': [12, 85, 15], 'kurang': [9, 80, 12.5], 'buruk': [7, 75, 11]}
+        self.y = rng.choice(list(centers), size=3000)
+        self.X = np.array([centers[c] for c in self.y]) + rng.normal(0, [1.2, 4, 0.8], (3000, 3))
+
+    def test_minibatch_menghasilkan_prototipe_akurat(self):
+        lvq = LVQ(n_prototypes_per_class=3, learning_rate=0.1, n_epochs=30,
+                  batch_size=64, decay=0.1, random_state=0).fit(self.X, self.y)
+        protos, labels = lvq.get_prototypes()
+        self.assertEqual(protos.shape, (9, 3))
+        self.assertEqual(lvq.n_epochs_, 30)
+        self.assertGreater(lvq.fit_time_, 0)
+        self.assertGreater(KNN(k=3).fit(protos, labels).score(self.X, self.y), 0.85)
+
+    def test_early_stopping(self):
+        lvq = LVQ(n_prototypes_per_class=2, learning_rate=0.1, n_epochs=200,
+                  batch_size=500, decay=1.0, tol=1e-3, random_state=0).fit(self.X, self.y)
+        self.assertLess(lvq.n_epochs_, 200)
+
+    def test_simpan_dan_muat(self):
+        lvq = LVQ(n_prototypes_per_class=2, n_epochs=5, batch_size=100, random_state=0).fit(self.X, self.y)
+        buffer = io.BytesIO()
+        lvq.simpan(buffer)
+        buffer.seek(0)
+        termuat = LVQ.muat(buffer)
+        self.assertEqual((termuat.n_prototypes_per_class, termuat.batch_size, termuat.tol), (2, 100, None))
+        for asli, hasil in zip(lvq.get_prototypes(), termuat.get_prototypes()):
+            np.testing.assert_array_equal(asli, hasil)
+
+        kode = {'normal': 0, 'kurang': 1, 'buruk': 2}
+        lvq = LVQ(n_epochs=2, random_state=0).fit(self.X, np.array([kode[c] for c in self.y]))
+        buffer = io.BytesIO()
+        lvq.simpan(buffer)
+        buffer.seek(0)
+        labels = LVQ.muat(buffer).get_prototypes()[1]
+        self.assertEqual(labels.dtype, lvq.prototype_labels.dtype)
+        np.testing.assert_array_equal(labels, lvq.prototype_labels)
+
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
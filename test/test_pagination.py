@@ -0,0 +1,52 @@
+import sqlite3
+import unittest
+
+import app as aplikasi
+
+class TestPaginationKeyset(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('CREATE TABLE pengukuran (id INTEGER PRIMARY KEY, tanggal_ukur DATE)')
+        # Banyak tanggal kembar agar urutan ditentukan juga oleh id
+        self.conn.executemany('INSERT INTO pengukuran (tanggal_ukur) VALUES (?)',
+                              [(f'2024-01-{i % 7 + 1:02d}',) for i in range(123)])
+        self.urutan = [row['id'] for row in self.conn.execute(
+            'SELECT id FROM pengukuran ORDER BY tanggal_ukur DESC, id DESC')]
+
+    def halaman(self, **args):
+        with aplikasi.app.test_request_context(query_string=args):
+            return aplikasi.ambil_halaman_keyset(
+                self.conn, 'SELECT * FROM pengukuran WHERE 1=1', [],
+                [('tanggal_ukur', 'tanggal_ukur'), ('id', 'id')], turun=True, per_page=10
+            )
+
+    def test_maju_dan_mundur_menelusuri_semua_baris(self):
+        halaman = self.halaman()
+        self.assertIsNone(halaman['sebelum'])
+        semua = []
+        daftar_halaman = [halaman]
+        while True:
+            semua += [row['id'] for row in halaman['rows']]
+            if not halaman['setelah']:
+                break
+            halaman = self.halaman(setelah=halaman['setelah'])
+            daftar_halaman.append(halaman)
+        self.assertEqual(semua, self.urutan)
+        self.assertEqual(len(daftar_halaman), 13)
+
+        # Mundur dari halaman terakhir menghasilkan halaman yang sama persis
+        for sebelumnya in reversed(daftar_halaman[:-1]):
+            halaman = self.halaman(sebelum=halaman['sebelum'])
+            self.assertEqual([row['id'] for row in halaman['rows']],
+                             [row['id'] for row in sebelumnya['rows']])
+        self.assertIsNone(halaman['sebelum'])
+        self.assertIsNotNone(halaman['setelah'])
+
+    def test_kursor_tidak_valid_kembali_ke_halaman_pertama(self):
+        halaman = self.halaman(setelah='bukan-kursor', page=5)
+        self.assertEqual([row['id'] for row in halaman['rows']], self.urutan[:10])
+        self.assertEqual(halaman['nomor'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+from unittest import mock
+
+import app as aplikasi
+from lingkungan import TestDenganDatabase
+
+class TestPencarianBalita(TestDenganDatabase):
+    def setUp(self):
+        super().setUp()
+        self.conn.executemany(
+            'INSERT INTO balita (nik, nama, tanggal_lahir, jenis_kelamin, nama_ortu) VALUES (?, ?, ?, ?, ?)',
+            [('3602011234560001', 'Siti Nurhaliza', '2022-01-01', 'P', 'Ahmad Hidayat'),
+             ('3602011234560002', 'Nur Aisyah', '2022-02-01', 'P', 'Siti Rahayu'),
+             ('3602019999990003', 'Budi Santoso', '2021-05-01', 'L', 'Dewi Lestari')]
+        )
+        self.conn.commit()
+
+    def cari(self, q):
+        return sorted(row['nama'] for row in self.client.get('/balita/cari', query_string={'q': q}).json)
+
+    def test_kueri_fts(self):
+        self.assertEqual(aplikasi.kueri_fts('siti  nur"'), '"siti"* "nur"*')
+        self.assertIsNone(aplikasi.kueri_fts(' "* '))
+
+    def test_cari_prefix_nama_ortu_dan_nik(self):
+        self.assertEqual(self.cari('sit'), ['Nur Aisyah', 'Siti Nurhaliza'])
+        # Semua kata harus cocok, boleh di kolom berbeda
+        self.assertEqual(self.cari('siti nur'), ['Nur Aisyah', 'Siti Nurhaliza'])
+        self.assertEqual(self.cari('siti nurh'), ['Siti Nurhaliza'])
+        self.assertEqual(self.cari('360201999'), ['Budi Santoso'])
+        self.assertEqual(self.cari('"'), [])
+
+    def test_indeks_mengikuti_perubahan_balita(self):
+        self.conn.execute("UPDATE balita SET nama = 'Budiman' WHERE nama = 'Budi Santoso'")
+        self.conn.execute("DELETE FROM balita WHERE nama = 'Nur Aisyah'")
+        self.conn.commit()
+        self.assertEqual(self.cari('budiman'), ['Budiman'])
+        self.assertEqual(self.cari('santoso'), [])
+        self.assertEqual(self.cari('rahayu'), [])
+
+        halaman = self.client.get('/balita', query_string={'nama': 'siti'}).get_data(as_text=True)
+        self.assertIn('Siti Nurhaliza', halaman)
+        self.assertNotIn('Budiman', halaman)
+
+    def test_tanpa_fts5_dicatat_di_log(self):
+        self.conn.execute('DROP TABLE balita_fts')
+        skema = ['CREATE VIRTUAL TABLE balita_fts USING modul_tidak_ada(nama)']
+        with mock.patch.object(aplikasi, 'SKEMA_FTS', skema), \
+                self.assertLogs(aplikasi.app.logger, 'WARNING') as log:
+            aplikasi.migrasi_fts(self.conn)
+        self.assertIn('FTS5 tidak tersedia', log.output[0])
+        self.assertFalse(aplikasi.fts_tersedia(self.conn))
+        # Tanpa indeks, pencarian kembali ke LIKE
+        self.assertEqual(self.cari('budi'), ['Budi Santoso'])
+
+if __name__ == '__main__':
+    unittest.main()
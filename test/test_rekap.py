@@ -0,0 +1,69 @@
+import random
+import unittest
+
+import app as aplikasi
+from lingkungan import TestDenganDatabase
+
+REKAP_ACUAN = '''
+    SELECT strftime('%Y-%m', p.tanggal_ukur), COALESCE(b.desa_id, 0), k.status_gizi, COUNT(*)
+    FROM pengukuran p
+    JOIN klasifikasi k ON k.pengukuran_id = p.id
+    JOIN balita b ON b.id = p.balita_id
+    GROUP BY 1, 2, 3
+'''
+
+class TestRekapBulanan(TestDenganDatabase):
+    def setUp(self):
+        super().setUp()
+        self.conn.executemany('INSERT INTO desa_cimarga (nama_desa) VALUES (?)', [('A',), ('B',)])
+
+        rnd = random.Random(0)
+        for i in range(1, 21):
+            self.conn.execute('INSERT INTO balita (nama, tanggal_lahir, jenis_kelamin, nama_ortu, desa_id) '
+                              "VALUES (?, '2022-01-01', 'L', 'ortu', ?)", (f'anak {i}', rnd.choice([None, 1, 2])))
+        for i in range(1, 301):
+            self.conn.execute('INSERT INTO pengukuran (balita_id, tanggal_ukur, berat_badan, tinggi_badan, '
+                              'lingkar_lengan) VALUES (?, ?, 10, 80, 13)',
+                              (rnd.randint(1, 20), f'2024-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}'))
+            self.conn.execute("INSERT INTO klasifikasi (pengukuran_id, status_gizi, tanggal_klasifikasi) "
+                              "VALUES (?, ?, '2024-01-01')", (i, rnd.choice(aplikasi.STATUS_GIZI)))
+        self.conn.commit()
+
+    def assertRekapSesuai(self):
+        acuan = {row[:3]: row[3] for row in self.conn.execute(REKAP_ACUAN)}
+        rekap = {row[:3]: row[3] for row in self.conn.execute(
+            'SELECT bulan, desa_id, status_gizi, jumlah FROM rekap_bulanan WHERE jumlah != 0')}
+        self.assertEqual(rekap, acuan)
+
+    def test_trigger_menjaga_rekap(self):
+        self.assertRekapSesuai()
+        langkah = [
+            "UPDATE klasifikasi SET status_gizi = 'lebih' WHERE id % 7 = 0",
+            "UPDATE pengukuran SET tanggal_ukur = '2023-05-05' WHERE id % 5 = 0",
+            'UPDATE pengukuran SET balita_id = 3 WHERE id % 11 = 0',
+            'UPDATE balita SET desa_id = 2 WHERE id % 3 = 0',
+            'UPDATE balita SET desa_id = NULL WHERE id % 4 = 0',
+            'DELETE FROM klasifikasi WHERE id % 13 = 0',
+            'DELETE FROM pengukuran WHERE id % 9 = 0',
+            # Cascade ke pengukuran dan klasifikasi tidak boleh mengurangi dua kali
+            'DELETE FROM balita WHERE id IN (2, 5, 7)',
+        ]
+        for sql in langkah:
+            with self.subTest(sql=sql):
+                self.conn.execute(sql)
+                self.assertRekapSesuai()
+        aplikasi.bangun_ulang_rekap(self.conn)
+        self.assertRekapSesuai()
+
+    def test_tren_bulanan_sama_dengan_query_langsung(self):
+        for mulai, akhir in [(None, None), ('2024-01-01', '2024-12-31'), ('2024-02-15', '2024-06-10'),
+                             ('2024-03-05', '2024-03-20'), ('2024-04-01', '2024-04-30'),
+                             ('2024-02-29', None), (None, '2024-07-31')]:
+            with self.subTest(mulai=mulai, akhir=akhir):
+                rows = aplikasi._tren_dari_pengukuran(self.conn, mulai or '0001-01-01', akhir or '9999-12-31')
+                acuan = {(bulan, status): jumlah for bulan, status, jumlah in rows
+                         if status in aplikasi.STATUS_TREN}
+                self.assertEqual(aplikasi.tren_bulanan(self.conn, mulai, akhir), acuan)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import random
+import unittest
+
+import app as aplikasi
+from lingkungan import TestDenganDatabase
+
+class TestReklasifikasi(TestDenganDatabase):
+    def setUp(self):
+        super().setUp()
+        self.chunk_lama = aplikasi.UKURAN_CHUNK_REKLASIFIKASI
+        aplikasi.UKURAN_CHUNK_REKLASIFIKASI = 7
+        rnd = random.Random(3)
+        self.conn.executemany('INSERT INTO desa_cimarga (nama_desa) VALUES (?)', [('A',), ('B',)])
+        self.conn.executemany(
+            'INSERT INTO dataset_lvq (feature1, feature2, feature3, target) VALUES (?, ?, ?, ?)',
+            [(bb, tb, ll, status) for bb, tb, ll, status in
+             [(8, 70, 11, 'buruk'), (10, 80, 13, 'kurang'), (12, 88, 15, 'normal'), (15, 95, 17, 'lebih')]]
+        )
+        for i in range(1, 11):
+            self.conn.execute("INSERT INTO balita (nama, tanggal_lahir, jenis_kelamin, nama_ortu, desa_id) "
+                              "VALUES (?, '2022-01-01', 'L', 'x', ?)", (f'anak {i}', i % 2 + 1))
+        for i in range(1, 41):
+            self.conn.execute('INSERT INTO pengukuran (balita_id, tanggal_ukur, berat_badan, tinggi_badan, '
+                              'lingkar_lengan) VALUES (?, ?, ?, ?, ?)',
+                              (i % 10 + 1, f'2024-{i % 12 + 1:02d}-10', rnd.uniform(7, 16),
+                               rnd.uniform(68, 97), rnd.uniform(10, 18)))
+            self.conn.execute("INSERT INTO klasifikasi (pengukuran_id, status_gizi, tanggal_klasifikasi) "
+                              "VALUES (?, 'normal', '2024-01-01')", (i,))
+        self.conn.commit()
+
+    def tearDown(self):
+        aplikasi.UKURAN_CHUNK_REKLASIFIKASI = self.chunk_lama
+
+    def jalankan(self, **filter_data):
+        with aplikasi.app.app_context():
+            model = aplikasi.get_model_knn(self.conn)
+            return model, aplikasi.reklasifikasi(self.conn, model, **filter_data)
+
+    def test_reklasifikasi_hanya_baris_usang(self):
+        # Filter desa hanya menyentuh balita desa tersebut
+        _, hasil = self.jalankan(desa_id=1)
+        self.assertEqual(hasil['n_diproses'], 20)
+        self.assertEqual(aplikasi.hitung_klasifikasi_usang(self.conn, hasil['versi_model']), 20)
+
+        model, hasil = self.jalankan()
+        self.assertEqual(hasil['n_diproses'], 20)
+        rows = self.conn.execute('''
+            SELECT p.berat_badan, p.tinggi_badan, p.lingkar_lengan, k.status_gizi, k.versi_model
+            FROM pengukuran p JOIN klasifikasi k ON k.pengukuran_id = p.id ORDER BY p.id
+        ''').fetchall()
+        self.assertEqual([row[3] for row in rows], model.predict([row[:3] for row in rows]).tolist())
+        self.assertTrue(all(row[4] == model.versi_model_ for row in rows))
+
+        # Rekap bulanan ikut diperbarui trigger
+        rekap = dict(self.conn.execute('SELECT status_gizi, SUM(jumlah) FROM rekap_bulanan GROUP BY 1 '
+                                       'HAVING SUM(jumlah) != 0').fetchall())
+        jumlah = dict(self.conn.execute('SELECT status_gizi, COUNT(*) FROM klasifikasi GROUP BY 1').fetchall())
+        self.assertEqual(rekap, jumlah)
+
+        # Tidak ada baris usang lagi; memaksa semua baris tanpa perubahan status tidak menaikkan versi data
+        self.assertEqual(self.jalankan()[1]['n_diproses'], 0)
+        versi_data = aplikasi.get_versi(self.conn, 'data')
+        hasil = self.jalankan(semua=True, start_date='2024-03-01', end_date='2024-05-31')[1]
+        self.assertEqual((hasil['n_diproses'], hasil['n_berubah']), (12, 0))
+        self.assertEqual(aplikasi.get_versi(self.conn, 'data'), versi_data)
+
+    def test_pengukuran_baru_dicap_versi_model_yang_memprediksi(self):
+        aplikasi.naikkan_versi(self.conn, 'model')
+        self.conn.commit()
+        with aplikasi.app.app_context():
+            model = aplikasi.get_model_knn(self.conn)
+        # Versi naik lagi setelah prediksi: cap harus tetap versi model yang dipakai
+        get_model_lama = aplikasi.get_model_knn
+        def get_model_lalu_naikkan(conn):
+            model = get_model_lama(conn)
+            aplikasi.naikkan_versi(conn, 'model')
+            return model
+        aplikasi.get_model_knn = get_model_lalu_naikkan
+        try:
+            self.client.post('/pengukuran/tambah', data={'balita_id': 1, 'berat_badan': 12,
+                                                    'tinggi_badan': 88, 'lingkar_lengan': 15})
+        finally:
+            aplikasi.get_model_knn = get_model_lama
+        versi = self.conn.execute('SELECT versi_model FROM klasifikasi '
+                                  'WHERE pengukuran_id = (SELECT MAX(id) FROM pengukuran)').fetchone()[0]
+        self.assertEqual(versi, model.versi_model_)
+        self.assertEqual(aplikasi.get_versi(self.conn, 'model'), model.versi_model_ + 1)
+
+    def test_versi_model_baru_membuat_semua_usang(self):
+        model, _ = self.jalankan()
+        aplikasi.naikkan_versi(self.conn, 'model')
+        self.conn.commit()
+        self.assertEqual(aplikasi.hitung_klasifikasi_usang(self.conn, model.versi_model_ + 1), 40)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import time
+import unittest
+
+import numpy as np
+from sklearn.model_selection import StratifiedKFold, cross_val_score
+
+import app as aplikasi
+from models.knn import KNN
+from models import tuning
+from lingkungan import TestDenganDatabase
+
+CV = {'n_splits': 5, 'shuffle': True, 'random_state': 42}
+
+def data_tiga_kelas(n_per_kelas=30, seed=0):
+    rng = np.random.default_rng(seed)
+    X = np.vstack([rng.normal(pusat, [1.5, 3, 0.8], (n_per_kelas, 3)) for pusat in (1, 3, 5)])
+    y = np.repeat(['buruk', 'kurang', 'normal'], n_per_kelas)
+    return X, y
+
+class TestPencarianParameter(unittest.TestCase):
+    def test_skor_sama_dengan_cross_val_knn(self):
+        X, y = data_tiga_kelas()
+        leaderboard = tuning.cari_parameter(X, y, [1, 4, 7, 200], tuning.kandidat_grid([0.5, 1, 3]),
+                                            CV, n_proses=1)
+        self.assertEqual(len(leaderboard), 4 * (27 - 2))  # (1,1,1) ~ (.5,.5,.5) ~ (3,3,3)
+        self.assertEqual(leaderboard, sorted(leaderboard, key=lambda b: (-b['cv_mean'], b['cv_std'], b['nilai_k'])))
+        for baris in leaderboard[::7]:
+            with self.subTest(**baris):
+                acuan = cross_val_score(KNN(k=baris['nilai_k'], bobot=baris['bobot']), X, y,
+                                        cv=StratifiedKFold(**CV)) * 100
+                self.assertAlmostEqual(baris['cv_mean'], acuan.mean())
+                self.assertAlmostEqual(baris['cv_std'], acuan.std())
+
+    def test_normalisasi_bobot(self):
+        hasil = tuning.normalisasi_bobot([[1, 1, 2], [2, 2, 4], [0, 0, 0], [1, -1, 1], [0, 0, 5]])
+        np.testing.assert_allclose(hasil, [[0.25, 0.25, 0.5], [0, 0, 1]])
+        with self.assertRaises(ValueError):
+            tuning.cari_parameter(*data_tiga_kelas(), [3], [[0, 0, 0]], CV, n_proses=1)
+
+class TestJobPencarian(TestDenganDatabase):
+    def setUp(self):
+        super().setUp()
+        self.atur_config(TUNING_PROSES=1)
+        X, y = data_tiga_kelas(10)
+        self.conn.executemany('INSERT INTO dataset_lvq (feature1, feature2, feature3, target) VALUES (?, ?, ?, ?)',
+                              [(*map(float, x), str(t)) for x, t in zip(X, y)])
+        self.conn.commit()
+
+    def test_leaderboard_dicatat_di_riwayat(self):
+        self.client.post('/parameter/pencarian', data={'mode': 'acak', 'daftar_k': '1 3 5', 'n_sampel': 40})
+        for _ in range(200):
+            job = aplikasi.job_runner.terakhir('pencarian_parameter')
+            if job['status'] not in ('antri', 'berjalan'):
+                break
+            time.sleep(0.05)
+        self.assertEqual(job['status'], 'selesai', job['pesan'])
+
+        conn = aplikasi.connect_db()
+        params = conn.execute('SELECT * FROM parameter_knn ORDER BY id DESC LIMIT 1').fetchone()
+        rows = conn.execute("SELECT * FROM parameter_history WHERE sumber = 'pencarian' ORDER BY peringkat").fetchall()
+        conn.close()
+        self.assertEqual([row['peringkat'] for row in rows], list(range(1, aplikasi.BATAS_LEADERBOARD + 1)))
+        self.assertEqual([row['cv_mean'] for row in rows], [b['cv_mean'] for b in job['hasil']['leaderboard']])
+        for row in rows:
+            total = sum(row[k] for k in ('bobot_berat', 'bobot_tinggi', 'bobot_lila', 'bobot_umur', 'bobot_jk'))
+            self.assertAlmostEqual(total, 1, places=4)
+            self.assertEqual(row['bobot_umur'], params['bobot_umur'])
+
+        halaman = self.client.get('/parameter').get_data(as_text=True)
+        self.assertEqual(halaman.count('pakai-parameter"'), aplikasi.BATAS_LEADERBOARD)
+
+    def test_pratinjau_memakai_fold_cache(self):
+        siapkan_lama = tuning.siapkan_fold
+        dipanggil = []
+        tuning.siapkan_fold = lambda *args: dipanggil.append(1) or siapkan_lama(*args)
+        try:
+            args = {'nilai_k': 5, 'bobot_bb': 0.2, 'bobot_tb': 0.1, 'bobot_ll': 0.3}
+            pratinjau = self.client.get('/parameter/pratinjau', query_string=args).json
+            with aplikasi.app.app_context():
+                acuan = aplikasi.evaluasi_model_with_parameters(5, [0.2, 0.1, 0.3])
+            self.assertAlmostEqual(pratinjau['cv_mean'], acuan['cv_mean'])
+            self.assertAlmostEqual(pratinjau['cv_std'], acuan['cv_std'])
+            self.assertIn(5, [baris['nilai_k'] for baris in pratinjau['per_k']])
+
+            self.client.get('/parameter/pratinjau', query_string=dict(args, bobot_tb=0.9))
+            self.assertEqual(len(dipanggil), 1)
+
+            # Prototipe berubah -> versi model naik -> fold disiapkan ulang
+            conn = aplikasi.connect_db()
+            conn.execute('DELETE FROM dataset_lvq WHERE id = 1')
+            aplikasi.naikkan_versi(conn, 'model')
+            conn.commit()
+            conn.close()
+            self.client.get('/parameter/pratinjau', query_string=args)
+            self.assertEqual(len(dipanggil), 2)
+        finally:
+            tuning.siapkan_fold = siapkan_lama
+
+        self.assertEqual(self.client.get('/parameter/pratinjau?nilai_k=3&bobot_bb=0&bobot_tb=0&bobot_ll=0')
+                         .status_code, 400)
+        self.assertEqual(self.client.get('/parameter/pratinjau?nilai_k=x').status_code, 400)
+        for nilai in ('nan', 'inf', '-inf'):
+            self.assertEqual(self.client.get(f'/parameter/pratinjau?nilai_k=3&bobot_bb={nilai}&bobot_tb=1&bobot_ll=1')
+                             .status_code, 400)
+
+    def test_input_tidak_valid(self):
+        self.client.post('/parameter/pencarian', data={'mode': 'grid', 'daftar_k': '3', 'nilai_bobot': 'a, b'})
+        self.client.post('/parameter/pencarian', data={'mode': 'grid', 'daftar_k': '0', 'nilai_bobot': '1'})
+        self.assertIsNone(aplikasi.job_runner.terakhir('pencarian_parameter'))
+
+if __name__ == '__main__':
+    unittest.main()
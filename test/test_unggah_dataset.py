@@ -0,0 +1,32 @@
+import io
+import unittest
+import zipfile
+
+from lingkungan import TestDenganDatabase
+
+class TestUnggahDatasetTraining(TestDenganDatabase):
+    def unggah(self, isi, nama):
+        return self.client.post('/unggah_dataset_training', data={'file': (io.BytesIO(isi), nama)},
+                                content_type='multipart/form-data')
+
+    def test_csv_diimpor(self):
+        response = self.unggah(b'feature1,feature2,feature3,target\n10,80,13,normal\n9,x,12,kurang\n', 'data.csv')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.conn.execute('SELECT COUNT(*) FROM dataset_training').fetchone()[0], 1)
+
+    def test_excel_rusak_ditolak_tanpa_error_server(self):
+        zip_lain = io.BytesIO()
+        with zipfile.ZipFile(zip_lain, 'w') as z:
+            z.writestr('a.txt', 'bukan workbook')
+        for isi in (b'bukan file excel', zip_lain.getvalue()):
+            with self.subTest(isi=isi[:10]):
+                response = self.unggah(isi, 'data.xlsx')
+                self.assertEqual(response.status_code, 302)
+                with self.client.session_transaction() as sess:
+                    kategori, pesan = sess.pop('_flashes')[-1]
+                self.assertEqual(kategori, 'danger')
+                self.assertIn('File Excel tidak dapat dibaca', pesan)
+        self.assertEqual(self.conn.execute('SELECT COUNT(*) FROM dataset_training').fetchone()[0], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modul berat yang hanya boleh diimpor oleh route/job yang memakainya
+MODUL_BERAT = ('sklearn', 'scipy', 'pandas', 'openpyxl', 'pdfkit', 'pypdf',
+               'models.knn', 'models.lvq', 'models.tuning')
+
+# Batas waktu impor app (detik); sebelum impor malas sekitar 1,8 detik
+BATAS_DETIK = float(os.environ.get('BATAS_IMPOR_APP_DETIK', 1.0))
+
+class TestWaktuImpor(unittest.TestCase):
+    """Mengimpor app (start worker gunicorn) tidak boleh memuat dependensi berat"""
+    def test_impor_app(self):
+        hasil = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'],
+                               cwd=ROOT, capture_output=True, text=True, timeout=120)
+        self.assertEqual(hasil.returncode, 0, hasil.stderr[-2000:])
+        self.assertEqual(hasil.stdout, '')
+
+        # Format baris: "import time: <self us> | <kumulatif us> | <nama modul>"
+        kumulatif = {}
+        for baris in hasil.stderr.splitlines():
+            if baris.startswith('import time:') and '|' in baris:
+                _, total, nama = baris[len('import time:'):].split('|')
+                if total.strip().isdigit():
+                    kumulatif[nama.strip()] = int(total)
+
+        berat = sorted(nama for nama in kumulatif if nama.split('.')[0] in MODUL_BERAT or nama in MODUL_BERAT)
+        self.assertEqual(berat, [])
+        self.assertLess(kumulatif['app'] / 1e6, BATAS_DETIK)
+
+    def test_impor_tidak_memulai_thread(self):
+        # Artefak model ada, tetapi memuatnya hanya tugas gunicorn.conf.py / app.run
+        kode = ('import threading\n'
+                'nama = []\n'
+                'start = threading.Thread.start\n'
+                'threading.Thread.start = lambda self: (nama.append(self.name), start(self))[1]\n'
+                'import app\n'
+                'print(nama)\n')
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(os.path.join(tmpdir, 'knn.json'), 'w') as f:
+                f.write('{}')
+            hasil = subprocess.run([sys.executable, '-c', kode], cwd=ROOT, env=dict(os.environ, MODEL_DIR=tmpdir),
+                                   capture_output=True, text=True, timeout=120)
+        self.assertEqual(hasil.returncode, 0, hasil.stderr[-2000:])
+        self.assertEqual(hasil.stdout.strip(), '[]')
+
+if __name__ == '__main__':
+    unittest.main()